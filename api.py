@@ -0,0 +1,157 @@
+import json
+import logging
+import os
+import shutil
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote
+
+from jobs import JobForbidden, JobRejected, get_queue
+
+# ─────────────────────────────────────────────────────────────
+# 로컬 HTTP API (다른 내부 도구가 추출을 요청할 때)
+#   POST   /jobs              {"mode": "single|multi|bulk|export", "ids": [...], "format": "csv"}
+#                             → 202 {"id", "status", "deduplicated"}  (ids 생략 = DB 전체, bulk/export만)
+#   GET    /jobs              내 작업 목록
+#   GET    /jobs/<id>         상태/진행률 (done/total)
+#   GET    /jobs/<id>/result  결과 파일 (끝나기 전이면 409, 보관 용량 초과로 삭제됐으면 410)
+#   DELETE /jobs/<id>         취소 (요청/구독하지 않은 클라이언트면 403)
+#   GET    /health
+#   클라이언트 구분: X-Client-Id 헤더 (없으면 접속 주소) — 작업 큐의 클라이언트별 한도에 사용
+#   기본은 127.0.0.1에만 열림 (TOX_API_HOST / TOX_API_PORT, 포트 0이면 사용 안 함)
+# ─────────────────────────────────────────────────────────────
+
+API_HOST = os.environ.get('TOX_API_HOST', '127.0.0.1')
+API_PORT = int(os.environ.get('TOX_API_PORT', '8765'))
+MAX_BODY = 1 << 20     # 요청 본문 최대 바이트
+
+log = logging.getLogger('tox_extract.api')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = 'tox-extract'
+
+    # ── 응답 ──────────────────────────────────────────────
+    def _json(self, code, obj):
+        body = json.dumps(obj, ensure_ascii=False).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, code, message):
+        self._json(code, {'error': message})
+
+    def _client(self):
+        return self.headers.get('X-Client-Id') or self.client_address[0]
+
+    def _route(self):
+        """경로 → (작업 ID 또는 None, 하위 경로 또는 None); /jobs 밖이면 None"""
+        parts = [p for p in self.path.split('?', 1)[0].split('/') if p]
+        if not parts or parts[0] != 'jobs' or len(parts) > 3:
+            return None
+        return (parts[1] if len(parts) > 1 else None), (parts[2] if len(parts) > 2 else None)
+
+    def _job(self, job_id):
+        job = self.server.queue.get(job_id)
+        if job is None:
+            self._error(404, f"작업을 찾을 수 없습니다: {job_id}")
+        return job
+
+    # ── 메서드 ────────────────────────────────────────────
+    def do_GET(self):
+        if self.path.split('?', 1)[0].rstrip('/') == '/health':
+            return self._json(200, {'status': 'ok'})
+        route = self._route()
+        if route is None or route[1] not in (None, 'result'):
+            return self._error(404, "없는 경로입니다.")
+        job_id, sub = route
+        if job_id is None:
+            return self._json(200, [j.as_dict() for j in self.server.queue.jobs(self._client())])
+        job = self._job(job_id)
+        if job is None:
+            return
+        if sub is None:
+            return self._json(200, job.as_dict())
+        opened = job.open_result()     # 임시 파일 결과는 디스크에서 나눠 보냄
+        if opened is None:
+            if job.evicted:
+                return self._error(410, "결과 보관 용량을 넘어 결과가 삭제되었습니다. 다시 요청해주세요.")
+            return self._error(409, f"작업이 끝나지 않았습니다 ({job.status}).")
+        f, filename, mime = opened
+        with f:
+            size = f.seek(0, os.SEEK_END)
+            f.seek(0)
+            self.send_response(200)
+            self.send_header('Content-Type', mime)
+            self.send_header('Content-Length', str(size))
+            self.send_header('Content-Disposition', f"attachment; filename*=UTF-8''{quote(filename)}")
+            self.end_headers()
+            shutil.copyfileobj(f, self.wfile)
+
+    def do_POST(self):
+        route = self._route()
+        if route != (None, None):
+            return self._error(404, "없는 경로입니다.")
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY:
+            return self._error(413, "요청 본문이 너무 큽니다.")
+        try:
+            req = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(req, dict):
+                raise ValueError("요청 본문은 JSON 객체여야 합니다.")
+            options = {k: req[k] for k in ('format', 'workers') if req.get(k) is not None}
+            job, dedup = self.server.queue.submit(req.get('mode'), req.get('ids'), self._client(), **options)
+        except JobRejected as e:
+            return self._error(429, str(e))
+        except ValueError as e:      # json.JSONDecodeError 포함
+            return self._error(400, str(e))
+        self._json(202, {'id': job.id, 'status': job.status, 'deduplicated': dedup})
+
+    def do_DELETE(self):
+        route = self._route()
+        if route is None or route[0] is None or route[1] is not None:
+            return self._error(404, "없는 경로입니다.")
+        try:
+            job = self.server.queue.cancel(route[0], self._client())
+        except JobForbidden as e:
+            return self._error(403, str(e))
+        if job is None:
+            return self._error(404, f"작업을 찾을 수 없습니다: {route[0]}")
+        self._json(200, job.as_dict())
+
+    def log_message(self, fmt, *args):
+        log.debug("%s %s", self.address_string(), fmt % args)
+
+
+def make_server(host=API_HOST, port=API_PORT, queue=None):
+    """HTTP 서버 생성 (serve_forever는 호출한 쪽에서)"""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.queue = queue or get_queue()
+    return server
+
+
+_SERVER = None
+_TRIED  = False
+_LOCK   = threading.Lock()
+
+
+def serve_background(host=API_HOST, port=API_PORT):
+    """
+    프로세스당 한 번 API를 백그라운드 스레드로 시작 → 서버 또는 None
+    (포트 0이거나 이미 다른 프로세스가 쓰고 있으면 None — Streamlit 세션이 여럿이어도 안전)
+    """
+    global _SERVER, _TRIED
+    with _LOCK:
+        if not _TRIED and port:
+            _TRIED = True
+            try:
+                _SERVER = make_server(host, port)
+            except OSError as e:
+                log.warning("API를 열 수 없습니다 (%s:%s): %s", host, port, e)
+                return None
+            threading.Thread(target=_SERVER.serve_forever, name='tox-api', daemon=True).start()
+            log.info("API 시작 http://%s:%s", host, port)
+    return _SERVER
@@ -0,0 +1,388 @@
+import argparse
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+import ingest
+from engine import TPL_MULTI, TPL_SINGLE
+from extractor import SINGLE_CAT_ROWS, build_reports, extract_multi, extract_single, stream_multi
+from selection import DANISH_CHL, DANISH_CHO, DANISH_MODELS, EXP_RULES, VEGA_PRIORITY, normalize, select_best
+from styles import SINGLE_STYLE_RANGES, single_prestyled, style_single
+from templates import load_template
+from tox_index import DBIndex
+
+# ─────────────────────────────────────────────────────────────
+# 합성 DB 벤치마크
+#   python benchmark.py                       # 100종 규모 측정 후 기준선과 비교
+#   python benchmark.py --scales 100 10000    # 여러 규모
+#   python benchmark.py --save-baseline       # 현재 측정값을 기준선으로 저장
+#   반복(--repeat) 측정 시 단계별 최솟값을 사용 (공유 머신의 잡음 완화)
+#   기준선 대비 threshold(기본 +50%)와 최소 차이(min-delta)를 모두 넘는 단계가 있으면 종료 코드 1
+# ─────────────────────────────────────────────────────────────
+
+BASELINE_FILE  = 'benchmark_baseline.json'
+WORK_DIR       = os.environ.get('TOX_BENCH_DIR', '.bench')
+EXCEL_MAX_ROWS = 1_048_575          # 시트당 데이터 행 상한 (헤더 제외)
+GENERATOR_VERSION = 1
+SAMPLE_IDS     = 20                 # 물질 단위 단계의 측정 표본 수
+
+# (결과도출방법, 출처) 조합과 (물질·유해성항목·조합)당 평균 행 수 (번들 DB 12종 기준 근사)
+COMBOS = {
+    ('실험값', 'ECHA CHEM'):             3.3,
+    ('실험값', 'US DashBoard'):          0.6,
+    ('실험값', 'Pubchem'):               0.9,
+    ('실험값', 'K-reach'):               0.5,
+    ('실험값', '환경부유해성심사결과'):  0.5,
+    ('Read-across', 'QSAR Toolbox v.4.8'): 0.5,
+    ('QSAR', 'QSAR Toolbox v.4.8'):      2.6,
+    ('QSAR', 'Danish QSAR'):             0.7,
+    ('QSAR', 'VEGA'):                    1.0,
+    ('QSAR', 'Epi suite'):               1.0,
+    ('AI-based QSAR', 'HAZMAP'):         0.3,
+    ('AI-based QSAR', 'Protox 3.0'):     0.3,
+    ('AI-based QSAR', 'VEGA'):           0.9,
+    ('AI-based QSAR', 'Cheminfomatics'): 2.8,
+}
+# 템플릿에 쓰이지 않는 유해성항목 (필터링 부담용, 낮은 빈도)
+EXTRA_CATS = ['발달독성', '피부과민성', '담수미생물생장저해', '발암성', '어류만성독성']
+EXTRA_RATE = 0.05
+
+HUMAN_CATS = {'급성경구독성', '급성흡입독성', '피부부식성/자극성', '복귀돌연변이',
+              '포유류 배양세포를 이용한 염색체이상', '소핵시험', '발달독성', '피부과민성', '발암성'}
+CAT_ENDPOINTS = {
+    '피부부식성/자극성':                   'Skin irritation',
+    '복귀돌연변이':                        'Gene mutation',
+    '포유류 배양세포를 이용한 염색체이상': 'Chromosome aberration',
+    '소핵시험':                            'Micronucleus activity',
+    '이분해성':                            'Biodegradation',
+}
+CAT_UNITS = {'급성경구독성': 'mg/kg', '급성흡입독성': 'mg/L air', '이분해성': '%'}
+QUALITATIVE = ['positive', 'negative', 'negative', '-']
+GUIDELINES  = ['-', '-', 'EU Method B.1', 'OECD TG {}', 'OECD Guideline {}']
+DURATIONS   = ['-', '24 h', '48h', '48 h', '72 h', '96h', '96 h', '4 h']
+
+TOX_COLUMNS = ['우선순위', '내부식별자', 'CAS', '물질명', '분자식', '분자량', 'SMILES', '대분류', '유해성항목',
+               'Endpoint', 'Result', '단위', '시험종', 'Strain', '성별', 'Duration', 'Duration_unit',
+               '결과도출방법', '시험지침', 'Domain status', '모델 종류 및 버전', '출처',
+               '시험종(표준)', 'Duration(표준)', 'Endpoint(표준)']
+
+
+# ─────────────────────────────────────────────────────────────
+# 생성기
+# ─────────────────────────────────────────────────────────────
+
+def make_synthetic(n_substances, seed=0):
+    """실제 스키마의 (물질정보, 유해성정보) DataFrame 생성"""
+    rng  = np.random.default_rng(seed)
+    tids = np.array([f"S-{i:06d}" for i in range(1, n_substances + 1)], dtype=object)
+    df_mat = pd.DataFrame({
+        '내부식별자': tids,
+        'CAS':        [f"{100000 + i}-{i % 90 + 10}-{i % 10}" for i in range(n_substances)],
+        '물질명':     [f"synthetic substance {i}" for i in range(n_substances)],
+        '분자식':     [f"C{6 + i % 20}H{10 + i % 30}O{i % 4}" for i in range(n_substances)],
+        '분자량':     [f"{100 + (i * 7.31) % 400:.2f} g/mol" for i in range(n_substances)],
+        'SMILES':     ['CCOC(=O)C(=C)C'] * n_substances,
+        'Unnamed: 6': np.nan,
+    })
+
+    # (물질, 유해성항목, 조합)별 행 수 → 행 단위 펼치기
+    cats   = list(SINGLE_CAT_ROWS) + EXTRA_CATS
+    combos = list(COMBOS)
+    lam    = np.array([[COMBOS[c] if cat in SINGLE_CAT_ROWS else EXTRA_RATE for c in combos] for cat in cats])
+    counts = rng.poisson(np.broadcast_to(lam, (n_substances,) + lam.shape))
+    # 물질마다 템플릿 유해성항목 × 조합이 최소 1행은 있도록 첫 물질은 모두 채움
+    counts[0, :len(SINGLE_CAT_ROWS)] = np.maximum(counts[0, :len(SINGLE_CAT_ROWS)], 1)
+    flat   = counts.ravel()
+    cell   = np.repeat(np.arange(flat.size), flat)
+    sub_i, cat_i, combo_i = np.unravel_index(cell, counts.shape)
+    n = len(cell)
+
+    cat    = np.array(cats, dtype=object)[cat_i]
+    method = np.array([c[0] for c in combos], dtype=object)[combo_i]
+    src    = np.array([c[1] for c in combos], dtype=object)[combo_i]
+    is_exp = method == '실험값'
+
+    # Endpoint / 시험종 / Duration / 시험지침 (실험값 규칙 충족 여부를 섞어 생성)
+    endpoint = np.array([CAT_ENDPOINTS.get(c, 'NOEC') for c in cat], dtype=object)
+    species  = np.full(n, '-', dtype=object)
+    duration = rng.choice(DURATIONS, n).astype(object)
+    gl_num   = np.full(n, '999', dtype=object)
+    for c, (ep, sp, dur, gl) in EXP_RULES.items():
+        rows = cat == c
+        hit  = rows & (rng.random(n) < 0.7)
+        endpoint[hit] = ep
+        species[rows] = rng.choice(sp + ['Mouse', '-'], rows.sum())
+        if dur is not None:
+            duration[hit & (rng.random(n) < 0.8)] = dur
+        gl_num[rows] = gl
+    skin = cat == '피부부식성/자극성'
+    species[skin] = rng.choice(['Rabbit', 'Human', '-'], skin.sum())
+    chrom = cat == '포유류 배양세포를 이용한 염색체이상'
+    species[chrom] = rng.choice(['CHO Cells', 'CHL Cells'], chrom.sum())
+    guideline = np.array([g.format(num) if '{}' in g else g
+                          for g, num in zip(rng.choice(GUIDELINES, n), gl_num)], dtype=object)
+
+    # Result: 수치/문자열 혼합 (실제 DB와 같이 float, int, str이 섞임)
+    result = np.round(rng.lognormal(3.0, 2.0, n), 3).astype(object)
+    ints   = rng.random(n) < 0.2
+    result[ints] = np.floor(np.asarray(result[ints], dtype=float)).astype(int)
+    qual   = np.isin(cat, ['피부부식성/자극성', '복귀돌연변이', '포유류 배양세포를 이용한 염색체이상', '소핵시험'])
+    result[qual] = rng.choice(QUALITATIVE, qual.sum())
+    bio = cat == '이분해성'
+    result[bio] = np.round(rng.uniform(0, 100, bio.sum()), 1)
+    result[rng.random(n) < 0.03] = '-'
+    result[rng.random(n) < 0.02] = '>2000'
+
+    # Domain status / 모델 종류 및 버전
+    domain = rng.choice(['-', 'In domain', 'Out of domain'], n).astype(object)
+    vega   = src == 'VEGA'
+    labels = rng.choice(VEGA_PRIORITY, vega.sum())
+    scores = np.round(rng.uniform(0.2, 1.0, vega.sum()), 2)
+    domain[vega] = [f"{l}({s})" for l, s in zip(labels, scores)]
+    model = np.full(n, '-', dtype=object)
+    danish = src == 'Danish QSAR'
+    model[danish] = [DANISH_MODELS.get(c, 'other model') if rng.random() < 0.5 else 'other model'
+                     for c in cat[danish]]
+    model[danish & chrom] = rng.choice([DANISH_CHO, DANISH_CHL], (danish & chrom).sum())
+    model[src == 'Epi suite'] = 'ECOSAR v1.11'
+    model[src == 'Cheminfomatics'] = rng.choice(['Consensus', 'Random Forest', 'XGBoost'], (src == 'Cheminfomatics').sum())
+
+    unit = np.array([CAT_UNITS.get(c, 'mg/L') for c in cat], dtype=object)
+    unit[qual] = '-'
+    mat = df_mat.iloc[sub_i]
+    df_tox = pd.DataFrame({
+        '우선순위': np.nan,
+        '내부식별자': tids[sub_i],
+        'CAS': mat['CAS'].to_numpy(), '물질명': mat['물질명'].to_numpy(),
+        '분자식': mat['분자식'].to_numpy(), '분자량': mat['분자량'].to_numpy(),
+        'SMILES': mat['SMILES'].to_numpy(),
+        '대분류': np.where(np.isin(cat, list(HUMAN_CATS)), '인체', '환경'),
+        '유해성항목': cat, 'Endpoint': endpoint, 'Result': result, '단위': unit,
+        '시험종': species, 'Strain': '-', '성별': '-',
+        'Duration': [d.split()[0].rstrip('h') for d in duration],
+        'Duration_unit': np.where(duration == '-', '-', 'h'),
+        '결과도출방법': method, '시험지침': np.where(is_exp, guideline, '-'),
+        'Domain status': domain, '모델 종류 및 버전': model, '출처': src,
+        '시험종(표준)': species, 'Duration(표준)': duration, 'Endpoint(표준)': endpoint,
+    }, columns=TOX_COLUMNS)
+    return df_mat, df_tox
+
+
+def prepare_db(n_substances, seed=0, work_dir=WORK_DIR):
+    """
+    합성 DB를 만들어 두고 (엑셀 경로 또는 None, 스냅샷 경로) 반환
+    유해성정보가 엑셀 시트 행 상한을 넘는 규모는 스냅샷만 생성
+    """
+    os.makedirs(work_dir, exist_ok=True)
+    db_path = os.path.join(work_dir, f"synthetic_{n_substances}_s{seed}_v{GENERATOR_VERSION}"
+                                     f".{ingest.SNAPSHOT_VERSION}.xlsx")
+    snap_path = ingest.snapshot_path(db_path)
+    if os.path.exists(snap_path):
+        return (db_path if os.path.exists(db_path) else None), snap_path
+
+    df_mat, df_tox = make_synthetic(n_substances, seed)
+    if len(df_tox) <= EXCEL_MAX_ROWS:
+        with pd.ExcelWriter(db_path) as w:
+            df_mat.to_excel(w, sheet_name=ingest.SHEET_MAT, index=False)
+            df_tox.to_excel(w, sheet_name=ingest.SHEET_TOX, index=False)
+        ingest.build_snapshot(db_path)
+        return db_path, snap_path
+
+    df_mat, df_tox = ingest.compact(df_mat, df_tox)
+    df_tox = normalize(df_tox)
+    ingest._write_snapshot(snap_path, {
+        'meta': {'version': ingest.SNAPSHOT_VERSION, 'mtime_ns': 0, 'size': 0, 'sha256': '',
+                 'id_hashes': ingest.id_hashes(df_mat, df_tox)},
+        ingest.SHEET_MAT: df_mat,
+        ingest.SHEET_TOX: df_tox,
+    })
+    return None, snap_path
+
+
+# ─────────────────────────────────────────────────────────────
+# 측정
+# ─────────────────────────────────────────────────────────────
+
+# 재시작 직후 상황: 새 프로세스에서 앱과 같이 사전 적재를 시작하고 바로 첫 요청
+COLD_START = """
+import sys, time
+t0 = time.perf_counter()
+import engine, prewarm
+prewarm.start(sys.argv[1], {'single': engine.TPL_SINGLE, 'multi': engine.TPL_MULTI})
+engine.single_xlsx(sys.argv[2], sys.argv[1], cache=False)
+print(time.perf_counter() - t0)
+"""
+
+
+def first_download(db_path, tid, cold=True):
+    """
+    새 프로세스 시작 → 첫 개별물질 결과 바이트까지 (초, 인터프리터 기동 제외)
+    cold면 스냅샷 파일과 프로세스 메모를 지운 뒤 측정 (엑셀 읽기 + 스냅샷 생성 포함),
+    아니면 기존 스냅샷으로 재시작한 경우
+    """
+    if cold:
+        ingest.forget(db_path)
+        try:
+            os.remove(ingest.snapshot_path(db_path))
+        except FileNotFoundError:
+            pass
+    out = subprocess.run([sys.executable, '-c', COLD_START, os.path.abspath(db_path), tid],
+                         capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__)))
+    return float(out.stdout.split()[-1])
+
+
+def unstyled_single():
+    """데이터 영역 서식을 지운 개별물질 템플릿 사본 (style_single이 생략하지 않도록)"""
+    wb = load_template(TPL_SINGLE)
+    ws = wb.active
+    for rng in SINGLE_STYLE_RANGES:
+        for row in ws[rng]:
+            for cell in row:
+                cell.style = 'Normal'
+    assert not single_prestyled(ws)
+    return wb
+
+
+def _once(fn):
+    s = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - s, out
+
+
+def _median(fn, args):
+    return statistics.median(_once(lambda a=a: fn(a))[0] for a in args)
+
+
+def run_scale(n_substances, seed=0):
+    """단계별 소요 시간(초) — DB 단위 단계는 1회, 물질 단위 단계는 표본 중앙값"""
+    t = {}
+    db_path, snap_path = prepare_db(n_substances, seed)
+
+    if db_path is not None:
+        t['db_read_excel'], _ = _once(lambda: ingest.read_db(db_path))
+    t['db_snapshot_load'], snap = _once(lambda: ingest._read_snapshot(snap_path))
+    df_mat, df_tox = snap[ingest.SHEET_MAT], snap[ingest.SHEET_TOX]
+    t['id_hashes'], _ = _once(lambda: ingest.id_hashes(df_mat, df_tox))
+    t['selection'], _ = _once(lambda: select_best(df_tox))
+    t['index_build'], idx = _once(lambda: DBIndex(df_mat, df_tox).build())
+    t['reports'], _ = _once(lambda: build_reports(idx))
+
+    ids = list(df_mat['내부식별자'])
+    sample = ids[:: max(1, len(ids) // SAMPLE_IDS)][:SAMPLE_IDS]
+
+    def filtering(tid):
+        for cat, methods in idx._tree.get(tid, {}).items():
+            for method, srcs in methods.items():
+                for src in srcs:
+                    idx.lookup(tid, cat, method, src)
+    t['filtering'] = _median(filtering, sample)
+
+    t['template_parse'] = _median(lambda _: load_workbook(TPL_SINGLE), range(3))
+    t['template_load']  = _median(lambda _: load_template(TPL_SINGLE), range(SAMPLE_IDS))
+
+    # report_copy: 미리 만든 보고서 행렬 → 셀 기록 (사전 스타일 템플릿이므로 스타일은 확인만)
+    # style: 사전 스타일이 없는 템플릿 사본에 실제로 스타일 적용
+    books = {tid: load_template(TPL_SINGLE) for tid in sample}
+    t['report_copy'] = _median(lambda tid: extract_single(tid, df_mat, df_tox, books[tid], idx), sample)
+    plain = {tid: unstyled_single() for tid in sample}
+    t['style'] = _median(lambda tid: style_single(plain[tid].active), sample)
+    t['save']  = _median(lambda tid: books[tid].save(io.BytesIO()), sample)
+
+    pairs = list(zip(sample[::2], sample[1::2]))
+    def multi(pair):
+        wb = load_template(TPL_MULTI)
+        extract_multi(pair, df_mat, df_tox, wb, idx)
+        wb.save(io.BytesIO())
+    t['multi_pair'] = _median(multi, pairs)
+    t['multi_stream_50'], _ = _once(lambda: stream_multi(ids[:50], df_mat, df_tox, TPL_MULTI, io.BytesIO(), idx))
+    if db_path is not None:
+        t['restart_download'] = first_download(db_path, sample[0], cold=False)
+        t['first_download']   = first_download(db_path, sample[0])
+
+    info = {'substances': n_substances, 'tox_rows': len(df_tox), 'excel': db_path is not None}
+    return info, t
+
+
+# ─────────────────────────────────────────────────────────────
+# 기준선 비교
+# ─────────────────────────────────────────────────────────────
+
+def load_baseline(path=BASELINE_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(results, path=BASELINE_FILE):
+    base = load_baseline(path)
+    base.update({str(n): {k: round(v, 6) for k, v in timings.items()} for n, (_, timings) in results.items()})
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(base, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+def compare(timings, baseline, threshold, min_delta):
+    """기준선 대비 회귀 단계 [(단계, 기준, 현재)]"""
+    return [(stage, baseline[stage], cur) for stage, cur in timings.items()
+            if stage in baseline and cur > baseline[stage] * (1 + threshold)
+            and cur - baseline[stage] > min_delta]
+
+
+def report(n, info, timings, baseline):
+    print(f"\n== {n:,} substances / {info['tox_rows']:,} 유해성정보 rows"
+          f"{'' if info['excel'] else ' (엑셀 행 상한 초과 → 스냅샷만)'}")
+    for stage, sec in timings.items():
+        ref = baseline.get(stage)
+        diff = '  (기준선 없음)' if ref is None else f"  ({(sec / ref - 1) * 100:+.0f}% vs {ref * 1e3:.2f} ms)"
+        print(f"  {stage:<18}{sec * 1e3:>11.2f} ms{diff}")
+    missing = [stage for stage in timings if stage not in baseline]
+    if missing:
+        print(f"  ※ 기준선에 없는 단계 {len(missing)}개는 회귀 검사에서 빠짐 (--save-baseline으로 갱신)")
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="합성 DB 단계별 벤치마크")
+    p.add_argument('--scales', type=int, nargs='+', default=[100],
+                   help="물질 수 (기준선이 있는 규모: 100 10000, 그 외 규모는 비교 없이 측정만)")
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--repeat', type=int, default=3, help="규모별 반복 횟수 (단계별 최솟값)")
+    p.add_argument('--threshold', type=float, default=0.5, help="허용 증가율 (0.5 = +50%%)")
+    p.add_argument('--min-delta', type=float, default=0.005, help="무시할 절대 증가량(초)")
+    p.add_argument('--baseline', default=BASELINE_FILE)
+    p.add_argument('--save-baseline', action='store_true')
+    args = p.parse_args(argv)
+
+    baselines = load_baseline(args.baseline)
+    results, regressions = {}, []
+    for n in args.scales:
+        runs = [run_scale(n, args.seed) for _ in range(max(1, args.repeat))]
+        info = runs[0][0]
+        timings = {stage: min(t[stage] for _, t in runs) for stage in runs[0][1]}
+        results[n] = (info, timings)
+        base = baselines.get(str(n), {})
+        report(n, info, timings, base)
+        regressions += [(n,) + r for r in compare(timings, base, args.threshold, args.min_delta)]
+
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        print(f"\n기준선 저장: {args.baseline}")
+        return 0
+    if regressions:
+        print("\n회귀 발견:")
+        for n, stage, ref, cur in regressions:
+            print(f"  [{n:,}] {stage}: {ref * 1e3:.2f} ms → {cur * 1e3:.2f} ms")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
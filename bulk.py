@@ -0,0 +1,133 @@
+import io
+import multiprocessing
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from dbstore import get_db
+from extractor import extract_single
+from perf import span
+from templates import template_blob, workbook_from_blob
+
+# ─────────────────────────────────────────────────────────────
+# 일괄 추출 (여러 내부식별자 → 물질별 엑셀 ZIP)
+# ─────────────────────────────────────────────────────────────
+
+def default_workers():
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def parse_id_list(text):
+    """줄바꿈/쉼표/탭/세미콜론으로 구분된 내부식별자 목록 (순서 유지, 중복 제거)"""
+    ids = [tok.strip() for tok in re.split(r'[\r\n,;\t]+', text or '')]
+    return list(dict.fromkeys(t for t in ids if t))
+
+
+def read_id_file(data):
+    """업로드된 ID 파일(txt/csv) 바이트 → 내부식별자 목록"""
+    for enc in ('utf-8-sig', 'cp949'):
+        try:
+            return parse_id_list(data.decode(enc))
+        except UnicodeDecodeError:
+            continue
+    raise ValueError("ID 파일 인코딩을 인식할 수 없습니다 (UTF-8 또는 CP949).")
+
+
+def all_ids(df_mat):
+    return list(dict.fromkeys(df_mat['내부식별자'].dropna().astype(str)))
+
+
+def result_filename(tid):
+    safe = re.sub(r'[\\/:*?"<>|]', '_', tid)
+    return f"추출결과_{safe}.xlsx"
+
+
+# 풀은 작업 큐/Streamlit 스레드에서 만들어지므로 fork 대신 forkserver로 시작
+# (다른 스레드가 쥔 잠금이 잠긴 채로 복제되어 작업자가 멈추는 것을 방지)
+POOL_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+# 풀 작업자 프로세스 상태: DB는 경로만 받아 작업자가 스냅샷에서 직접 적재
+# (적재된 DB 버전을 pickle로 넘기지 않음, 부모와 다른 버전이면 모든 물질을 실패로 보고)
+# 같은 프로세스에서 실행할 때는 이 전역을 쓰지 않고 호출별 상태를 넘김 (작업 큐 스레드끼리 섞이지 않도록)
+_WORKER = {}
+
+
+def _init_worker(db_path, sha256, tpl_bytes):
+    from dbstore import open_version
+    db = open_version(db_path)
+    error = None if db.sha256 == sha256 else "일괄 추출 도중 DB 파일이 바뀌었습니다. 다시 실행해주세요."
+    _WORKER.update(db=db, tpl=tpl_bytes, error=error)
+
+
+def _extract_pooled(tid):
+    return _extract_one(_WORKER, tid)
+
+
+def _extract_one(state, tid):
+    """(내부식별자, xlsx 바이트 또는 None, 오류 메시지 또는 None)"""
+    if state['error'] is not None:
+        return tid, None, state['error']
+    try:
+        db = state['db'].select([tid])
+        wb = workbook_from_blob(state['tpl'])
+        extract_single(tid, db.df_mat, db.df_tox, wb, db.index)
+        buf = io.BytesIO()
+        wb.save(buf)
+        return tid, buf.getvalue(), None
+    except Exception as e:
+        return tid, None, str(e)
+
+
+def run_bulk(ids, db_path, tpl_path, workers=None, progress=None, out=None):
+    """
+    ids 각각에 대해 extract_single 실행 → (ZIP 바이트, {내부식별자: 오류 메시지})
+    out(경로 또는 바이너리 파일 객체)이 주어지면 ZIP을 그곳에 기록하고 바이트 대신 None
+    (물질별 결과를 받는 대로 기록하므로 DB 전체도 출력 크기만큼 메모리를 쓰지 않음)
+    progress(완료 수, 전체 수, 내부식별자)가 주어지면 건별로 호출
+    """
+    with span('prepare'):
+        db = get_db(db_path)
+        tpl_bytes = template_blob(tpl_path)
+    ids = db.ids() if ids is None else list(dict.fromkeys(ids))
+    workers = workers or default_workers()
+
+    failures = {}
+    target = io.BytesIO() if out is None else out
+    # xlsx는 이미 압축되어 있으므로 STORED
+    with zipfile.ZipFile(target, 'w', zipfile.ZIP_STORED) as zf:
+        def collect(done, result):
+            tid, data, err = result
+            if err is None:
+                zf.writestr(result_filename(tid), data)
+            else:
+                failures[tid] = err
+            if progress:
+                progress(done, len(ids), tid)
+
+        with span('extract', substances=len(ids), workers=workers):
+            if workers <= 1 or len(ids) <= 1:
+                state = {'db': db, 'tpl': tpl_bytes, 'error': None}
+                for done, tid in enumerate(ids, 1):
+                    collect(done, _extract_one(state, tid))
+            else:
+                with ProcessPoolExecutor(max_workers=min(workers, len(ids)),
+                                         mp_context=multiprocessing.get_context(POOL_START_METHOD),
+                                         initializer=_init_worker,
+                                         initargs=(os.path.abspath(db_path), db.sha256, tpl_bytes)) as ex:
+                    futures = [ex.submit(_extract_pooled, tid) for tid in ids]
+                    try:
+                        for done, fut in enumerate(as_completed(futures), 1):
+                            collect(done, fut.result())
+                    except BaseException:
+                        # 취소(progress에서 예외) 등으로 중단 → 남은 물질은 시작하지 않음
+                        ex.shutdown(wait=False, cancel_futures=True)
+                        raise
+
+        if failures:
+            report = pd.DataFrame({'내부식별자': list(failures), '오류': list(failures.values())})
+            zf.writestr('실패목록.csv', report.to_csv(index=False).encode('utf-8-sig'))
+
+    return (target.getvalue() if out is None else None), failures
@@ -0,0 +1,247 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from functools import cached_property
+
+from ingest import file_stat, forget, read_materials
+from perf import span
+
+# ─────────────────────────────────────────────────────────────
+# 여러 DB 워크북(배치별 shard)을 하나의 DB로 묶는 카탈로그
+#   카탈로그 파일(.json): {"shards": ["배치1.xlsx", ...], "memory_budget_mb": 1024}
+#   시작 시에는 shard별 물질정보 사이드카(작은 pickle)만 읽어 내부식별자 → shard 지도를 만듦
+#   (사이드카가 없거나 낡은 shard만 물질정보 시트를 읽으므로 shard 수가 많아도 빠름)
+#   shard 본체(스냅샷 + 인덱스)는 그 물질이 처음 요청될 때 적재하고,
+#   적재된 shard 합계가 메모리 예산을 넘으면 가장 오래 안 쓴 shard부터 내림
+#   같은 내부식별자가 여러 shard에 있으면 먼저 등록된 shard를 쓰고 conflicts로 보고
+# ─────────────────────────────────────────────────────────────
+
+CATALOG_SUFFIX   = '.json'
+MATERIALS_SUFFIX = '.materials.pkl'
+MATERIALS_VERSION = 1
+
+BUDGET_MB = float(os.environ.get('TOX_CATALOG_BUDGET_MB', '1024'))
+
+log = logging.getLogger('tox_extract.db')
+
+
+def is_catalog(db_path):
+    return str(db_path).lower().endswith(CATALOG_SUFFIX)
+
+
+def read_catalog(path):
+    """카탈로그 파일 → (shard 경로 목록, 메모리 예산 MB); 상대 경로는 카탈로그 파일 기준"""
+    with open(path, encoding='utf-8') as f:
+        conf = json.load(f)
+    shards = conf.get('shards') if isinstance(conf, dict) else None
+    if not shards or not all(isinstance(s, str) for s in shards):
+        raise ValueError(f"카탈로그에 shard 목록이 없습니다: {path}")
+    base = os.path.dirname(os.path.abspath(path))
+    paths = list(dict.fromkeys(os.path.normpath(os.path.join(base, s)) for s in shards))
+    return paths, float(conf.get('memory_budget_mb', BUDGET_MB))
+
+
+def write_catalog(path, shards, memory_budget_mb=None):
+    """shard 목록을 카탈로그 파일로 저장 (카탈로그 파일 기준 상대 경로, 예산 생략 시 기존 값 유지)"""
+    base = os.path.dirname(os.path.abspath(path))
+    conf = {}
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            conf = json.load(f)
+    conf['shards'] = list(dict.fromkeys(os.path.relpath(os.path.abspath(s), base) for s in shards))
+    if memory_budget_mb is not None:
+        conf['memory_budget_mb'] = memory_budget_mb
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(conf, f, ensure_ascii=False, indent=2)
+
+
+def signature(path):
+    """카탈로그 파일과 모든 shard의 (mtime, 크기) — 하나라도 바뀌면 새 버전"""
+    shards, _ = read_catalog(path)
+    return (file_stat(path),) + tuple(file_stat(s) for s in shards)
+
+
+# ── shard 물질정보 사이드카 ────────────────────────────────────
+def materials_path(shard):
+    return shard + MATERIALS_SUFFIX
+
+
+def load_materials(shard):
+    """shard의 물질정보 프레임 (사이드카가 최신이면 그대로, 아니면 시트만 읽어 갱신)"""
+    st_ = file_stat(shard)
+    try:
+        with open(materials_path(shard), 'rb') as f:
+            side = pickle.load(f)
+        if side.get('version') == MATERIALS_VERSION and side.get('stat') == st_:
+            return side['df_mat']
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        pass
+    with span('read_materials'):
+        df_mat = read_materials(shard)
+    try:
+        tmp = f"{materials_path(shard)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            pickle.dump({'version': MATERIALS_VERSION, 'stat': st_, 'df_mat': df_mat}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, materials_path(shard))
+    except OSError:
+        pass   # 읽기 전용 위치 → 다음에도 시트에서 읽음
+    return df_mat
+
+
+def _frame_bytes(*frames):
+    return int(sum(df.memory_usage(deep=True, index=False).sum() for df in frames))
+
+
+class CatalogDB:
+    """카탈로그 한 버전 (지도/검색은 전체, shard 본체는 요청 시 적재)"""
+
+    def __init__(self, path, previous=None):
+        self.path = path
+        self.shards, budget_mb = read_catalog(path)
+        self.budget    = int(budget_mb * 2**20)
+        self.stat      = signature(path)
+        self.sha256    = hashlib.sha256(repr(self.stat).encode()).hexdigest()   # 버전 표시용
+        self.loaded_at = time.time()
+
+        self.materials = {}     # shard → 물질정보 프레임
+        self.shard_of  = {}     # 내부식별자 → shard (먼저 등록된 shard 우선)
+        self.conflicts = {}     # 내부식별자 → [shard, ...] (둘 이상 등록된 경우)
+        with span('catalog_map', shards=len(self.shards)):
+            for shard in self.shards:
+                df_mat = self.materials[shard] = load_materials(shard)
+                for tid in dict.fromkeys(df_mat['내부식별자'].dropna().astype(str)):
+                    first = self.shard_of.setdefault(tid, shard)
+                    if first != shard:
+                        self.conflicts.setdefault(tid, [first]).append(shard)
+        if self.conflicts:
+            log.info("카탈로그 내부식별자 중복 %d건 (먼저 등록된 shard 사용): %s", len(self.conflicts),
+                        ", ".join(list(self.conflicts)[:10]))
+
+        self._lock   = threading.Lock()  # _loaded 조회/변경 (shard 적재 중에는 잡지 않음)
+        self._loaded = OrderedDict()    # shard → (DBVersion, 추정 바이트), 최근 사용이 뒤
+        self._load_locks = {}           # shard → 적재 잠금 (같은 shard를 두 번 적재하지 않음)
+        if previous is not None and isinstance(previous, CatalogDB):
+            with previous._lock:
+                carried = list(previous._loaded.items())
+            for shard, (db, size) in carried:
+                if shard in self.materials and db.stat == self.stat[1 + self.shards.index(shard)]:
+                    self._loaded[shard] = (db, size)
+
+    # ── shard 적재 / 내림 ─────────────────────────────────────
+    def shard(self, path, keep=()):
+        """shard 본체 (DBVersion); 처음이면 적재 후 예산을 넘는 만큼 오래된 shard를 내림"""
+        from dbstore import DBVersion
+
+        with self._lock:
+            hit = self._loaded.get(path)
+            if hit is not None:
+                self._loaded.move_to_end(path)
+                return hit[0]
+            load_lock = self._load_locks.setdefault(path, threading.Lock())
+        # 적재는 shard별 잠금 아래에서만 → 다른 shard 조회/적재를 막지 않음
+        with load_lock:
+            with self._lock:
+                hit = self._loaded.get(path)
+                if hit is not None:     # 기다리는 동안 다른 스레드가 적재함
+                    self._loaded.move_to_end(path)
+                    return hit[0]
+            with span('shard_load', shard=os.path.basename(path)):
+                db = DBVersion(path)
+            size = _frame_bytes(db.df_mat, db.df_tox)
+            with self._lock:
+                self._loaded[path] = (db, size)
+                self._evict(keep=set(keep) | {path})
+            return db
+
+    def _evict(self, keep):
+        total = sum(size for _, size in self._loaded.values())
+        for shard in list(self._loaded):
+            if total <= self.budget:
+                break
+            if shard in keep:
+                continue
+            db, size = self._loaded.pop(shard)
+            self._release(shard, db)
+            total -= size
+            log.info("shard 내림 %s (%.1f MB)", os.path.basename(shard), size / 2**20)
+
+    @staticmethod
+    def _release(shard, db):
+        from tox_index import forget as forget_index
+        forget(shard)
+        forget_index(db.index)
+
+    def loaded(self):
+        """적재된 shard {경로: 추정 MB} (오래 안 쓴 순)"""
+        with self._lock:
+            return {shard: size / 2**20 for shard, (_, size) in self._loaded.items()}
+
+    # ── DBVersion과 같은 조회 인터페이스 ───────────────────────
+    def select(self, ids):
+        """
+        ids 물질을 담은 버전: 한 shard에 모여 있으면 그 shard 그대로,
+        여러 shard에 걸치면 해당 물질 행만 모은 DBView (shard의 보고서 행렬 재사용)
+        """
+        groups = {}
+        for tid in dict.fromkeys(ids):
+            shard = self.shard_of.get(str(tid))
+            if shard is not None:
+                groups.setdefault(shard, []).append(tid)
+        if len(groups) == 1:
+            return self.shard(next(iter(groups)))
+        return self._merged(groups)
+
+    def hashes_for(self, ids):
+        """ids의 물질별 행 해시 (해당 shard만 적재, 여러 shard에 걸쳐도 합치지 않음)"""
+        out = {}
+        for tid in dict.fromkeys(ids):
+            shard = self.shard_of.get(str(tid))
+            out[tid] = None if shard is None else self.shard(shard).id_hashes.get(tid)
+        return out
+
+    def _merged(self, groups):
+        import pandas as pd
+        from ingest import MAT_COLUMNS, TOX_COLUMNS
+        from sqlite_store import DBView
+
+        mats, toxs, reports = [], [], {}
+        for shard, tids in groups.items():
+            db = self.shard(shard, keep=groups)
+            mats.append(db.df_mat[db.df_mat['내부식별자'].isin(tids)][MAT_COLUMNS])
+            tox = db.df_tox[db.df_tox['내부식별자'].isin(tids)][TOX_COLUMNS]
+            # 범주가 shard마다 다르므로 원래 값 형식으로 합친 뒤 DBView에서 다시 category로 변환
+            toxs.append(tox.astype({c: t.categories.dtype for c, t in tox.dtypes.items()
+                                    if isinstance(t, pd.CategoricalDtype)}))
+            reports.update((t, db.index.reports[t]) for t in tids if t in db.index.reports)
+        if not mats:   # 모두 없는 내부식별자 → 빈 DB (추출 시 '찾을 수 없음')
+            mats, toxs = [pd.DataFrame(columns=MAT_COLUMNS)], [pd.DataFrame(columns=TOX_COLUMNS)]
+        return DBView(pd.concat(mats, ignore_index=True), pd.concat(toxs, ignore_index=True), reports)
+
+    def ids(self):
+        """카탈로그 전체 내부식별자 (shard 등록 순서, 중복은 한 번)"""
+        return list(self.shard_of)
+
+    @cached_property
+    def search(self):
+        """물질 검색 인덱스 (사이드카의 물질정보만 사용, 중복 ID는 먼저 등록된 shard)"""
+        import pandas as pd
+        from search import SearchIndex
+        return SearchIndex(pd.concat([self.materials[s] for s in self.shards], ignore_index=True))
+
+    def __getstate__(self):
+        # 작업자 프로세스로 보낼 때 잠금/적재된 shard/검색 인덱스는 제외
+        state = {k: v for k, v in self.__dict__.items()
+                 if k not in ('_lock', '_load_locks', '_loaded', 'search')}
+        state['_loaded'] = OrderedDict()
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._load_locks = {}
@@ -0,0 +1,161 @@
+import logging
+import os
+import threading
+import time
+from functools import cached_property
+
+# ─────────────────────────────────────────────────────────────
+# 프로세스 공용 DB
+#   모든 세션/요청이 같은 읽기 전용 DB 버전(프레임 + 인덱스 + 보고서 행렬)을 공유
+#   감시 스레드가 DB 파일의 mtime/크기를 주기적으로 확인하고, 바뀌면 백그라운드에서
+#   새 버전을 만든 뒤 참조만 교체 → 진행 중인 추출은 시작할 때 잡은 버전으로 끝나고
+#   이후 요청은 기다림 없이 새 버전을 사용 (이전 버전은 참조가 끝나면 해제)
+#   .sqlite 경로는 sqlite_store.SQLiteDB (메타만 적재, 물질 행은 select 시 읽음)
+#   .json 경로는 catalog.CatalogDB (여러 shard 워크북, shard는 요청 시 적재)
+#   요청은 get_db(...).select(ids)로 필요한 물질을 담은 버전을 받아 사용
+#   (결과 캐시는 select 전에 hashes_for(ids)로 키를 만들어 조회 → 적중이면 select하지 않음)
+# ─────────────────────────────────────────────────────────────
+
+POLL_SECONDS = float(os.environ.get('TOX_DB_POLL_SECONDS', '2'))
+
+log = logging.getLogger('tox_extract.db')
+
+
+class DBVersion:
+    """DB 한 버전 (읽기 전용으로 공유)"""
+
+    def __init__(self, db_path):
+        from ingest import SHEET_MAT, SHEET_TOX, file_stat, load_snapshot
+        from tox_index import get_index
+
+        self.stat = file_stat(db_path)    # 적재 도중 파일이 바뀌면 감시 스레드가 다시 적재
+        snap = load_snapshot(db_path)
+        self.df_mat    = snap[SHEET_MAT]
+        self.df_tox    = snap[SHEET_TOX]
+        self.index     = get_index(self.df_mat, self.df_tox, source=db_path)
+        self.id_hashes = snap['meta']['id_hashes']
+        self.sha256    = snap['meta']['sha256']
+        self.loaded_at = time.time()
+
+    def select(self, ids):
+        """ids 물질을 담은 버전 (전체가 메모리에 있으므로 자기 자신)"""
+        return self
+
+    def hashes_for(self, ids):
+        """ids의 물질별 행 해시 (결과 캐시 키, select 전에 조회)"""
+        return {t: self.id_hashes.get(t) for t in ids}
+
+    def ids(self):
+        """DB 전체 내부식별자 (물질정보 순서)"""
+        from bulk import all_ids
+        return all_ids(self.df_mat)
+
+    @cached_property
+    def search(self):
+        """물질 검색 인덱스 (처음 쓸 때 생성)"""
+        from search import SearchIndex
+        return SearchIndex(self.df_mat)
+
+
+def _open(db_path, previous=None):
+    from catalog import CatalogDB, is_catalog
+    from sqlite_store import SQLiteDB, is_sqlite
+    if is_catalog(db_path):
+        return CatalogDB(db_path, previous)   # 바뀌지 않은 shard는 이전 버전에서 그대로 가져옴
+    return SQLiteDB(db_path) if is_sqlite(db_path) else DBVersion(db_path)
+
+
+def open_version(db_path):
+    """감시 없이 한 번 적재한 버전 (일괄 추출 작업자 프로세스용, 스냅샷/스냅샷 메모 사용)"""
+    return _open(db_path)
+
+
+def _version_stat(db_path):
+    """감시 대상 상태 (카탈로그는 모든 shard 포함)"""
+    from catalog import is_catalog, signature
+    from ingest import file_stat
+    return signature(db_path) if is_catalog(db_path) else file_stat(db_path)
+
+
+class SharedDB:
+    def __init__(self, db_path, poll_seconds=POLL_SECONDS):
+        self.db_path      = db_path
+        self.poll_seconds = poll_seconds
+        self.error        = None            # 마지막 재적재 실패 메시지 (성공 시 None)
+        self._current     = None
+        self._lock        = threading.Lock()   # 적재는 한 번에 하나만
+        self._stop        = threading.Event()
+        self._thread      = None
+
+    def get(self):
+        """현재 버전 (처음 한 번만 적재를 기다리고, 이후에는 참조만 반환)"""
+        db = self._current
+        if db is None:
+            with self._lock:
+                if self._current is None:
+                    self._current = _open(self.db_path)
+                    self._start_watcher()
+                db = self._current
+        return db
+
+    def reload(self):
+        """새 버전을 만들어 교체 → 성공 여부 (실패 시 이전 버전 유지)"""
+        with self._lock:
+            t0 = time.perf_counter()
+            try:
+                new = _open(self.db_path, self._current)
+            except Exception as e:
+                self.error = f"{type(e).__name__}: {e}"
+                log.warning("DB 재적재 실패 (이전 버전 유지): %s", self.error)
+                return False
+            self._current, self.error = new, None
+        log.info("DB 재적재 %s (%.2f s)", new.sha256[:12], time.perf_counter() - t0)
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    # ── 파일 감시 ─────────────────────────────────────────
+    def _start_watcher(self):
+        if self.poll_seconds and self.poll_seconds > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._watch, name=f"tox-db-watch:{self.db_path}",
+                                            daemon=True)
+            self._thread.start()
+
+    def _watch(self):
+        seen, pending = self._current.stat, None
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                st_ = _version_stat(self.db_path)
+            except (OSError, ValueError):
+                continue      # 저장 중 잠시 없어지거나 덜 쓰인 경우
+            if st_ == seen:
+                pending = None
+                continue
+            if st_ != pending:
+                pending = st_  # 쓰기가 끝났는지 한 주기 더 보고 적재
+                continue
+            self.reload()
+            seen, pending = (self._current.stat if self.error is None else st_), None
+
+
+_SHARED = {}
+_SHARED_LOCK = threading.Lock()
+
+
+def shared(db_path):
+    """DB 경로별 공용 SharedDB"""
+    key = os.path.abspath(db_path)
+    with _SHARED_LOCK:
+        db = _SHARED.get(key)
+        if db is None:
+            db = _SHARED[key] = SharedDB(db_path)
+    return db
+
+
+def get_db(db_path):
+    """DB 경로의 현재 공용 버전 (DBVersion / SQLiteDB / CatalogDB)"""
+    return shared(db_path).get()
@@ -0,0 +1,168 @@
+import os
+
+from perf import span
+
+# ─────────────────────────────────────────────────────────────
+# 추출 엔진 (UI 비의존)
+#   Streamlit/CLI/배치 작업이 공통으로 사용하는 진입점
+#   pandas/openpyxl은 실제 추출 시점에 불러오므로 import 자체는 가벼움
+# ─────────────────────────────────────────────────────────────
+
+DB_FILENAME = os.environ.get('TOX_DB', "유해성미확인물질 12종 DB.xlsx")   # .sqlite / .json(카탈로그)도 가능
+TPL_SINGLE  = "개별물질 추출 템플릿.xlsx"
+TPL_MULTI   = "다중물질 추출 템플릿.xlsx"
+
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def single_filename(tid):
+    return f"추출결과_{tid}.xlsx"
+
+
+def multi_filename(tids):
+    name = "_".join(tids) if len(tids) == 2 else f"{tids[0]}_외{len(tids) - 1}종"
+    return f"추출결과_{name}.xlsx"
+
+
+def _require(path, what):
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{what} 파일을 찾을 수 없습니다: {path}")
+
+
+def _cached(mode, ids, db_path, tpl_path, build, cache):
+    """공용 DB 버전으로 생성하되 결과 캐시 경유 (cache=False면 항상 새로 생성)"""
+    _require(db_path, "DB")
+    _require(tpl_path, "템플릿")
+    from dbstore import get_db
+    with span('db_load'):
+        store = get_db(db_path)    # 요청 하나는 끝까지 이 버전만 사용
+    if not cache:
+        with span('db_select'):
+            db = store.select(ids)
+        return build(db)
+    from result_cache import get_cache, result_key
+    with span('cache_lookup') as info:
+        # 키는 물질별 해시만으로 → 적중이면 물질 행 조회/보고서 생성(select)을 하지 않음
+        key  = result_key(mode, ids, store.hashes_for(ids), tpl_path)
+        data = get_cache().get(key)
+        info['hit'] = data is not None
+    if data is None:
+        with span('db_select'):
+            db = store.select(ids)
+        data = build(db)
+        get_cache().put(key, data)
+    return data
+
+
+def single_xlsx(tid, db_path=DB_FILENAME, tpl_path=TPL_SINGLE, cache=True):
+    """개별물질 결과 엑셀 바이트"""
+    return _cached('single', [tid], db_path, tpl_path,
+                   lambda db: _build_single(tid, db, tpl_path), cache)
+
+
+def _build_single(tid, db, tpl_path):
+    import io
+    from extractor import extract_single
+    from templates import load_template
+
+    with span('template_load'):
+        wb = load_template(tpl_path)
+    with span('extract'):
+        extract_single(tid, db.df_mat, db.df_tox, wb, db.index)
+    buf = io.BytesIO()
+    with span('save'):
+        wb.save(buf)
+    return buf.getvalue()
+
+
+def multi_xlsx(tids, db_path=DB_FILENAME, tpl_path=TPL_MULTI, cache=True):
+    """다중물질 결과 엑셀 바이트 (MULTI_STREAM_MIN개 이상이면 스트리밍 생성)"""
+    tids = list(dict.fromkeys(tids))
+    if len(tids) < 2:
+        raise ValueError("서로 다른 내부식별자를 2개 이상 입력해주세요.")
+    return _cached('multi', tids, db_path, tpl_path,
+                   lambda db: _build_multi(tids, db, tpl_path), cache)
+
+
+def _build_multi(tids, db, tpl_path):
+    import io
+    from extractor import MULTI_STREAM_MIN, extract_multi, stream_multi
+    from templates import load_template
+
+    buf = io.BytesIO()
+    if len(tids) >= MULTI_STREAM_MIN:
+        with span('extract', streaming=True):
+            stream_multi(tids, db.df_mat, db.df_tox, tpl_path, buf, db.index)
+    else:
+        with span('template_load'):
+            wb = load_template(tpl_path)
+        with span('extract'):
+            extract_multi(tids, db.df_mat, db.df_tox, wb, db.index)
+        with span('save'):
+            wb.save(buf)
+    return buf.getvalue()
+
+
+def bulk_zip(ids, db_path=DB_FILENAME, tpl_path=TPL_SINGLE, workers=None, progress=None, out=None):
+    """
+    일괄 추출 → (ZIP 바이트, {내부식별자: 오류 메시지}); ids가 None이면 DB 전체
+    out(경로 또는 파일 객체)이 주어지면 ZIP을 그곳에 기록하고 바이트 대신 None
+    """
+    from bulk import run_bulk
+
+    _require(db_path, "DB")
+    _require(tpl_path, "템플릿")
+    return run_bulk(ids, db_path, tpl_path, workers, progress, out)
+
+
+def export_records(ids, out, fmt='csv', db_path=DB_FILENAME, progress=None):
+    """
+    선택 결과를 CSV/JSON Lines/Parquet로 기록 (엑셀 템플릿을 거치지 않음)
+    → (기록한 행 수, {내부식별자: 오류 메시지}); ids가 None이면 DB 전체
+    """
+    from export import run_export
+
+    _require(db_path, "DB")
+    return run_export(ids, out, fmt, db_path, progress)
+
+
+def build_sqlite_db(db_path=DB_FILENAME, out_path=None):
+    """DB 엑셀 → SQLite 저장소 (sqlite_store.build_sqlite) → 생성 경로"""
+    from sqlite_store import build_sqlite
+
+    _require(db_path, "DB")
+    return build_sqlite(db_path, out_path)
+
+
+def update_catalog(catalog_path, shards=(), memory_budget_mb=None):
+    """
+    카탈로그에 shard 워크북 추가(파일이 없으면 생성) 후 현황
+    → {'shards': [...], 'substances': 물질 수, 'conflicts': {내부식별자: [shard, ...]}}
+    """
+    from catalog import CatalogDB, read_catalog, write_catalog
+
+    for shard in shards:
+        _require(shard, "DB")
+    current = read_catalog(catalog_path)[0] if os.path.exists(catalog_path) else []
+    if shards or memory_budget_mb is not None:
+        write_catalog(catalog_path, current + list(shards), memory_budget_mb)
+    _require(catalog_path, "카탈로그")
+    db = CatalogDB(catalog_path)
+    return {'shards': db.shards, 'substances': len(db.shard_of),
+            'conflicts': {t: [os.path.basename(s) for s in v] for t, v in db.conflicts.items()}}
+
+
+def search_substances(query, db_path=DB_FILENAME, limit=20):
+    """내부식별자/CAS/물질명/분자식 검색 → [(내부식별자, 표시 문자열)] (순위순)"""
+    from dbstore import get_db
+
+    _require(db_path, "DB")
+    return get_db(db_path).search.suggest(query, limit)
+
+
+def validate_ids(tokens, db_path=DB_FILENAME):
+    """ID 목록 검증 → (내부식별자 목록, {인식 못한 입력: [추천 내부식별자]}); CAS 입력은 ID로 변환"""
+    from dbstore import get_db
+
+    _require(db_path, "DB")
+    return get_db(db_path).search.validate(tokens)
@@ -0,0 +1,141 @@
+import csv
+import importlib.util
+import io
+import json
+
+from perf import span
+
+# ─────────────────────────────────────────────────────────────
+# 데이터 내보내기 (CSV / JSON Lines / Parquet)
+#   개별물질 보고서와 같은 선택 결과를 (물질, 유해성항목, 출처) 한 행씩 기록
+#   템플릿/openpyxl을 거치지 않고 물질 단위로 바로 흘려 쓰므로
+#   DB 전체를 내보내도 출력 크기와 무관하게 메모리 사용이 일정
+#   (SQLite 저장소는 SELECT_IDS개 물질씩 읽어 DB 크기와도 무관)
+#   형식 목록은 CLI/UI가 바로 쓰므로 pandas 등은 실제 내보내기 시점에 불러옴
+# ─────────────────────────────────────────────────────────────
+
+FIELDS = ['내부식별자', 'CAS', '물질명', '분자식', '분자량', '유해성항목', '결과도출방법', '출처', '값']
+
+# 형식 → (MIME, 확장자)
+EXPORT_FORMATS = {
+    'csv':     ('text/csv', '.csv'),
+    'jsonl':   ('application/x-ndjson', '.jsonl'),
+    'parquet': ('application/vnd.apache.parquet', '.parquet'),
+}
+
+PARQUET_BATCH_ROWS = 50_000   # Parquet row group 단위
+SELECT_IDS = 200              # SQLite 저장소에서 한 번에 읽는 물질 수
+
+
+def available_formats():
+    """사용 가능한 형식 (parquet은 pyarrow 설치 시)"""
+    return [f for f in EXPORT_FORMATS if f != 'parquet' or importlib.util.find_spec('pyarrow') is not None]
+
+
+def export_filename(fmt):
+    return f"추출결과{EXPORT_FORMATS[fmt][1]}"
+
+
+def substance_rows(tid, idx):
+    """물질 하나의 내보내기 행 [FIELDS 순서 튜플] (값이 있는 칸만)"""
+    from extractor import REPORT_CATS, REPORT_SOURCES, report
+    info, grid, _ = report(tid, idx)
+    return [info + (cat, method, src, val)
+            for cat, values in zip(REPORT_CATS, grid)
+            for (method, src, _), val in zip(REPORT_SOURCES, values) if val is not None]
+
+
+# ── 형식별 기록기: write(rows) 반복 후 close() ─────────────────
+class _CsvWriter:
+    def __init__(self, f):
+        self.text = io.TextIOWrapper(f, encoding='utf-8', newline='')
+        self.csv  = csv.writer(self.text)
+        self.csv.writerow(FIELDS)
+
+    def write(self, rows):
+        self.csv.writerows(rows)
+
+    def close(self):
+        self.text.flush()
+        self.text.detach()   # 호출자의 파일 객체는 닫지 않음
+
+
+class _JsonlWriter:
+    _encode = json.JSONEncoder(ensure_ascii=False).encode   # json.dumps(옵션)는 호출마다 인코더 생성
+
+    def __init__(self, f):
+        self.f = f
+
+    def write(self, rows):
+        self.f.write(''.join(self._encode(dict(zip(FIELDS, r))) + '\n' for r in rows).encode('utf-8'))
+
+    def close(self):
+        pass
+
+
+class _ParquetWriter:
+    def __init__(self, f):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self.pa     = pa
+        self.schema = pa.schema([(name, pa.string()) for name in FIELDS])
+        self.writer = pq.ParquetWriter(f, self.schema)
+        self.buf    = []
+
+    def write(self, rows):
+        self.buf.extend(rows)
+        if len(self.buf) >= PARQUET_BATCH_ROWS:
+            self._flush()
+
+    def _flush(self):
+        cols = [list(c) for c in zip(*self.buf)]
+        self.writer.write_table(self.pa.table(cols, schema=self.schema))
+        self.buf = []
+
+    def close(self):
+        if self.buf:
+            self._flush()
+        self.writer.close()
+
+
+_WRITERS = {'csv': _CsvWriter, 'jsonl': _JsonlWriter, 'parquet': _ParquetWriter}
+
+
+def run_export(ids, out, fmt, db_path, progress=None):
+    """
+    ids(None이면 DB 전체)의 선택 결과를 out(경로 또는 바이너리 파일 객체)에 기록
+    → (기록한 행 수, {내부식별자: 오류 메시지})
+    progress(완료 수, 전체 수, 내부식별자)가 주어지면 건별로 호출
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"알 수 없는 내보내기 형식: {fmt} (가능: {', '.join(EXPORT_FORMATS)})")
+    if fmt not in available_formats():
+        raise ValueError("Parquet 내보내기에는 pyarrow가 필요합니다 (pip install pyarrow).")
+    from dbstore import get_db
+
+    with span('prepare'):
+        db = get_db(db_path)
+    ids = db.ids() if ids is None else list(dict.fromkeys(ids))
+
+    f = open(out, 'wb') if isinstance(out, (str, bytes)) or hasattr(out, '__fspath__') else out
+    n_rows, failures = 0, {}
+    try:
+        with span('export', substances=len(ids), format=fmt):
+            writer = _WRITERS[fmt](f)
+            for done, tid in enumerate(ids, 1):
+                if (done - 1) % SELECT_IDS == 0:
+                    idx = db.select(ids[done - 1:done - 1 + SELECT_IDS]).index
+                try:
+                    rows = substance_rows(tid, idx)
+                except ValueError as e:
+                    failures[tid] = str(e)
+                else:
+                    writer.write(rows)
+                    n_rows += len(rows)
+                if progress:
+                    progress(done, len(ids), tid)
+            writer.close()
+    finally:
+        if f is not out:
+            f.close()
+    return n_rows, failures
@@ -0,0 +1,410 @@
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles.named_styles import NamedStyleList
+from openpyxl.utils.indexed_list import IndexedList
+from openpyxl.worksheet.cell_range import CellRange
+from copy import copy
+import re
+
+from perf import span
+from selection import BIODEG, OOD, RES_NUM
+from styles import ensure_data_style, is_data_styled, style_multi, style_single
+from templates import load_template
+from tox_index import CANON_READ_ACROSS, get_index
+
+# ─────────────────────────────────────────────────────────────
+# 템플릿 열/행 매핑 상수
+# ─────────────────────────────────────────────────────────────
+
+# 결과 엑셀 형식 버전: 값 선택/서식/셀 배치 로직을 바꾸면 올림 (결과 캐시 키에 포함)
+OUTPUT_VERSION = 1
+
+# 개별물질 템플릿 유해성 데이터 행
+SINGLE_CAT_ROWS = {
+    '급성경구독성':                        12,
+    '급성흡입독성':                        13,
+    '피부부식성/자극성':                   14,
+    '복귀돌연변이':                        15,
+    '포유류 배양세포를 이용한 염색체이상': 16,
+    '소핵시험':                            17,
+    '어류급성독성':                        18,
+    '물벼룩급성독성':                      19,
+    '담수조류생장저해':                    20,
+    '이분해성':                            21,
+}
+
+# 다중물질 템플릿 레이아웃
+MULTI_BLOCK_HEADERS = [2, 15]
+MULTI_BLOCK_PITCH   = 13      # 블록 간 행 간격 (블록 12행 + 빈 행)
+MULTI_LAST_COL      = 19      # 블록 마지막 열 (S)
+MULTI_STREAM_MIN    = 20      # 이 물질 수 이상이면 write-only 스트리밍으로 생성
+MULTI_INFO_OFFSETS  = {'내부식별자':1, 'CAS No.':3, '물질명':5, '분자식':7, '분자량':9}
+MULTI_INFO_COL      = 2
+MULTI_CAT_OFFSETS   = {
+    '급성경구독성':                         2,
+    '급성흡입독성':                         3,
+    '피부부식성/자극성':                    4,
+    '복귀돌연변이':                         5,
+    '포유류 배양세포를 이용한 염색체이상':  6,
+    '소핵시험':                             7,
+    '어류급성독성':                         8,
+    '물벼룩급성독성':                       9,
+    '담수조류생장저해':                    10,
+    '이분해성':                            11,
+}
+
+# ─────────────────────────────────────────────────────────────
+# 공통 유틸
+# ─────────────────────────────────────────────────────────────
+
+def write_safe(ws, row, col, value):
+    cell = ws.cell(row=row, column=col)
+    for merged in ws.merged_cells.ranges:
+        if cell.coordinate in merged:
+            ws.cell(row=merged.min_row, column=merged.min_col).value = value
+            return
+    cell.value = value
+
+def clean_mol_weight(val):
+    """분자량 g/mol 중복 방지"""
+    s = str(val).strip()
+    if 'g/mol' in s:
+        return s   # DB에 이미 단위 포함
+    return f"{s} g/mol"
+
+# ─────────────────────────────────────────────────────────────
+# 포맷 함수
+# ─────────────────────────────────────────────────────────────
+
+# 수치 포함 항목 (Endpoint = 값 단위 (시험종) 형식)
+VAL_CATS = ["급성경구독성","급성흡입독성","어류급성독성","물벼룩급성독성","담수조류생장저해"]
+
+def _get_ep(row):
+    ep = row.get('Endpoint(표준)') or row.get('Endpoint') or 'Unknown'
+    return str(ep) if pd.notna(ep) else 'Unknown'
+
+def _get_sp(row):
+    sp = row.get('시험종(표준)') or row.get('시험종') or 'Unknown'
+    return str(sp) if pd.notna(sp) else 'Unknown'
+
+def _get_unit(row):
+    u = row.get('단위','')
+    return str(u) if pd.notna(u) else ''
+
+def format_exp(row, cat):
+    """실험값 포맷 (이분해성 포함)"""
+    if cat == '이분해성':
+        return format_biodeg(row)
+    res = str(row['Result'])
+    if cat in VAL_CATS:
+        return f"{_get_ep(row)} = {res} {_get_unit(row)} ({_get_sp(row)})"
+    return res
+
+def format_qsar(row, cat):
+    """QSAR 포맷 (Out of domain + 이분해성 포함)"""
+    if cat == '이분해성':
+        return format_biodeg(row)
+    res = str(row['Result'])
+    if row[OOD] and "(Out of domain)" not in res:
+        res += " (Out of domain)"
+    if cat in VAL_CATS:
+        return f"{_get_ep(row)} = {res} {_get_unit(row)} ({_get_sp(row)})"
+    return res
+
+def format_ai(row, cat):
+    """AI-based QSAR 포맷 (수치 항목도 endpoint/unit/species 포함)"""
+    if cat == '이분해성':
+        return format_biodeg(row)
+    res = str(row['Result'])
+    if row[OOD] and "(Out of domain)" not in res:
+        res += " (Out of domain)"
+    if cat in VAL_CATS:
+        return f"{_get_ep(row)} = {res} {_get_unit(row)} ({_get_sp(row)})"
+    return res
+
+def format_biodeg(row):
+    """이분해성 포맷 (출처/방법별 판정 로직)"""
+    if row['출처'] in ['환경부유해성심사결과','K-reach'] or \
+       (row['결과도출방법'] == 'QSAR' and row['출처'] == 'Epi suite'):
+        return str(row['Result'])
+    status = row[BIODEG]   # 정규화 시 판정 (Result가 수치가 아니면 결측)
+    if pd.isna(status):
+        return str(row['Result'])
+    ep   = str(row.get('Endpoint',''))
+    unit = _get_unit(row)
+    return f"{status} - {ep} = {row[RES_NUM]} {unit}"
+
+# ─────────────────────────────────────────────────────────────
+# 보고서 행렬
+#   물질마다 유해성항목(10) × 출처 열(14)의 완성된 문자열을 DB 버전당 한 번 만들어
+#   스냅샷에 저장 → 개별/다중 템플릿은 표를 그대로 옮겨 적기만 함
+#   개별(D~Q)과 다중(F~S)은 QSAR Toolbox 두 열의 조회 방식만 다르므로 따로 보관
+# ─────────────────────────────────────────────────────────────
+
+REPORT_CATS = list(SINGLE_CAT_ROWS)
+
+# (결과도출방법, 출처, 포맷) — 개별 D~Q / 다중 F~S 열 순서
+REPORT_SOURCES = [
+    ('실험값',        'ECHA CHEM',            format_exp),
+    ('실험값',        'US DashBoard',         format_exp),
+    ('실험값',        'Pubchem',              format_exp),
+    ('실험값',        'K-reach',              format_exp),
+    ('실험값',        '환경부유해성심사결과', format_exp),   # ← 이분해성도 format_biodeg 경유
+    ('Read-across',   'QSAR Toolbox v.4.8',   format_qsar),
+    ('QSAR',          'QSAR Toolbox v.4.8',   format_qsar),
+    ('QSAR',          'Danish QSAR',          format_qsar),
+    ('QSAR',          'VEGA',                 format_qsar),
+    ('QSAR',          'Epi suite',            format_qsar),
+    ('AI-based QSAR', 'HAZMAP',               format_ai),    # ← format_ai 사용
+    ('AI-based QSAR', 'Protox 3.0',           format_ai),
+    ('AI-based QSAR', 'VEGA',                 format_ai),
+    ('AI-based QSAR', 'Cheminfomatics',       format_ai),
+]
+SINGLE_FIRST_COL = 4
+MULTI_FIRST_COL  = 6
+
+# 다중 템플릿: 출처에 'QSAR Toolbox' 포함(버전 무관) 행 중 첫 행
+MULTI_FUZZY = {5: CANON_READ_ACROSS, 6: 'QSAR'}
+
+_REPORT_COLS = ['유해성항목', '결과도출방법', '출처', 'Result', '단위', 'Endpoint', 'Endpoint(표준)',
+                '시험종', '시험종(표준)', 'Domain status', RES_NUM, OOD, BIODEG]
+
+
+def build_reports(idx, tids=None):
+    """
+    idx.reports에 없는 물질(tids 생략 시 물질정보 전체)의 보고서 행렬을 채움
+    행렬 = (물질정보 5칸, 개별 10×14, 다중 10×14), 빈 칸은 None
+    """
+    tids = [t for t in (idx._mat if tids is None else tids)
+            if t not in idx.reports and idx.material(t) is not None]
+    idx.build(tids)   # 필요한 물질의 조회 트리를 한 번에
+    cells = []     # (내부식별자, 다중 여부, 항목 순번, 열 순번, 전체 위치)
+    for tid in tids:
+        for i, cat in enumerate(REPORT_CATS):
+            for j, (method, src, _) in enumerate(REPORT_SOURCES):
+                pos = idx.best_position(tid, cat, method, src)
+                if pos is not None:
+                    cells.append((tid, False, i, j, pos))
+                if j in MULTI_FUZZY:   # 그 외 열은 다중도 같은 최우선 행
+                    pos = idx.qsar_toolbox_position(tid, cat, MULTI_FUZZY[j])
+                if pos is not None:
+                    cells.append((tid, True, i, j, pos))
+
+    # 필요한 행만 한 번에 dict로 꺼내 포맷 (같은 행/포맷은 두 레이아웃이 문자열 공유)
+    positions = sorted({c[4] for c in cells})
+    rows = dict(zip(positions, idx.df_tox.iloc[positions][_REPORT_COLS].to_dict('records')))
+    grids = {tid: ([[None] * len(REPORT_SOURCES) for _ in REPORT_CATS],
+                   [[None] * len(REPORT_SOURCES) for _ in REPORT_CATS]) for tid in tids}
+    text = {}
+    for tid, multi, i, j, pos in cells:
+        key = (pos, j, i)
+        val = text.get(key)
+        if val is None:
+            val = text[key] = REPORT_SOURCES[j][2](rows[pos], REPORT_CATS[i])
+        grids[tid][multi][i][j] = val
+
+    for tid in tids:
+        t = idx.material(tid)
+        info = (tid, str(t['CAS']), str(t['물질명']), str(t['분자식']),
+                clean_mol_weight(t['분자량']))   # ← g/mol 중복 방지
+        single, multi = grids[tid]
+        idx.reports[tid] = (info, tuple(map(tuple, single)), tuple(map(tuple, multi)))
+    return idx.reports
+
+
+def report(tid, idx):
+    """(물질정보, 개별 행렬, 다중 행렬) — 스냅샷에 없으면 그 자리에서 만들어 인덱스에 보관"""
+    r = idx.reports.get(tid)
+    if r is None:
+        if idx.material(tid) is None:
+            raise ValueError(f"'{tid}' 물질정보를 DB에서 찾을 수 없습니다.")
+        r = build_reports(idx, [tid])[tid]
+    return r
+
+# ─────────────────────────────────────────────────────────────
+# 단일 추출
+# ─────────────────────────────────────────────────────────────
+
+def extract_single(target_id, df_mat, df_tox, wb, index=None):
+    ws  = wb.active
+    with span('index'):
+        idx = index or get_index(df_mat, df_tox)
+
+    with span('write'):
+        info, grid, _ = report(target_id, idx)
+        for col, val in enumerate(info, 3):
+            write_safe(ws, 7, col, val)
+        for data_row, values in zip(SINGLE_CAT_ROWS.values(), grid):
+            for col, val in enumerate(values, SINGLE_FIRST_COL):
+                if val is not None:
+                    ws.cell(row=data_row, column=col).value = val
+
+    with span('style'):
+        style_single(ws)
+
+
+# ─────────────────────────────────────────────────────────────
+# 다중 추출
+# ─────────────────────────────────────────────────────────────
+
+def multi_block_values(tid, idx):
+    """다중물질 블록 한 개의 값 {(블록 내 행 오프셋, 열): 값}"""
+    info, _, grid = report(tid, idx)
+    vals = {(offset, MULTI_INFO_COL): val for offset, val in zip(MULTI_INFO_OFFSETS.values(), info)}
+    for cat, values in zip(REPORT_CATS, grid):
+        cat_offset = MULTI_CAT_OFFSETS[cat]
+        for col, val in enumerate(values, MULTI_FIRST_COL):
+            if val is not None:
+                vals[(cat_offset, col)] = val
+    return vals
+
+
+def multi_block_headers(n):
+    """n개 블록의 헤더 행 (템플릿 블록 간격 반복)"""
+    first = MULTI_BLOCK_HEADERS[0]
+    return [first + MULTI_BLOCK_PITCH * i for i in range(n)]
+
+
+def multi_sheet_title(tids):
+    title = " 및 ".join(tids) if len(tids) <= 2 else f"{tids[0]} 외 {len(tids) - 1}종"
+    return re.sub(r'[\\/*?:\[\]]', '_', title)[:31]
+
+
+def _copy_multi_block(ws, dst_hdr):
+    """첫 블록의 값/스타일/병합/행 높이를 dst_hdr 위치로 복사"""
+    src_hdr = MULTI_BLOCK_HEADERS[0]
+    shift   = dst_hdr - src_hdr
+    for r in range(src_hdr, src_hdr + MULTI_BLOCK_PITCH):
+        for c in range(1, MULTI_LAST_COL + 1):
+            src = ws.cell(row=r, column=c)
+            dst = ws.cell(row=r + shift, column=c)
+            dst.value  = src.value
+            dst._style = copy(src._style)
+        if ws.row_dimensions[r].height is not None:
+            ws.row_dimensions[r + shift].height = ws.row_dimensions[r].height
+    for rng in list(ws.merged_cells.ranges):
+        if src_hdr <= rng.min_row and rng.max_row < src_hdr + MULTI_BLOCK_PITCH:
+            ws.merge_cells(start_row=rng.min_row + shift, start_column=rng.min_col,
+                           end_row=rng.max_row + shift,   end_column=rng.max_col)
+
+
+def extract_multi(tids, df_mat, df_tox, wb, index=None):
+    """템플릿 워크북에 N개 물질 블록 기록 (3개 이상이면 첫 블록을 복제)"""
+    ws   = wb.active
+    with span('index'):
+        idx = index or get_index(df_mat, df_tox)
+    tids = list(tids)
+    headers = multi_block_headers(max(len(tids), len(MULTI_BLOCK_HEADERS)))
+    ws.title = multi_sheet_title(tids)
+
+    with span('clone_blocks', blocks=len(headers) - len(MULTI_BLOCK_HEADERS)):
+        for hdr in headers[len(MULTI_BLOCK_HEADERS):]:
+            _copy_multi_block(ws, hdr)
+
+        # 데이터 셀 초기화
+        for hdr in headers:
+            for offset in MULTI_INFO_OFFSETS.values():
+                ws.cell(row=hdr + offset, column=MULTI_INFO_COL).value = None
+            for offset in MULTI_CAT_OFFSETS.values():
+                for col in range(6, 20):
+                    ws.cell(row=hdr + offset, column=col).value = None
+
+    with span('write', substances=len(tids)):
+        for tid, hdr_row in zip(tids, headers):
+            for (offset, col), val in multi_block_values(tid, idx).items():
+                write_safe(ws, hdr_row + offset, col, val)
+
+    with span('style'):
+        style_multi(ws, headers, MULTI_BLOCK_HEADERS)
+
+
+def _adopt_styles(wb, tpl):
+    """
+    템플릿의 스타일 표/NamedStyle/테마를 write-only 워크북에 그대로 복사
+    (기본 글꼴 _fonts[0]과 '표준' 스타일이 같아야 빈 셀도 템플릿과 같은 글꼴로 보임)
+    """
+    for attr in ('_fonts', '_fills', '_borders', '_alignments', '_protections',
+                 '_number_formats', '_cell_styles'):
+        setattr(wb, attr, IndexedList(getattr(tpl, attr)))
+    wb._named_styles = NamedStyleList()
+    for style in tpl._named_styles:
+        wb._named_styles.append(copy(style))
+    wb.loaded_theme = tpl.loaded_theme
+
+
+def stream_multi(tids, df_mat, df_tox, tpl_path, out, index=None):
+    """
+    write-only 워크북으로 N개 물질 블록을 순차 기록 (out: 경로 또는 파일 객체)
+    블록 단위로 행을 흘려보내므로 물질 수가 많아도 셀 객체가 메모리에 쌓이지 않음
+    """
+    with span('index'):
+        idx = index or get_index(df_mat, df_tox)
+    tids = list(tids)
+    for tid in tids:
+        if idx.material(tid) is None:
+            raise ValueError(f"'{tid}' 물질정보를 DB에서 찾을 수 없습니다.")
+
+    with span('template_load'):
+        tpl = load_template(tpl_path)
+        proto = tpl.active
+    wb = Workbook(write_only=True)
+    _adopt_styles(wb, tpl)
+    ws = wb.create_sheet(multi_sheet_title(tids))
+    for key, dim in proto.column_dimensions.items():
+        ws.column_dimensions[key].width = dim.width
+    ws.sheet_view.zoomScale = proto.sheet_view.zoomScale
+
+    # 템플릿 블록 → 셀별 (고정 값, 스타일) 원형, 행 높이, 병합 범위
+    # (템플릿에 있는 블록은 그 블록을, 이후 블록은 extract_multi처럼 첫 블록을 원형으로 사용)
+    data_cells = {(off, MULTI_INFO_COL) for off in MULTI_INFO_OFFSETS.values()}
+    data_cells |= {(off, col) for off in MULTI_CAT_OFFSETS.values() for col in range(6, 20)}
+
+    def block_proto(src_hdr):
+        cells = {}
+        for off in range(MULTI_BLOCK_PITCH):
+            for col in range(1, MULTI_LAST_COL + 1):
+                src  = proto.cell(row=src_hdr + off, column=col)
+                cell = WriteOnlyCell(ws)
+                if src.has_style:
+                    cell.font, cell.border, cell.fill = copy(src.font), copy(src.border), copy(src.fill)
+                    cell.alignment, cell.protection   = copy(src.alignment), copy(src.protection)
+                    cell.number_format = src.number_format
+                if col >= 6 and (off, col) in data_cells and not is_data_styled(src):
+                    cell.style = ensure_data_style(wb)
+                value = None if (off, col) in data_cells else src.value
+                cells[(off, col)] = (value, cell._style if cell.has_style else None)
+        heights = [proto.row_dimensions[src_hdr + off].height for off in range(MULTI_BLOCK_PITCH)]
+        merges  = [(r.min_row - src_hdr, r.min_col, r.max_row - src_hdr, r.max_col)
+                   for r in proto.merged_cells.ranges
+                   if src_hdr <= r.min_row and r.max_row < src_hdr + MULTI_BLOCK_PITCH]
+        return cells, heights, merges
+
+    protos = {hdr: block_proto(hdr) for hdr in MULTI_BLOCK_HEADERS}
+    src_hdr = MULTI_BLOCK_HEADERS[0]
+
+    with span('stream', substances=len(tids)):
+        for _ in range(1, src_hdr):
+            ws.append([])
+        for tid, hdr in zip(tids, multi_block_headers(len(tids))):
+            cells, heights, merges = protos.get(hdr, protos[src_hdr])
+            vals = multi_block_values(tid, idx)
+            for r0, c0, r1, c1 in merges:
+                ws.merged_cells.add(CellRange(min_col=c0, min_row=hdr + r0, max_col=c1, max_row=hdr + r1))
+            for off in range(MULTI_BLOCK_PITCH):
+                if heights[off] is not None:
+                    ws.row_dimensions[hdr + off].height = heights[off]
+                row = []
+                for col in range(1, MULTI_LAST_COL + 1):
+                    value, style = cells[(off, col)]
+                    value = vals.get((off, col), value)
+                    if style is None:
+                        row.append(value)
+                        continue
+                    cell = WriteOnlyCell(ws, value)
+                    cell._style = copy(style)
+                    row.append(cell)
+                ws.append(row)
+                ws.row_dimensions.pop(hdr + off, None)   # 기록된 행의 높이 정보는 더 필요 없음
+    with span('save'):
+        wb.save(out)
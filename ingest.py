@@ -0,0 +1,242 @@
+import hashlib
+import os
+import pickle
+import threading
+
+import pandas as pd
+
+from perf import span
+from selection import NORM_COLS, normalize
+
+# ─────────────────────────────────────────────────────────────
+# DB 워크북 → 바이너리 스냅샷
+# ─────────────────────────────────────────────────────────────
+
+SHEET_MAT = '물질정보'
+SHEET_TOX = '유해성정보'
+
+SNAPSHOT_SUFFIX  = '.snapshot.pkl'
+SNAPSHOT_VERSION = 5
+
+# 추출/선택에 쓰는 열만 읽음
+MAT_COLUMNS = ['내부식별자', 'CAS', '물질명', '분자식', '분자량']
+TOX_COLUMNS = ['내부식별자', '유해성항목', '결과도출방법', '출처', 'Result', '단위',
+               'Endpoint', 'Endpoint(표준)', '시험종', '시험종(표준)', 'Duration(표준)',
+               '시험지침', 'Domain status', '모델 종류 및 버전']
+
+# 반복되는 라벨 → category (행마다 문자열 대신 정수 코드, 비교도 코드 단위)
+# Result는 수치/문자열이 섞여 있고 선택 시 원래 값 순서가 필요하므로 그대로 둠
+TOX_CATEGORIES = [c for c in TOX_COLUMNS if c != 'Result']
+
+
+def snapshot_path(db_path):
+    """DB 파일 옆에 위치하는 스냅샷 경로"""
+    return db_path + SNAPSHOT_SUFFIX
+
+
+def file_stat(path):
+    """변경 감지용 (mtime_ns, 크기)"""
+    st_ = os.stat(path)
+    return st_.st_mtime_ns, st_.st_size
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _row_hashes(df):
+    """행별 해시 (열 이름/형식이 바뀌면 시드가 달라져 전 물질이 변경으로 처리됨)"""
+    seed = hashlib.blake2b(repr([(c, str(t)) for c, t in df.dtypes.items()]).encode('utf-8'),
+                           digest_size=8).digest()
+    return seed, pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def id_hashes(df_mat, df_tox):
+    """
+    내부식별자별 행 묶음 해시 {내부식별자: hex}
+    두 시트에서 해당 물질의 행(순서 포함)만으로 결정되므로, 값이 같으면 추출 결과도 같음
+    """
+    per_id = {}
+    for df in (df_mat, df_tox):
+        # 정규화 파생 열은 원래 열로부터 결정되므로 제외 (정규화 전후 해시 동일)
+        seed, rows = _row_hashes(df[[c for c in df.columns if c not in NORM_COLS]])
+        for tid, pos in df.groupby('내부식별자', sort=False, observed=True).indices.items():
+            h = per_id.get(tid)
+            if h is None:
+                h = per_id[tid] = hashlib.blake2b(digest_size=16)
+            h.update(seed)
+            h.update(rows[pos].tobytes())
+            h.update(b'|')
+    return {tid: h.hexdigest() for tid, h in per_id.items()}
+
+
+def _read_snapshot(path):
+    try:
+        with open(path, 'rb') as f:
+            snap = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return None
+    if not isinstance(snap, dict) or snap.get('meta', {}).get('version') != SNAPSHOT_VERSION:
+        return None
+    return snap
+
+
+def _write_snapshot(path, snap):
+    """임시 파일에 쓴 뒤 교체 (동시 요청이 깨진 스냅샷을 읽지 않도록)"""
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, 'wb') as f:
+        pickle.dump(snap, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def _select(df, columns, sheet):
+    missing = [c for c in columns if c not in df.columns]
+    if missing:
+        raise ValueError(f"'{sheet}' 시트에 필요한 열이 없습니다: {', '.join(missing)}")
+    return df[columns]
+
+
+def compact(df_mat, df_tox):
+    """사용 열만 남기고 반복 라벨을 category로 변환한 (물질정보, 유해성정보)"""
+    df_mat = _select(df_mat, MAT_COLUMNS, SHEET_MAT).reset_index(drop=True)
+    df_tox = _select(df_tox, TOX_COLUMNS, SHEET_TOX).reset_index(drop=True)
+    df_tox = df_tox.astype({c: 'category' for c in TOX_CATEGORIES})
+    return df_mat, df_tox
+
+
+def read_materials(db_path):
+    """물질정보 시트만 읽음 (read_db와 같은 형식)"""
+    with pd.ExcelFile(db_path) as xl:
+        df_mat = xl.parse(SHEET_MAT, usecols=lambda c: c in MAT_COLUMNS)
+    return _select(df_mat, MAT_COLUMNS, SHEET_MAT).reset_index(drop=True)
+
+
+def read_db(db_path):
+    """워크북을 한 번 열어 두 시트를 필요한 열만 읽음"""
+    with pd.ExcelFile(db_path) as xl:
+        df_mat = xl.parse(SHEET_MAT, usecols=lambda c: c in MAT_COLUMNS)
+        df_tox = xl.parse(SHEET_TOX, usecols=lambda c: c in TOX_COLUMNS)
+    return compact(df_mat, df_tox)
+
+
+def build_snapshot(db_path, digest=None, base=None):
+    """
+    엑셀 두 시트를 읽어 스냅샷으로 저장
+    base(직전 스냅샷)가 있으면 해시가 같은 물질의 보고서 행렬은 다시 만들지 않음
+    """
+    st_ = os.stat(db_path)
+    with span('read_excel'):
+        df_mat, df_tox = read_db(db_path)
+    with span('normalize'):
+        df_tox = normalize(df_tox)
+    sheets = {SHEET_MAT: df_mat, SHEET_TOX: df_tox}
+    snap = {
+        'meta': {
+            'version':   SNAPSHOT_VERSION,
+            'mtime_ns':  st_.st_mtime_ns,
+            'size':      st_.st_size,
+            'sha256':    digest or file_sha256(db_path),
+            'id_hashes': None,
+        },
+        SHEET_MAT: sheets[SHEET_MAT],
+        SHEET_TOX: sheets[SHEET_TOX],
+        'reports': None,
+    }
+    with span('id_hashes'):
+        snap['meta']['id_hashes'] = hashes = id_hashes(sheets[SHEET_MAT], sheets[SHEET_TOX])
+    with span('reports'):
+        snap['reports'] = build_reports(df_mat, df_tox, hashes, base, db_path)
+    try:
+        _write_snapshot(snapshot_path(db_path), snap)
+    except OSError:
+        pass   # 읽기 전용 위치 → 스냅샷 없이 진행
+    return snap
+
+
+def build_reports(df_mat, df_tox, hashes, base=None, db_path=None):
+    """물질별 보고서 행렬 (extractor.build_reports), 직전 스냅샷에서 바뀌지 않은 물질은 재사용"""
+    from extractor import build_reports as build
+    from tox_index import get_index
+    idx = get_index(df_mat, df_tox, hashes, source=db_path)
+    if base is not None and base.get('reports'):
+        old = base['meta']['id_hashes'] or {}
+        for tid, report in base['reports'].items():
+            if tid in hashes and old.get(tid) == hashes[tid]:
+                idx.reports.setdefault(tid, report)
+    build(idx)
+    return idx.reports
+
+
+# 프로세스 내 메모: 파일이 그대로면 같은 DataFrame 객체를 재사용 (인덱스 재생성 방지)
+# (작업 큐/API/Streamlit 스레드가 함께 쓰므로 변경·순회는 잠금 아래에서; 스냅샷 생성은 잠금 밖)
+_MEMO = {}
+_MEMO_LOCK = threading.Lock()
+
+
+def load_snapshot(db_path):
+    """유효한 스냅샷을 반환하고, 원본 엑셀이 바뀌었으면 다시 생성"""
+    st_  = os.stat(db_path)
+    key  = os.path.abspath(db_path)
+    with _MEMO_LOCK:
+        hit = _MEMO.get(key)
+    if hit is not None and hit[:2] == (st_.st_mtime_ns, st_.st_size):
+        return hit[2]
+    snap = _load_snapshot(db_path, st_)
+    with _MEMO_LOCK:
+        _MEMO[key] = (st_.st_mtime_ns, st_.st_size, snap)
+    return snap
+
+
+def forget(db_path):
+    """프로세스 메모에서 제거 (메모리 예산으로 내린 DB가 계속 남지 않도록)"""
+    with _MEMO_LOCK:
+        _MEMO.pop(os.path.abspath(db_path), None)
+
+
+def _previous(db_path):
+    """같은 DB 경로의 직전 스냅샷 (프로세스 메모)"""
+    with _MEMO_LOCK:
+        hit = _MEMO.get(os.path.abspath(db_path))
+    return None if hit is None else hit[2]
+
+
+def _load_snapshot(db_path, st_):
+    with span('snapshot_read'):
+        snap = _read_snapshot(snapshot_path(db_path))
+    if snap is None:
+        return build_snapshot(db_path, base=_previous(db_path))
+
+    meta = snap['meta']
+    if meta['mtime_ns'] == st_.st_mtime_ns and meta['size'] == st_.st_size:
+        return snap
+
+    # mtime만 바뀐 경우(복사/touch) 내용 해시가 같으면 재사용
+    digest = file_sha256(db_path)
+    if digest != meta['sha256']:
+        return build_snapshot(db_path, digest, base=snap)
+    meta['mtime_ns'], meta['size'] = st_.st_mtime_ns, st_.st_size
+    try:
+        _write_snapshot(snapshot_path(db_path), snap)
+    except OSError:
+        pass
+    return snap
+
+
+def snapshot_of(df_tox):
+    """load_db가 반환한 유해성정보 프레임이면 그 스냅샷, 아니면 None"""
+    with _MEMO_LOCK:
+        entries = list(_MEMO.values())
+    for *_, snap in entries:
+        if snap[SHEET_TOX] is df_tox:
+            return snap
+    return None
+
+
+def load_db(db_path):
+    """(물질정보, 유해성정보) DataFrame 반환"""
+    snap = load_snapshot(db_path)
+    return snap[SHEET_MAT], snap[SHEET_TOX]
@@ -0,0 +1,360 @@
+import io
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+
+import engine
+from perf import trace
+
+# ─────────────────────────────────────────────────────────────
+# 비동기 추출 작업 큐
+#   submit() → 작업 ID, 작업자 스레드(JOB_WORKERS개, 최소 2)가 순서대로 실행
+#   · 같은 요청이 대기/실행 중이면 새로 만들지 않고 그 작업을 함께 사용 (구독자 추가)
+#   · 클라이언트별 동시 실행 수(JOB_PER_CLIENT)와 대기 수(JOB_QUEUE_PER_CLIENT) 제한
+#   · 일괄/내보내기는 작업자 하나를 항상 남겨 두어 개별/다중 요청이 밀리지 않음
+#   · 취소: 대기 중이면 즉시, 실행 중이면 다음 진행 보고 시점에 중단 (끝난 뒤 도착해도 결과는 버림)
+#     (구독자가 여럿이면 마지막 구독자가 취소할 때만, 구독하지 않은 클라이언트는 거부)
+#   · 일괄/내보내기 결과는 메모리 대신 임시 파일에 기록 (DB 전체도 출력 크기와 무관한 메모리)
+#   · 끝난 작업의 결과는 JOB_KEEP_SECONDS 동안 보관, 결과 합계가 JOB_RESULT_MAX_MB를 넘으면
+#     가장 먼저 끝난 결과부터 비움 (가장 최근 결과 하나는 유지, 임시 파일은 비울 때 삭제)
+#   Streamlit 일괄 추출과 HTTP API(api.py)가 같은 큐를 공유
+# ─────────────────────────────────────────────────────────────
+
+JOB_WORKERS          = int(os.environ.get('TOX_JOB_WORKERS', '2'))
+JOB_PER_CLIENT       = int(os.environ.get('TOX_JOB_PER_CLIENT', '1'))
+JOB_QUEUE_PER_CLIENT = int(os.environ.get('TOX_JOB_QUEUE_PER_CLIENT', '20'))
+JOB_KEEP_SECONDS     = float(os.environ.get('TOX_JOB_KEEP_SECONDS', '3600'))
+JOB_RESULT_MAX_MB    = float(os.environ.get('TOX_JOB_RESULT_MAX_MB', '512'))
+
+MODES = ('single', 'multi', 'bulk', 'export')
+HEAVY = {'bulk', 'export'}     # 오래 걸리는 작업
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = 'queued', 'running', 'done', 'failed', 'cancelled'
+FINISHED = {DONE, FAILED, CANCELLED}
+
+log = logging.getLogger('tox_extract.jobs')
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobRejected(Exception):
+    """클라이언트별 대기 한도 초과"""
+
+
+class JobForbidden(Exception):
+    """요청/구독하지 않은 클라이언트의 취소"""
+
+
+class Job:
+    def __init__(self, mode, ids, options, client, key):
+        self.id       = uuid.uuid4().hex[:12]
+        self.mode     = mode
+        self.ids      = ids             # None이면 DB 전체 (일괄/내보내기)
+        self.options  = options
+        self.client   = client          # 실행 한도를 적용받는 클라이언트 (처음 요청한 쪽)
+        self.key      = key
+        self.subscribers = {client}
+        self.status   = QUEUED
+        self.done     = 0
+        self.total    = len(ids) if ids else None
+        self.current  = None            # 마지막으로 처리한 내부식별자
+        self.error    = None
+        self.failures = {}
+        self.rows     = None            # 내보내기로 기록한 행 수
+        self.result   = None            # (바이트 또는 임시 파일 경로, 파일 이름, MIME)
+        self.spool    = None            # 결과 임시 파일 경로 (일괄/내보내기)
+        self.evicted  = False           # 보관 용량 한도로 결과를 비웠는지
+        self.trace    = None
+        self.created  = time.time()
+        self.started  = self.finished = None
+        self._cancel  = threading.Event()
+        self._finished_event = threading.Event()
+
+    def progress(self, done, total, tid):
+        """engine의 progress 콜백 (취소 요청 시 JobCancelled로 중단)"""
+        if self._cancel.is_set():
+            raise JobCancelled()
+        self.done, self.total, self.current = done, total, tid
+
+    def result_size(self):
+        result = self.result
+        if result is None:
+            return None
+        return len(result[0]) if isinstance(result[0], bytes) else os.path.getsize(result[0])
+
+    def open_result(self):
+        """결과 → (바이너리 파일 객체, 파일 이름, MIME) 또는 None (없거나 방금 비워짐)"""
+        result = self.result
+        if result is None:
+            return None
+        data, filename, mime = result
+        if isinstance(data, bytes):
+            return io.BytesIO(data), filename, mime
+        try:
+            return open(data, 'rb'), filename, mime
+        except FileNotFoundError:
+            return None
+
+    def _drop_result(self):
+        """결과를 비우고 임시 파일 삭제 (열려 있는 다운로드는 끝까지 읽힘)"""
+        self.result = None
+        if self.spool is not None:
+            try:
+                os.remove(self.spool)
+            except OSError:
+                pass
+            self.spool = None
+
+    def wait(self, timeout=None):
+        """끝날 때까지 대기 → 끝났는지"""
+        return self._finished_event.wait(timeout)
+
+    def as_dict(self):
+        return {
+            'id':       self.id,
+            'mode':     self.mode,
+            'status':   self.status,
+            'ids':      self.ids,
+            'options':  self.options,
+            'done':     self.done,
+            'total':    self.total,
+            'current':  self.current,
+            'error':    self.error,
+            'failures': self.failures,
+            'rows':     self.rows,
+            'filename': self.result[1] if self.result else None,
+            'bytes':    self.result_size(),
+            'evicted':  self.evicted,
+            'created':  self.created,
+            'started':  self.started,
+            'finished': self.finished,
+        }
+
+
+def _validate(mode, ids, options):
+    """요청 검증/정규화 → (ids, options)"""
+    from bulk import parse_id_list
+    from export import EXPORT_FORMATS
+
+    if mode not in MODES:
+        raise ValueError(f"알 수 없는 모드: {mode} (가능: {', '.join(MODES)})")
+    if ids is not None:
+        if isinstance(ids, str) or not all(isinstance(t, str) for t in ids):
+            raise ValueError("ids는 내부식별자 문자열 목록이어야 합니다.")
+        ids = parse_id_list("\n".join(ids))
+    if mode == 'single' and (not ids or len(ids) != 1):
+        raise ValueError("개별물질 추출은 내부식별자 1개가 필요합니다.")
+    if mode == 'multi' and (not ids or len(ids) < 2):
+        raise ValueError("서로 다른 내부식별자를 2개 이상 입력해주세요.")
+    if mode in HEAVY and ids is not None and not ids:
+        raise ValueError("내부식별자를 하나 이상 입력하거나 생략(DB 전체)해주세요.")
+    options = {k: v for k, v in (options or {}).items() if v is not None}   # 생략과 None을 같은 요청으로
+    if mode == 'export':
+        fmt = options.setdefault('format', 'csv')
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"알 수 없는 내보내기 형식: {fmt} (가능: {', '.join(EXPORT_FORMATS)})")
+    workers = options.get('workers')
+    if workers is not None and (isinstance(workers, bool) or not isinstance(workers, int) or workers < 1):
+        raise ValueError("workers는 1 이상의 정수여야 합니다.")
+    unknown = set(options) - {'format', 'workers', 'profile'}
+    if unknown:
+        raise ValueError(f"알 수 없는 옵션: {', '.join(sorted(unknown))}")
+    return ids, options
+
+
+def _spool(suffix):
+    """결과를 기록할 임시 파일 경로 (작업을 비울 때 삭제)"""
+    fd, path = tempfile.mkstemp(prefix='tox-job-', suffix=suffix)
+    os.close(fd)
+    return path
+
+
+class JobQueue:
+    def __init__(self, workers=JOB_WORKERS, per_client=JOB_PER_CLIENT, queue_per_client=JOB_QUEUE_PER_CLIENT,
+                 keep_seconds=JOB_KEEP_SECONDS, result_max_mb=JOB_RESULT_MAX_MB, db_path=None):
+        self.workers          = max(2, workers)   # 일괄/내보내기가 전부를 차지하지 않도록 최소 2개
+        self.per_client       = max(1, per_client)
+        self.queue_per_client = queue_per_client
+        self.keep_seconds     = keep_seconds
+        self.result_budget    = int(result_max_mb * 2**20)
+        self.db_path          = db_path or engine.DB_FILENAME
+        self.heavy_slots      = max(1, self.workers - 1)   # 일괄/내보내기 동시 실행 상한
+        self._cond     = threading.Condition()
+        self._pending  = deque()
+        self._jobs     = {}     # 작업 ID → Job
+        self._inflight = {}     # 요청 키 → 대기/실행 중인 Job
+        self._running  = []
+        self._threads  = [threading.Thread(target=self._work, name=f"tox-job-{i}", daemon=True)
+                          for i in range(self.workers)]
+        for t in self._threads:
+            t.start()
+
+    # ── 요청 ──────────────────────────────────────────────
+    def submit(self, mode, ids=None, client='local', **options):
+        """작업 등록 → (Job, 기존 작업 재사용 여부)"""
+        ids, options = _validate(mode, ids, options)
+        # 모든 옵션 포함: 프로파일 요청이 프로파일 없는 작업에 합쳐져 결과가 빠지지 않도록
+        key = (mode, None if ids is None else tuple(ids), tuple(sorted(options.items())))
+        with self._cond:
+            self._purge()
+            job = self._inflight.get(key)
+            if job is not None:
+                job.subscribers.add(client)
+                return job, True
+            waiting = sum(1 for j in self._jobs.values() if j.client == client and j.status not in FINISHED)
+            if waiting >= self.queue_per_client:
+                raise JobRejected(f"동시에 요청할 수 있는 작업 수({self.queue_per_client})를 넘었습니다.")
+            job = Job(mode, ids, options, client, key)
+            self._jobs[job.id] = self._inflight[key] = job
+            self._pending.append(job)
+            self._cond.notify_all()
+        return job, False
+
+    def get(self, job_id):
+        with self._cond:
+            self._purge()
+            return self._jobs.get(job_id)
+
+    def jobs(self, client=None):
+        """작업 목록 (client가 주어지면 그 클라이언트가 구독한 작업만)"""
+        with self._cond:
+            self._purge()
+            return [j for j in self._jobs.values() if client is None or client in j.subscribers]
+
+    def cancel(self, job_id, client=None):
+        """
+        취소 요청 → Job 또는 None (없는 작업)
+        client가 주어지면 그 구독만 해제하고, 남은 구독자가 없을 때 실제로 취소
+        (구독하지 않은 클라이언트면 JobForbidden)
+        """
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED:
+                return job
+            if client is not None:
+                if client not in job.subscribers:
+                    raise JobForbidden(f"이 작업을 요청하지 않은 클라이언트는 취소할 수 없습니다: {job_id}")
+                job.subscribers.discard(client)
+                if job.subscribers:
+                    return job
+            job._cancel.set()
+            if self._inflight.get(job.key) is job:   # 같은 요청이 다시 오면 새 작업으로
+                del self._inflight[job.key]
+            if job.status == QUEUED:
+                self._pending.remove(job)
+                self._finish(job, CANCELLED)
+        return job
+
+    # ── 실행 ──────────────────────────────────────────────
+    def _next(self):
+        """실행 가능한 첫 대기 작업 (클라이언트 한도/무거운 작업 한도 적용)"""
+        running = {}
+        heavy = 0
+        for j in self._running:
+            running[j.client] = running.get(j.client, 0) + 1
+            heavy += j.mode in HEAVY
+        for job in self._pending:
+            if running.get(job.client, 0) >= self.per_client:
+                continue
+            if job.mode in HEAVY and heavy >= self.heavy_slots:
+                continue
+            return job
+        return None
+
+    def _work(self):
+        while True:
+            with self._cond:
+                job = self._next()
+                while job is None:
+                    self._cond.wait()
+                    job = self._next()
+                self._pending.remove(job)
+                self._running.append(job)
+                job.status, job.started = RUNNING, time.time()
+            try:
+                status = self._run(job)
+            except JobCancelled:
+                status = CANCELLED
+            except Exception as e:
+                job.error = f"{type(e).__name__}: {e}"
+                log.warning("작업 %s 실패: %s", job.id, job.error)
+                status = FAILED
+            with self._cond:
+                self._running.remove(job)
+                if job._cancel.is_set():    # 마지막 진행 보고 뒤에 취소됨 → 결과를 버림
+                    status = CANCELLED
+                if status != DONE:
+                    job._drop_result()      # 실패/취소 시 쓰다 만 임시 파일 삭제
+                self._finish(job, status)
+                self._purge()
+                self._cond.notify_all()
+
+    def _finish(self, job, status):
+        job.status, job.finished = status, time.time()
+        if self._inflight.get(job.key) is job:
+            del self._inflight[job.key]
+        job._finished_event.set()
+
+    def _run(self, job):
+        from export import EXPORT_FORMATS, export_filename
+
+        db, opts = self.db_path, job.options
+        with trace(job.mode, profile=opts.get('profile'), job=job.id, count=job.total) as tr:
+            if job.mode == 'single':
+                tid = job.ids[0]
+                job.progress(0, 1, tid)
+                job.result = (engine.single_xlsx(tid, db), engine.single_filename(tid), engine.XLSX_MIME)
+                job.progress(1, 1, tid)
+            elif job.mode == 'multi':
+                job.progress(0, len(job.ids), None)
+                job.result = (engine.multi_xlsx(job.ids, db), engine.multi_filename(job.ids), engine.XLSX_MIME)
+                job.progress(len(job.ids), len(job.ids), job.ids[-1])
+            elif job.mode == 'bulk':
+                path = job.spool = _spool('.zip')
+                _, job.failures = engine.bulk_zip(job.ids, db, workers=opts.get('workers'),
+                                                  progress=job.progress, out=path)
+                job.result = (path, "추출결과_일괄.zip", "application/zip")
+            else:
+                fmt = opts['format']
+                path = job.spool = _spool(EXPORT_FORMATS[fmt][1])
+                job.rows, job.failures = engine.export_records(job.ids, path, fmt, db, progress=job.progress)
+                job.result = (path, export_filename(fmt), EXPORT_FORMATS[fmt][0])
+        job.trace = tr
+        return DONE
+
+    def _purge(self):
+        """보관 기간이 지난 끝난 작업 삭제, 결과 합계가 보관 용량을 넘으면 먼저 끝난 결과부터 비움"""
+        now = time.time()
+        for job_id in [j.id for j in self._jobs.values()
+                       if j.status in FINISHED and now - j.finished > self.keep_seconds]:
+            self._jobs.pop(job_id)._drop_result()
+        kept = sorted((j for j in self._jobs.values() if j.status in FINISHED and j.result is not None),
+                      key=lambda j: j.finished)
+        sizes = {j.id: j.result_size() for j in kept}
+        total = sum(sizes.values())
+        for job in kept[:-1]:
+            if total <= self.result_budget:
+                break
+            total -= sizes[job.id]
+            job._drop_result()
+            job.evicted = True
+            log.info("작업 %s 결과 삭제 (보관 용량 %.0f MB 초과)", job.id, self.result_budget / 2**20)
+
+
+_QUEUE = None
+_QUEUE_LOCK = threading.Lock()
+
+
+def get_queue(db_path=None):
+    """프로세스 공용 작업 큐 (db_path는 처음 만들 때만 적용, 생략 시 engine.DB_FILENAME)"""
+    global _QUEUE
+    with _QUEUE_LOCK:
+        if _QUEUE is None:
+            _QUEUE = JobQueue(db_path=db_path)
+    return _QUEUE
@@ -0,0 +1,148 @@
+import contextvars
+import importlib.util
+import io
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager, nullcontext
+
+# ─────────────────────────────────────────────────────────────
+# 단계별 시간 측정 / 프로파일
+#   with trace('single', id='B-3') as tr:   # 요청 하나 (끝나면 JSON 로그 한 줄)
+#       with span('save'): ...               # 요청 안의 단계
+#   trace 밖의 span은 공용 no-op을 돌려주므로 비활성 시 비용은 ContextVar 조회 한 번
+#   TOX_PERF_LOG=경로 를 지정하면 JSON 줄 로그를 파일로 남김
+# ─────────────────────────────────────────────────────────────
+
+PROFILERS = ('cprofile', 'pyinstrument')
+
+log = logging.getLogger('tox_extract.perf')
+if os.environ.get('TOX_PERF_LOG'):
+    _handler = logging.FileHandler(os.environ['TOX_PERF_LOG'], encoding='utf-8')
+    _handler.setFormatter(logging.Formatter('%(message)s'))
+    log.addHandler(_handler)
+    log.setLevel(logging.INFO)
+
+_CURRENT = contextvars.ContextVar('tox_perf_trace', default=None)
+_NOOP    = nullcontext({})   # trace 밖에서 span 속성 기록은 버려짐
+
+
+class Trace:
+    """요청 하나의 단계 기록"""
+
+    def __init__(self, name, attrs):
+        self.name    = name
+        self.attrs   = attrs
+        self.spans   = []      # [이름, 깊이, 시작(초), 소요(초), 속성]
+        self.total   = None
+        self.error   = None
+        self.profile = None    # 프로파일 텍스트 (요청한 경우)
+        self._depth  = 0
+        self._t0     = time.perf_counter()
+
+    def as_dict(self):
+        return {
+            'request':  self.name,
+            **self.attrs,
+            'total_ms': None if self.total is None else round(self.total * 1e3, 3),
+            'error':    self.error,
+            'spans': [{'name': name, 'depth': depth, 'start_ms': round(start * 1e3, 3),
+                       'ms': None if dur is None else round(dur * 1e3, 3), **attrs}
+                      for name, depth, start, dur, attrs in self.spans],
+        }
+
+    def rows(self):
+        """UI 표시용 [{'단계', 'ms'}] (깊이만큼 들여쓰기)"""
+        return [{'단계': '  ' * depth + name, 'ms': None if dur is None else round(dur * 1e3, 2),
+                 **{k: str(v) for k, v in attrs.items()}}
+                for name, depth, _, dur, attrs in self.spans]
+
+
+class _Span:
+    __slots__ = ('tr', 'rec', 't0')
+
+    def __init__(self, tr, name, attrs):
+        self.tr  = tr
+        self.rec = [name, tr._depth, 0.0, None, attrs]
+
+    def __enter__(self):
+        tr = self.tr
+        self.t0 = time.perf_counter()
+        self.rec[2] = self.t0 - tr._t0
+        tr.spans.append(self.rec)
+        tr._depth += 1
+        return self.rec[4]      # 속성 dict (단계 안에서 값을 추가할 수 있음)
+
+    def __exit__(self, *exc):
+        self.rec[3] = time.perf_counter() - self.t0
+        self.tr._depth -= 1
+        return False
+
+
+def span(name, **attrs):
+    """현재 trace에 단계 기록 (trace 밖이면 no-op)"""
+    tr = _CURRENT.get()
+    if tr is None:
+        return _NOOP
+    return _Span(tr, name, attrs)
+
+
+def current():
+    return _CURRENT.get()
+
+
+def available_profilers():
+    return [p for p in PROFILERS if p == 'cprofile' or importlib.util.find_spec(p) is not None]
+
+
+@contextmanager
+def trace(name, profile=None, **attrs):
+    """
+    요청 하나를 측정하고 끝나면 JSON 로그 기록
+    profile='cprofile' 또는 'pyinstrument'이면 그 요청에 한해 프로파일을 tr.profile에 첨부
+    """
+    tr = Trace(name, attrs)
+    token = _CURRENT.set(tr)
+    stop = _start_profiler(profile)
+    try:
+        yield tr
+    except Exception as e:
+        tr.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        tr.total = time.perf_counter() - tr._t0
+        if stop is not None:
+            tr.profile = stop()
+        _CURRENT.reset(token)
+        if log.isEnabledFor(logging.INFO):
+            log.info(json.dumps(tr.as_dict(), ensure_ascii=False, default=str))
+
+
+def _start_profiler(kind):
+    """프로파일러 시작 → 종료 후 텍스트를 돌려주는 함수 (kind가 없으면 None)"""
+    if not kind:
+        return None
+    if kind == 'pyinstrument':
+        from pyinstrument import Profiler
+        prof = Profiler()
+        prof.start()
+
+        def stop():
+            prof.stop()
+            return prof.output_text(unicode=True)
+        return stop
+
+    if kind != 'cprofile':
+        raise ValueError(f"알 수 없는 프로파일러: {kind} (가능: {', '.join(PROFILERS)})")
+    import cProfile
+    import pstats
+    prof = cProfile.Profile()
+    prof.enable()
+
+    def stop():
+        prof.disable()
+        out = io.StringIO()
+        pstats.Stats(prof, stream=out).sort_stats('cumulative').print_stats(30)
+        return out.getvalue()
+    return stop
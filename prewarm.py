@@ -0,0 +1,95 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# ─────────────────────────────────────────────────────────────
+# 시작 시 사전 적재 (앱 재시작 후 첫 요청 대기 단축)
+#   DB 버전(스냅샷 + 보고서 행렬), 검색 색인, 템플릿 원형을 백그라운드 스레드에서 동시에 준비
+#   화면은 기다리지 않고 그려지며, 준비 중에 들어온 요청은 자기에게 필요한 항목만 기다림
+#   (dbstore.SharedDB / templates.TemplateCache가 항목별 잠금으로 중복 적재를 막음)
+# ─────────────────────────────────────────────────────────────
+
+PENDING, READY, FAILED = '준비 중', '완료', '실패'
+
+log = logging.getLogger('tox_extract.db')
+
+
+class Prewarm:
+    def __init__(self, db_path, templates):
+        """templates: {이름: 템플릿 경로}"""
+        from dbstore import shared
+        from templates import template_blob
+
+        self.started = time.perf_counter()
+        self.first_result = None          # 시작 → 첫 결과 생성까지 (초)
+        self._done = {}                   # 이름 → 시작 기준 완료 시각 (초)
+        self.tasks = {}
+        pool = ThreadPoolExecutor(max_workers=2 + len(templates), thread_name_prefix='tox-prewarm')
+        self.tasks['DB'] = self._submit(pool, 'DB', lambda: shared(db_path).get())
+        self.tasks['검색 색인'] = self._submit(pool, '검색 색인', lambda: self.tasks['DB'].result().search)
+        for name, path in templates.items():
+            self.tasks[name] = self._submit(pool, name, template_blob, path)
+        pool.shutdown(wait=False)
+
+    def _submit(self, pool, name, fn, *args):
+        def run():
+            try:
+                return fn(*args)
+            finally:
+                self._done[name] = time.perf_counter() - self.started
+        return pool.submit(run)
+
+    def status(self):
+        """{이름: (상태, 완료 시각(초) 또는 None, 오류 메시지 또는 None)}"""
+        out = {}
+        for name, fut in self.tasks.items():
+            if not fut.done():
+                out[name] = (PENDING, None, None)
+            elif fut.exception() is not None:
+                e = fut.exception()
+                out[name] = (FAILED, self._done.get(name), f"{type(e).__name__}: {e}")
+            else:
+                out[name] = (READY, self._done.get(name), None)
+        return out
+
+    def ready(self, *names):
+        """names(생략 시 전체) 항목이 모두 성공적으로 준비됐는지"""
+        return all(self.tasks[n].done() and self.tasks[n].exception() is None for n in names or self.tasks)
+
+    def wait(self, *names, timeout=None):
+        """names 항목이 끝날 때까지 대기 → ready(*names)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for n in names or self.tasks:
+            left = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                self.tasks[n].exception(timeout=left)
+            except TimeoutError:
+                return False
+        return self.ready(*names)
+
+    @property
+    def elapsed(self):
+        """시작 → 모든 항목 완료까지 (초), 진행 중이면 None"""
+        return max(self._done.values()) if len(self._done) == len(self.tasks) else None
+
+    def record_result(self):
+        """첫 결과 생성 시각 기록 (재시작 후 첫 다운로드까지의 시간)"""
+        if self.first_result is None:
+            self.first_result = time.perf_counter() - self.started
+            log.info("재시작 후 첫 결과까지 %.2f s", self.first_result)
+
+
+_STARTED = {}
+_LOCK = threading.Lock()
+
+
+def start(db_path, templates):
+    """프로세스당 한 번 사전 적재 시작 (같은 인자로 다시 부르면 진행 중인 Prewarm 반환)"""
+    key = (os.path.abspath(db_path), tuple(sorted(templates.items())))
+    with _LOCK:
+        warm = _STARTED.get(key)
+        if warm is None:
+            warm = _STARTED[key] = Prewarm(db_path, templates)
+    return warm
@@ -0,0 +1,184 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from extractor import OUTPUT_VERSION
+from ingest import SNAPSHOT_VERSION
+
+# ─────────────────────────────────────────────────────────────
+# 결과 캐시
+#   (형식 버전, 모드, 내부식별자 순서, 물질별 DB 행 해시, 템플릿 해시) → 완성된 xlsx 바이트
+#   메모리 LRU가 가득 차면 오래된 항목을 디스크로 내리고,
+#   디스크도 용량 상한을 넘으면 가장 오래 쓰이지 않은 파일부터 삭제
+#   DB에서 해당 물질 행이 바뀌거나 템플릿이 바뀌면 키가 달라지므로
+#   이전 항목은 조회되지 않고 자연히 밀려남 (다른 물질만 수정된 경우는 그대로 적중)
+#   디스크 항목은 재시작/배포 후에도 남으므로, 행 해시에 드러나지 않는 변경
+#   (스냅샷 파생 열, 값 선택·서식 로직)은 형식 버전으로 구분
+# ─────────────────────────────────────────────────────────────
+
+CACHE_DIR       = os.environ.get('TOX_RESULT_CACHE_DIR', '.result_cache')
+MEM_MAX_BYTES   = 64 << 20
+DISK_MAX_BYTES  = 512 << 20
+ENTRY_SUFFIX    = '.xlsx'
+
+# 스냅샷 형식(파생 열) + 결과 엑셀 형식 — 둘 중 하나라도 올라가면 이전 결과는 조회되지 않음
+RESULT_FORMAT_VERSION = f"{SNAPSHOT_VERSION}.{OUTPUT_VERSION}"
+
+
+# 파일 내용 해시: mtime/크기가 그대로면 다시 읽지 않음
+_DIGESTS = {}
+
+
+def file_digest(path):
+    st_ = os.stat(path)
+    key = os.path.abspath(path)
+    hit = _DIGESTS.get(key)
+    if hit is not None and hit[:2] == (st_.st_mtime_ns, st_.st_size):
+        return hit[2]
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    _DIGESTS[key] = (st_.st_mtime_ns, st_.st_size, h.hexdigest())
+    return _DIGESTS[key][2]
+
+
+def result_key(mode, ids, id_hashes, tpl_path):
+    """id_hashes: 결과를 만들 DB 버전의 내부식별자별 해시"""
+    return (RESULT_FORMAT_VERSION, mode, tuple(ids), tuple(id_hashes.get(t) for t in ids),
+            file_digest(tpl_path))
+
+
+class ResultCache:
+    def __init__(self, mem_max_bytes=MEM_MAX_BYTES, cache_dir=CACHE_DIR, disk_max_bytes=DISK_MAX_BYTES):
+        self.mem_max_bytes  = mem_max_bytes
+        self.cache_dir      = cache_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._lock       = threading.Lock()
+        self._mem        = OrderedDict()   # 키 → 바이트 (끝이 최근 사용)
+        self._mem_bytes  = 0
+        self._disk_bytes = None            # 첫 spill 시 디렉터리를 훑어 계산
+
+    # ── 조회/저장 ──────────────────────────────────────────
+    def get(self, key):
+        with self._lock:
+            data = self._mem.get(key)
+            if data is not None:
+                self._mem.move_to_end(key)
+                return data
+        data = self._read_disk(key)
+        if data is not None:
+            self._put_mem(key, data)
+        return data
+
+    def put(self, key, data):
+        self._put_mem(key, data)
+
+    def get_or_build(self, key, build):
+        """캐시에 없으면 build()로 만들어 저장 (예외는 저장하지 않고 그대로 전달)"""
+        data = self.get(key)
+        if data is None:
+            data = build()
+            self.put(key, data)
+        return data
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear()
+            self._mem_bytes = 0
+            self._disk_bytes = None
+        if self.cache_dir and os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(ENTRY_SUFFIX):
+                    try:
+                        os.remove(os.path.join(self.cache_dir, name))
+                    except OSError:
+                        pass
+
+    # ── 메모리 LRU ────────────────────────────────────────
+    def _put_mem(self, key, data):
+        spill = []
+        with self._lock:
+            old = self._mem.pop(key, None)
+            if old is not None:
+                self._mem_bytes -= len(old)
+            self._mem[key] = data
+            self._mem_bytes += len(data)
+            while self._mem_bytes > self.mem_max_bytes and len(self._mem) > 1:
+                k, v = self._mem.popitem(last=False)
+                self._mem_bytes -= len(v)
+                spill.append((k, v))
+        for k, v in spill:
+            self._write_disk(k, v)
+
+    # ── 디스크 ────────────────────────────────────────────
+    def _entry_path(self, key):
+        name = hashlib.sha256(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, name + ENTRY_SUFFIX)
+
+    def _read_disk(self, key):
+        if not self.cache_dir:
+            return None
+        path = self._entry_path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)   # 디스크 LRU 순서 갱신
+        except OSError:
+            return None
+        return data
+
+    def _write_disk(self, key, data):
+        if not self.cache_dir:
+            return
+        path = self._entry_path(key)
+        tmp  = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            existed = os.path.exists(path)
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            return   # 쓰기 불가 위치 → 메모리 캐시만 사용
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan_disk()[1]
+            elif not existed:
+                self._disk_bytes += len(data)
+            over = self._disk_bytes > self.disk_max_bytes
+        if over:
+            self._trim_disk()
+
+    def _scan_disk(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(ENTRY_SUFFIX):
+                try:
+                    st_ = os.stat(os.path.join(self.cache_dir, name))
+                except OSError:
+                    continue
+                entries.append((st_.st_mtime_ns, st_.st_size, name))
+        return entries, sum(e[1] for e in entries)
+
+    def _trim_disk(self):
+        """오래 쓰이지 않은 파일부터 삭제해 용량 상한 이하로"""
+        entries, total = self._scan_disk()
+        for _, size, name in sorted(entries):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+                total -= size
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_bytes = total
+
+
+_CACHE = ResultCache()
+
+
+def get_cache():
+    return _CACHE
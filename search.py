@@ -0,0 +1,147 @@
+import re
+from bisect import bisect_left
+
+import numpy as np
+
+# ─────────────────────────────────────────────────────────────
+# 물질 검색 인덱스 (내부식별자 / CAS / 물질명 / 분자식)
+#   정확일치 → 접두 → 부분일치 순으로 순위, 모두 없으면 유사(3-gram 겹침)
+#   접두: 필드별 정렬 키 + 이분 탐색, 부분일치/유사: 3-gram 역색인
+#   DB 버전당 한 번 생성 (dbstore.DBVersion.search)
+# ─────────────────────────────────────────────────────────────
+
+SEARCH_FIELDS = ['내부식별자', 'CAS', '물질명', '분자식']
+GRAM = 3
+FUZZY_MIN_SHARE = 0.5     # 유사 검색: 질의 3-gram 중 이 비율 이상 공유
+FUZZY_GRAMS     = 8       # 유사 검색에 쓰는 (가장 드문) 질의 3-gram 최대 수
+FUZZY_BUDGET    = 20_000  # 유사 검색 후보 계산에 쓰는 역색인 항목 수 상한 (흔한 3-gram 제외)
+
+EXACT, PREFIX, SUBSTRING, FUZZY = range(4)
+
+
+def normalize_key(value):
+    """대소문자/공백 차이 무시"""
+    return re.sub(r'\s+', ' ', str(value)).strip().casefold()
+
+
+_EMPTY = np.empty(0, dtype=np.int32)
+
+
+def _member(sorted_arr, values):
+    """values 각각이 sorted_arr에 있는지 (후보가 적을 때 이분 탐색으로 교집합)"""
+    i = np.searchsorted(sorted_arr, values)
+    return sorted_arr[np.minimum(i, len(sorted_arr) - 1)] == values
+
+
+def _grams(key):
+    return {key[i:i + GRAM] for i in range(len(key) - GRAM + 1)}
+
+
+class SearchIndex:
+    def __init__(self, df_mat):
+        df = df_mat.drop_duplicates('내부식별자').dropna(subset=['내부식별자'])
+        self.ids    = [str(t) for t in df['내부식별자']]
+        self.rows   = {f: [('' if v is None or v != v else str(v).strip()) for v in df[f]] for f in SEARCH_FIELDS}
+        self.keys   = {f: [normalize_key(v) for v in self.rows[f]] for f in SEARCH_FIELDS}
+        self.sorted = {f: sorted((k, i) for i, k in enumerate(keys) if k) for f, keys in self.keys.items()}
+        self._heads = {f: [k for k, _ in pairs] for f, pairs in self.sorted.items()}
+        self._exact = {}
+        for f in ('내부식별자', 'CAS'):
+            for i, k in enumerate(self.keys[f]):
+                if k and k not in ('-', 'nan'):
+                    self._exact.setdefault(k, []).append(i)
+
+        postings = {}
+        for i in range(len(self.ids)):
+            grams = set()
+            for f in SEARCH_FIELDS:
+                grams |= _grams(self.keys[f][i])
+            for g in grams:
+                postings.setdefault(g, []).append(i)
+        self._postings = {g: np.asarray(p, dtype=np.int32) for g, p in postings.items()}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def label(self, pos):
+        """선택 목록 표시용 'B-3 · 50-00-0 · 물질명 (분자식)'"""
+        r = self.rows
+        text = " · ".join(v for v in (r['내부식별자'][pos], r['CAS'][pos], r['물질명'][pos]) if v and v != '-')
+        return f"{text} ({r['분자식'][pos]})" if r['분자식'][pos] else text
+
+    def search(self, query, limit=20):
+        """[(위치, 일치 방식)] (순위순, 최대 limit개)"""
+        q = normalize_key(query)
+        if not q:
+            return []
+        out, seen = [], set()
+
+        def add(pos, kind):
+            if pos not in seen and len(out) < limit:
+                seen.add(pos)
+                out.append((pos, kind))
+
+        for pos in self._exact.get(q, ()):
+            add(pos, EXACT)
+        for f in SEARCH_FIELDS:
+            heads, pairs = self._heads[f], self.sorted[f]
+            i = bisect_left(heads, q)
+            while i < len(heads) and len(out) < limit and heads[i].startswith(q):
+                add(pairs[i][1], EXACT if heads[i] == q else PREFIX)
+                i += 1
+        if len(out) >= limit or len(q) < GRAM:
+            return out
+
+        grams = sorted((self._postings.get(g, _EMPTY) for g in _grams(q)), key=len)
+        # 부분일치: 드문 3-gram부터 좁힌 후보 중 실제로 포함하는 것
+        cand = grams[0]
+        for p in grams[1:]:
+            if not len(cand):
+                break
+            cand = cand[_member(p, cand)]
+        for pos in cand.tolist():
+            if len(out) >= limit:
+                return out
+            if any(q in self.keys[f][pos] for f in SEARCH_FIELDS):
+                add(pos, SUBSTRING)
+
+        # 유사: 위에서 하나도 못 찾았을 때만 (오타 등) — 드문 3-gram 중 절반 이상 공유, 많이 겹치는 순
+        rare, total = [], 0
+        for p in grams[:FUZZY_GRAMS]:
+            if rare and total + len(p) > FUZZY_BUDGET:
+                break
+            if len(p):
+                rare.append(p)
+                total += len(p)
+        if rare and not out:
+            need = max(1, int(np.ceil(len(rare) * FUZZY_MIN_SHARE)))
+            pos, cnt = np.unique(np.concatenate(rare), return_counts=True)
+            pos, cnt = pos[cnt >= need], cnt[cnt >= need]
+            for k in np.argsort(-cnt, kind='stable')[:limit].tolist():
+                add(int(pos[k]), FUZZY)
+        return out
+
+    def suggest(self, query, limit=20):
+        """[(내부식별자, 표시 문자열)]"""
+        return [(self.ids[pos], self.label(pos)) for pos, _ in self.search(query, limit)]
+
+    def resolve(self, token):
+        """입력 하나 → 내부식별자 (내부식별자/CAS 정확일치가 하나일 때) 또는 None"""
+        hits = self._exact.get(normalize_key(token), ())
+        tids = {self.ids[pos] for pos in hits}
+        return next(iter(tids)) if len(tids) == 1 else None
+
+    def validate(self, tokens, suggestions=3):
+        """
+        ID 목록 검증 → (내부식별자 목록, {인식 못한 입력: [추천 내부식별자]})
+        CAS로 입력한 항목도 해당 내부식별자로 변환 (순서 유지, 중복 제거)
+        """
+        ids, seen, unknown = [], set(), {}
+        for tok in tokens:
+            tid = self.resolve(tok)
+            if tid is None:
+                unknown[tok] = [t for t, _ in self.suggest(tok, suggestions)]
+            elif tid not in seen:
+                seen.add(tid)
+                ids.append(tid)
+        return ids, unknown
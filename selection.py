@@ -0,0 +1,265 @@
+import numpy as np
+import pandas as pd
+
+
+# ─────────────────────────────────────────────────────────────
+# 우선순위 엔진
+#   유해성정보 전체에 대해 우선순위 키를 한 번에 계산하고
+#   (내부식별자, 유해성항목, 결과도출방법, 출처) 그룹별 최우선 행을 선택
+# ─────────────────────────────────────────────────────────────
+
+KEY_COLS = ['내부식별자', '유해성항목', '결과도출방법', '출처']
+
+VEGA_PRIORITY = ["EXPERIMENTAL value", "GOOD reliability", "MODERATE reliability", "LOW reliability"]
+
+# 실험값 출처 (템플릿 열 순서; 염색체이상 시험종은 마지막으로 선택된 출처 기준)
+EXP_SOURCES = ['ECHA CHEM', 'US DashBoard', 'Pubchem', 'K-reach', '환경부유해성심사결과']
+
+CHROMOSOME_CAT = "포유류 배양세포를 이용한 염색체이상"
+
+# 실험값 우선순위: 유해성항목 → (Endpoint, 시험종, Duration, 시험지침 번호)
+# 모두 내림차순, 동순위는 Result 오름차순
+EXP_RULES = {
+    "급성경구독성":     ('LD50', ['Rat'],                                       None,   '401'),
+    "급성흡입독성":     ('LC50', ['Rat'],                                       '4 h',  '403'),
+    "어류급성독성":     ('LC50', ['Fathead minnow', 'Zebrafish', 'Rainbow trout'], '96 h', '203'),
+    "물벼룩급성독성":   ('EC50', ['Daphnia magna'],                             '48 h', '202'),
+    "담수조류생장저해": ('EC50', ['P. subcapitata', 'D. subspicatus'],          '72 h', '201'),
+}
+
+DANISH_MODELS = {
+    "급성경구독성":      "Acute toxicity in Rat, Oral - Danish QSAR DB ACDLabs model (v1.0)",
+    "담수조류생장저해":  "Pseudokirchneriella subcapitata 72h EC50 - Danish QSAR DB battery model (v1.0)",
+    "물벼룩급성독성":    "Daphnia magna 48h EC50 - Danish QSAR DB battery model (v1.0)",
+    "복귀돌연변이":      "Ames test in S. typhimurium (in vitro) - Danish QSAR DB battery model (v1.0)",
+    "소핵시험":          "Micronucleus Test in Mouse Erythrocytes - Danish QSAR DB battery model (v1.0)",
+    "어류급성독성":      "Fathead minnow 96h LC50 - Danish QSAR DB battery model (v1.0)",
+    "피부부식성/자극성": "BfR skin irritation/corrosion (v1.0)",
+}
+DANISH_CHO = "Chromosome Aberrations in Chinese Hamster Ovary (CHO) Cells - Danish QSAR DB battery model (v1.0)"
+DANISH_CHL = "Chromosome Aberrations in Chinese Hamster Lung (CHL) Cells - Danish QSAR DB battery model (v1.0)"
+
+N_KEYS = 5
+
+PRIORITY_COLS = ['유해성항목', '결과도출방법', '출처', 'Result', 'Endpoint(표준)', '시험종(표준)',
+                 'Duration(표준)']   # + 정규화 파생 열 (NORM_COLS)
+
+
+def by_label(series, fn):
+    """
+    문자열 함수 fn(str Series) → 배열을 행별로 적용
+    category 열이면 라벨마다 한 번만 계산하고 코드로 펼침 (결측은 마지막 라벨)
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        labels = pd.Series(series.cat.categories.tolist() + [np.nan], dtype=object).astype(str)
+        return np.asarray(fn(labels))[series.cat.codes.to_numpy()]
+    return np.asarray(fn(series.astype(str)))
+
+
+def _contains(series, pat, case=True):
+    return by_label(series, lambda s: s.str.contains(pat, case=case, na=False).to_numpy())
+
+
+def result_order(result):
+    """Result 오름차순 정렬 코드 (숫자 < 문자열 < 결측, pandas 정렬과 동일)"""
+    cat = pd.Categorical(result, ordered=True)
+    return np.where(cat.codes < 0, len(cat.categories), cat.codes)
+
+
+def guideline_level(guideline):
+    """시험지침: OECD=2, 기타 기재=1, 미기재=0"""
+    def level(s):
+        g = s.str.upper()
+        return np.where(g.str.contains('OECD', regex=False), 2,
+                        np.where(g.isin(['-', '', 'NAN']), 0, 1))
+    return by_label(guideline, level)
+
+
+def vega_rank(domain):
+    def rank(s):
+        d = s.str.lower()
+        out = np.zeros(len(d), dtype=np.int64)
+        for i, label in reversed(list(enumerate(VEGA_PRIORITY))):
+            out[d.str.contains(label.lower(), regex=False).to_numpy()] = len(VEGA_PRIORITY) - i
+        return out
+    return by_label(domain, rank)
+
+
+def vega_score(domain):
+    def score(s):
+        m = s.str.extract(r'\(([0-9.]+)\)', expand=False)
+        return pd.to_numeric(m, errors='coerce').fillna(0.0).to_numpy(float)
+    return by_label(domain, score)
+
+
+# ─────────────────────────────────────────────────────────────
+# 행 정규화 (DB 버전당 한 번, 스냅샷에 함께 저장)
+#   선택/포맷 시 문자열을 다시 해석하지 않도록 파생 열로 저장
+# ─────────────────────────────────────────────────────────────
+
+RES_NUM    = 'Result(수치)'          # float(Result), 변환 불가면 NaN
+RES_POSNEG = 'Result(양/음성)'       # positive/negative 결과 여부
+GL_LEVEL   = '시험지침(수준)'        # guideline_level
+GL_MATCH   = '시험지침(번호일치)'    # EXP_RULES의 해당 항목 시험지침 번호 포함 여부
+VEGA_RANK  = 'Domain status(등급)'   # vega_rank
+VEGA_SCORE = 'Domain status(점수)'   # vega_score
+OOD        = 'Domain status(OOD)'    # "Out of domain" 여부
+BIODEG     = '이분해성(판정)'        # 이분해성 판정 문구 (Result가 수치가 아니면 결측)
+
+NORM_COLS = [RES_NUM, RES_POSNEG, GL_LEVEL, GL_MATCH, VEGA_RANK, VEGA_SCORE, OOD, BIODEG]
+
+BIODEG_POSITIVE = "positive(이분해성)"
+BIODEG_NEGATIVE = "negative(난분해성)"
+
+
+def _parse_result(result):
+    """Result 고유값마다 float() 한 번 → (수치 배열, 변환 성공 여부)"""
+    values = result.to_numpy(object)
+    inv, uniq = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=False)
+    num = np.full(len(uniq), np.nan)
+    ok  = np.zeros(len(uniq), dtype=bool)
+    for i, v in enumerate(uniq):
+        try:
+            num[i] = float(v)
+            ok[i] = True
+        except Exception:
+            pass
+    return num[inv], ok[inv]
+
+
+def normalize(df):
+    """유해성정보에 파생 열(NORM_COLS)을 추가한 새 DataFrame"""
+    num, ok = _parse_result(df['Result'])
+    labels = pd.Series(df['Result'].to_numpy(object), dtype=object).astype(str).str.lower()
+    cat = df['유해성항목']
+
+    gl_match = np.zeros(len(df), dtype=bool)
+    for c, (_, _, _, guideline) in EXP_RULES.items():
+        rows = (cat == c).to_numpy()
+        if rows.any():
+            gl_match[rows] = _contains(df['시험지침'][rows], guideline)
+
+    # 이분해성: DOC 기준 70%, 그 외 60%
+    biodeg = np.full(len(df), None, dtype=object)
+    rows = (cat == '이분해성').to_numpy() & ok
+    if rows.any():
+        doc = _contains(df['Endpoint'][rows], 'doc', case=False)
+        biodeg[rows] = np.where(num[rows] >= np.where(doc, 70, 60), BIODEG_POSITIVE, BIODEG_NEGATIVE)
+
+    domain = df['Domain status']
+    return df.assign(**{
+        RES_NUM:    num,
+        RES_POSNEG: labels.isin(['positive', 'negative']).to_numpy(),
+        GL_LEVEL:   guideline_level(df['시험지침']).astype(np.int8),
+        GL_MATCH:   gl_match,
+        VEGA_RANK:  vega_rank(domain).astype(np.int8),
+        VEGA_SCORE: vega_score(domain),
+        OOD:        by_label(domain, lambda s: (s == "Out of domain").to_numpy()),
+        BIODEG:     pd.Categorical(biodeg, categories=[BIODEG_POSITIVE, BIODEG_NEGATIVE]),
+    })
+
+
+def ensure_normalized(df):
+    """파생 열이 없으면(스냅샷 외 경로) 정규화"""
+    return df if all(c in df.columns for c in NORM_COLS) else normalize(df)
+
+
+def priority_keys(df):
+    """
+    행별 우선순위 키 (N_KEYS × 행 수, 클수록 우선)와 후보 여부 반환
+    그룹 내 규칙은 유해성항목/결과도출방법/출처로 결정되므로 행별로 계산해도 그룹 단위와 동일
+    """
+    n       = len(df)
+    df      = ensure_normalized(df)[PRIORITY_COLS + NORM_COLS]   # 필요한 열만 (부분 선택 시 전체 열 복사 방지)
+    keys    = np.zeros((N_KEYS, n), dtype=float)
+    eligible = np.ones(n, dtype=bool)
+    cat     = df['유해성항목']      # category 열이면 비교는 코드 단위
+    method  = df['결과도출방법']
+    src     = df['출처']
+    is_exp  = (method == '실험값').to_numpy()
+
+    res_asc = -result_order(df['Result']).astype(float)
+    gl_match = df[GL_MATCH].to_numpy()
+    for c, (ep, species, duration, _) in EXP_RULES.items():
+        rows = is_exp & (cat == c).to_numpy()
+        if not rows.any():
+            continue
+        sub = df[rows]
+        cols = [
+            (sub['Endpoint(표준)'] == ep).to_numpy(),
+            sub['시험종(표준)'].isin(species).to_numpy(),
+        ]
+        if duration is not None:
+            cols.append((sub['Duration(표준)'] == duration).to_numpy())
+        cols.append(gl_match[rows])
+        cols.append(res_asc[rows])
+        for k, col in enumerate(cols):
+            keys[k, rows] = col
+
+    # 이분해성: 시험지침 수준 ↓, 수치 Result ↓
+    rows = is_exp & (cat == '이분해성').to_numpy()
+    if rows.any():
+        keys[0, rows] = df[GL_LEVEL].to_numpy()[rows]
+        keys[1, rows] = np.nan_to_num(df[RES_NUM].to_numpy()[rows], nan=0.0)
+
+    # 피부부식성/자극성: positive/negative 결과만 후보, 토끼 우선
+    rows = is_exp & (cat == '피부부식성/자극성').to_numpy()
+    if rows.any():
+        sub = df[rows]
+        eligible[rows] = sub[RES_POSNEG].to_numpy()
+        keys[0, rows] = _contains(sub['시험종(표준)'], 'Rabbit', case=False)
+
+    # VEGA (QSAR / AI-based QSAR): 신뢰도 등급 ↓, 점수 ↓
+    rows = ((src == 'VEGA') & ((method == 'QSAR') | (method == 'AI-based QSAR'))).to_numpy()
+    if rows.any():
+        keys[0, rows] = df[VEGA_RANK].to_numpy()[rows]
+        keys[1, rows] = df[VEGA_SCORE].to_numpy()[rows]
+
+    return keys, eligible
+
+
+def _first_per_group(group, keys, eligible):
+    """group 코드별 최우선 행 위치 {코드: 위치} (동순위는 원래 순서)"""
+    ok    = eligible & (group >= 0)
+    pos   = np.flatnonzero(ok)
+    order = pos[np.lexsort(tuple(-keys[k, pos] for k in reversed(range(N_KEYS))) + (group[pos],))]
+    g     = group[order]
+    first = np.r_[True, g[1:] != g[:-1]] if len(g) else np.zeros(0, bool)
+    return dict(zip(g[first].tolist(), order[first].tolist()))
+
+
+def _chromosome_species(df, positions):
+    """내부식별자별 염색체이상 실험값 최우선 행의 시험종 (마지막 출처 기준)"""
+    pos  = np.asarray(positions, dtype=np.int64)
+    sub  = df[['내부식별자', '유해성항목', '결과도출방법', '출처', '시험종(표준)']].iloc[pos]
+    keep = ((sub['유해성항목'] == CHROMOSOME_CAT) & (sub['결과도출방법'] == '실험값')
+            & sub['출처'].isin(EXP_SOURCES)).to_numpy()
+    sub  = sub[keep]
+    order = sub['출처'].map({s: i for i, s in enumerate(EXP_SOURCES)})
+    last = (sub.assign(_o=order.to_numpy()).sort_values('_o', kind='stable')
+               .drop_duplicates('내부식별자', keep='last'))
+    return dict(zip(last['내부식별자'], last['시험종(표준)']))
+
+
+def select_best(df):
+    """{(내부식별자, 유해성항목, 결과도출방법, 출처): 최우선 행 위치}"""
+    group = df.groupby(KEY_COLS, sort=False, observed=True).ngroup().to_numpy()
+    keys, eligible = priority_keys(df)
+    best = _first_per_group(group, keys, eligible)
+
+    # Danish QSAR: 모델 일치 우선 (염색체이상은 선택된 실험값의 시험종으로 모델 결정)
+    danish = ((df['결과도출방법'] == 'QSAR') & (df['출처'] == 'Danish QSAR')).to_numpy()
+    if danish.any():
+        species = _chromosome_species(df, list(best.values()))
+        sub   = df.loc[danish, ['내부식별자', '유해성항목', '모델 종류 및 버전']]
+        chrom = (sub['유해성항목'] == CHROMOSOME_CAT).to_numpy()
+        cho   = sub['내부식별자'].map(species).eq("CHO Cells").to_numpy()
+        model = np.where(chrom, np.where(cho, DANISH_CHO, DANISH_CHL),
+                         sub['유해성항목'].map(DANISH_MODELS).to_numpy(object))
+        keys[:, danish] = 0
+        keys[0, danish] = sub['모델 종류 및 버전'].to_numpy(object) == model
+        best.update(_first_per_group(group, keys, danish))
+
+    pos  = np.fromiter(best.values(), dtype=np.int64, count=len(best))
+    cols = [df[c].to_numpy(object)[pos] for c in KEY_COLS]
+    return dict(zip(zip(*cols), pos.tolist()))
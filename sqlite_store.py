@@ -0,0 +1,347 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from functools import cached_property
+
+from ingest import MAT_COLUMNS, SHEET_MAT, SHEET_TOX, TOX_COLUMNS, file_sha256, file_stat
+from perf import span
+
+# ─────────────────────────────────────────────────────────────
+# SQLite 저장소 (메모리에 다 올릴 수 없는 DB용)
+#   python tox_extract.py --db DB.xlsx sqlite        → DB.sqlite 생성
+#   python tox_extract.py --db DB.sqlite single B-3  → 요청한 물질의 행만 읽어 추출
+#   엑셀은 행 단위로 흘려 읽어 적재하므로 적재 중 메모리도 DB 크기와 무관
+#   요청 시에는 해당 내부식별자의 행만 (원래 행 순서대로) 읽어 작은 프레임을 만들고
+#   메모리 경로와 같은 compact → 정규화 → 인덱스 → 보고서 행렬을 거치므로 결과가 동일
+#   물질별 행 해시는 적재 시 미리 저장 → 결과 캐시 적중이면 물질 행을 읽지 않음
+#   (선택/서식은 모두 물질 단위로 결정됨)
+# ─────────────────────────────────────────────────────────────
+
+SQLITE_SUFFIX  = '.sqlite'
+SQLITE_VERSION = 2      # 2: 물질별 행 해시 테이블 (결과 캐시 조회 시 행을 읽지 않음)
+
+INSERT_ROWS = 10_000   # executemany 묶음 크기
+QUERY_IDS   = 500      # IN (...) 한 번에 넣는 내부식별자 수 (SQLite 변수 수 제한)
+
+# 시트 → (테이블, 열)
+TABLES = {SHEET_MAT: ('mat', MAT_COLUMNS), SHEET_TOX: ('tox', TOX_COLUMNS)}
+TOX_KEY = ['내부식별자', '유해성항목', '결과도출방법', '출처']
+
+
+def is_sqlite(db_path):
+    return str(db_path).lower().endswith(SQLITE_SUFFIX)
+
+
+def sqlite_path(db_path):
+    """워크북 옆 SQLite 경로 (DB.xlsx → DB.sqlite)"""
+    return os.path.splitext(db_path)[0] + SQLITE_SUFFIX
+
+
+def _q(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+# ── 적재 ──────────────────────────────────────────────────────
+# pandas.read_excel과 같은 값이 되도록 셀을 변환하고,
+# 열 형식(int/float/str/object)은 열 전체를 본 뒤 정해 meta에 기록 (읽을 때 적용)
+
+class _ColumnKind:
+    """열 전체의 값 구성 → read_excel이 추론했을 형식"""
+
+    def __init__(self):
+        self.null = self.num = self.float = self.str = self.other = 0
+        self.numeric_str = True
+
+    def add(self, v):
+        if v is None:
+            self.null += 1
+        elif isinstance(v, bool):
+            self.other += 1
+        elif isinstance(v, (int, float)):
+            self.num += 1
+            self.float += isinstance(v, float)
+        elif isinstance(v, str):
+            self.str += 1
+            if self.numeric_str:
+                try:
+                    float(v)
+                    self.float += not v.strip().lstrip('+-').isdigit()
+                except ValueError:
+                    self.numeric_str = False
+        else:
+            self.other += 1
+
+    def kind(self):
+        if self.other:
+            return 'object'
+        if not self.num and not self.str:
+            return 'float'                              # 전부 결측
+        if not self.str or self.numeric_str:
+            return 'float' if self.null or self.float else 'int'
+        return 'str' if not self.num else 'object'
+
+
+def _na_strings():
+    from pandas._libs.parsers import STR_NA_VALUES
+    return frozenset(STR_NA_VALUES)
+
+
+def _convert(v, na, errors):
+    """openpyxl 값 → read_excel 값 (정수형 실수는 int, 결측 문자열/오류 셀은 None)"""
+    if v is None:
+        return None
+    if isinstance(v, float):
+        return int(v) if v.is_integer() else v
+    if isinstance(v, str):
+        return None if v in na or v in errors else v
+    if isinstance(v, (int, bool)):
+        return v
+    return str(v)    # 날짜 등 (추출에 쓰는 열에는 없음)
+
+
+def _load_sheet(con, ws, sheet):
+    table, columns = TABLES[sheet]
+    na = _na_strings()
+    from openpyxl.cell.cell import ERROR_CODES
+
+    rows = ws.iter_rows(values_only=True)
+    header = next(rows, ())
+    names = ['' if h is None else str(h) for h in header]
+    missing = [c for c in columns if c not in names]
+    if missing:
+        raise ValueError(f"'{sheet}' 시트에 필요한 열이 없습니다: {', '.join(missing)}")
+    cols = [names.index(c) for c in columns]
+
+    con.execute(f"CREATE TABLE {table} (seq INTEGER PRIMARY KEY, "
+                + ", ".join(_q(c) for c in columns) + ")")
+    sql = (f"INSERT INTO {table} VALUES (?, " + ", ".join("?" * len(columns)) + ")")
+    kinds = [_ColumnKind() for _ in columns]
+    blank = 0        # 중간의 빈 행은 read_excel에서 결측 행 (끝의 빈 행은 제외)
+    seq, batch = 0, []
+    for row in rows:
+        if all(v is None or v == '' for v in row):
+            blank += 1
+            continue
+        for k in kinds:
+            k.null += blank
+        blank = 0
+        values = [_convert(row[i] if i < len(row) else None, na, ERROR_CODES) for i in cols]
+        for k, v in zip(kinds, values):
+            k.add(v)
+        seq += 1
+        if values[0] is not None:     # 내부식별자 없는 행은 조회되지 않음
+            batch.append((seq, *values))
+            if len(batch) >= INSERT_ROWS:
+                con.executemany(sql, batch)
+                batch = []
+    if batch:
+        con.executemany(sql, batch)
+    return seq, {c: k.kind() for c, k in zip(columns, kinds)}
+
+
+def build_sqlite(db_path, out_path=None):
+    """
+    워크북 두 시트를 SQLite 파일로 적재 → 경로
+    (내부식별자, 유해성항목, 결과도출방법, 출처) 복합 인덱스 생성, 임시 파일에 쓴 뒤 교체
+    """
+    from openpyxl import load_workbook
+
+    out_path = out_path or sqlite_path(db_path)
+    st_ = os.stat(db_path)
+    tmp = f"{out_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    con = sqlite3.connect(tmp)
+    try:
+        con.execute("PRAGMA journal_mode=OFF")
+        con.execute("PRAGMA synchronous=OFF")
+        meta = {'version': SQLITE_VERSION, 'source': os.path.basename(db_path),
+                'mtime_ns': st_.st_mtime_ns, 'size': st_.st_size, 'sha256': file_sha256(db_path),
+                'rows': {}, 'kinds': {}}
+        wb = load_workbook(db_path, read_only=True, data_only=True)
+        try:
+            for sheet in (SHEET_MAT, SHEET_TOX):
+                if sheet not in wb.sheetnames:
+                    raise ValueError(f"DB에 '{sheet}' 시트가 없습니다.")
+                with span('sqlite_load', sheet=sheet):
+                    meta['rows'][sheet], meta['kinds'][sheet] = _load_sheet(con, wb[sheet], sheet)
+        finally:
+            wb.close()
+        with span('sqlite_index'):
+            con.execute("CREATE INDEX mat_id ON mat (내부식별자, seq)")
+            con.execute("CREATE INDEX tox_key ON tox (" + ", ".join(_q(c) for c in TOX_KEY) + ")")
+        with span('sqlite_hashes'):
+            _store_hashes(con, meta['kinds'])
+        con.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        con.executemany("INSERT INTO meta VALUES (?, ?)", [(k, json.dumps(v, ensure_ascii=False))
+                                                           for k, v in meta.items()])
+        con.commit()
+    except BaseException:
+        con.close()
+        os.remove(tmp)
+        raise
+    con.close()
+    os.replace(tmp, out_path)
+    return out_path
+
+
+# ── 조회 ──────────────────────────────────────────────────────
+
+def _connect(path):
+    """읽기 전용 연결 (요청마다 새로 열어 스레드/프로세스 간 공유하지 않음)"""
+    from urllib.parse import quote
+    return sqlite3.connect(f"file:{quote(os.path.abspath(path))}?mode=ro", uri=True)
+
+
+def _read_meta(path):
+    con = _connect(path)
+    try:
+        meta = {k: json.loads(v) for k, v in con.execute("SELECT key, value FROM meta")}
+    except sqlite3.DatabaseError as e:
+        raise ValueError(f"SQLite DB 형식이 아닙니다: {path} ({e})") from None
+    finally:
+        con.close()
+    if meta.get('version') != SQLITE_VERSION:
+        raise ValueError(f"SQLite DB 버전이 다릅니다 ({meta.get('version')}): 다시 적재해주세요.")
+    return meta
+
+
+def _column(values, kind):
+    """SQLite 값 목록 → read_excel과 같은 형식의 배열"""
+    import numpy as np
+    import pandas as pd
+
+    if kind == 'int':
+        return np.array([int(v) for v in values], dtype=np.int64)
+    if kind == 'float':
+        return np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+    arr = np.array([np.nan if v is None else v for v in values], dtype=object)
+    return pd.Series(arr, dtype=object).astype(pd.Series(['']).dtype).array if kind == 'str' else arr
+
+
+def _frame(rows, columns, kinds):
+    import pandas as pd
+    cols = list(zip(*rows)) if rows else [()] * len(columns)
+    return pd.DataFrame({c: _column(v, kinds[c]) for c, v in zip(columns, cols)})
+
+
+def _fetch(con, sheet, ids, kinds):
+    """ids 물질의 행 → 원래 행 순서의 프레임 (kinds: 시트의 열 형식)"""
+    table, columns = TABLES[sheet]
+    ids = list(ids)
+    parts = []
+    for i in range(0, max(len(ids), 1), QUERY_IDS):
+        chunk = ids[i:i + QUERY_IDS]
+        cur = con.execute(f"SELECT seq, {', '.join(_q(c) for c in columns)} FROM {table} "
+                          f"WHERE 내부식별자 IN ({', '.join('?' * len(chunk)) or 'NULL'})", chunk)
+        parts.extend(cur.fetchall())
+    parts.sort(key=lambda r: r[0])       # 원래 행 순서
+    return _frame([r[1:] for r in parts], columns, kinds)
+
+
+def _store_hashes(con, kinds):
+    """물질별 행 해시 테이블 (요청 시 DBView가 계산하는 것과 같은 경로로 QUERY_IDS개씩 계산)"""
+    from ingest import compact, id_hashes
+
+    con.execute("CREATE TABLE hashes (내부식별자 TEXT PRIMARY KEY, hash TEXT)")
+    ids = [str(t) for t, in con.execute("SELECT 내부식별자 FROM mat GROUP BY 내부식별자 ORDER BY MIN(seq)")]
+    for i in range(0, len(ids), QUERY_IDS):
+        chunk = ids[i:i + QUERY_IDS]
+        df_mat, df_tox = compact(_fetch(con, SHEET_MAT, chunk, kinds[SHEET_MAT]),
+                                 _fetch(con, SHEET_TOX, chunk, kinds[SHEET_TOX]))
+        con.executemany("INSERT INTO hashes VALUES (?, ?)", id_hashes(df_mat, df_tox).items())
+
+
+class DBView:
+    """요청한 물질만 담은 DB (DBVersion과 같은 속성)"""
+
+    def __init__(self, df_mat, df_tox, reports=None):
+        """reports: 이미 만들어 둔 물질별 보고서 행렬 (해당 물질은 다시 만들지 않음)"""
+        from extractor import build_reports
+        from ingest import compact, id_hashes
+        from tox_index import DBIndex
+
+        df_mat, df_tox = compact(df_mat, df_tox)
+        self.df_mat    = df_mat
+        self.id_hashes = id_hashes(df_mat, df_tox)
+        self.index     = DBIndex(df_mat, df_tox, self.id_hashes, reports=dict(reports or {}))
+        self.df_tox    = self.index.df_tox
+        with span('reports', substances=len(self.id_hashes)):
+            build_reports(self.index)     # 요청한 물질 전부 → 한 번에 생성
+
+    def select(self, ids):
+        return self
+
+    def hashes_for(self, ids):
+        return {t: self.id_hashes.get(t) for t in ids}
+
+
+class SQLiteDB:
+    """SQLite DB 한 버전 (메타만 들고, 물질 행은 select 시 읽음)"""
+
+    def __init__(self, path):
+        self.path      = path
+        self.stat      = file_stat(path)
+        self.meta      = _read_meta(path)
+        self.sha256    = self.meta['sha256']
+        self.loaded_at = time.time()
+
+    def _fetch(self, con, sheet, ids):
+        return _fetch(con, sheet, ids, self.meta['kinds'][sheet])
+
+    def hashes_for(self, ids):
+        """ids의 물질별 행 해시 {내부식별자: hex} (DBView.id_hashes와 같은 값, 행은 읽지 않음)"""
+        ids = [str(t) for t in dict.fromkeys(ids)]
+        con = _connect(self.path)
+        try:
+            out = {}
+            for i in range(0, len(ids), QUERY_IDS):
+                chunk = ids[i:i + QUERY_IDS]
+                out.update(con.execute(f"SELECT 내부식별자, hash FROM hashes "
+                                       f"WHERE 내부식별자 IN ({', '.join('?' * len(chunk))})", chunk))
+            return out
+        finally:
+            con.close()
+
+    def select(self, ids):
+        """ids 물질의 행만 담은 DBView"""
+        ids = [str(t) for t in dict.fromkeys(ids)]
+        con = _connect(self.path)
+        try:
+            with span('sqlite_fetch', substances=len(ids)) as info:
+                df_mat = self._fetch(con, SHEET_MAT, ids)
+                df_tox = self._fetch(con, SHEET_TOX, ids)
+                info['rows'] = len(df_tox)
+        finally:
+            con.close()
+        return DBView(df_mat, df_tox)
+
+    def ids(self):
+        """DB 전체 내부식별자 (물질정보 순서)"""
+        con = _connect(self.path)
+        try:
+            return [str(t) for t, in con.execute(
+                "SELECT 내부식별자 FROM mat GROUP BY 내부식별자 ORDER BY MIN(seq)")]
+        finally:
+            con.close()
+
+    @cached_property
+    def search(self):
+        """물질 검색 인덱스 (물질정보만 읽음 → 물질 수에 비례)"""
+        from search import SearchIndex
+        table, columns = TABLES[SHEET_MAT]
+        con = _connect(self.path)
+        try:
+            cur = con.execute(f"SELECT {', '.join(_q(c) for c in columns)} FROM {table} ORDER BY seq")
+            return SearchIndex(_frame(cur.fetchall(), columns, self.meta['kinds'][SHEET_MAT]))
+        finally:
+            con.close()
+
+    def __getstate__(self):
+        # 작업자 프로세스로 보낼 때 검색 인덱스는 제외 (경로/메타만)
+        state = dict(self.__dict__)
+        state.pop('search', None)
+        return state
+
@@ -0,0 +1,99 @@
+from openpyxl.cell import MergedCell
+from openpyxl.styles import Alignment, Border, Side, Font, NamedStyle
+
+# ─────────────────────────────────────────────────────────────
+# 결과 셀 스타일
+#   템플릿이 이미 스타일을 갖추고 있으면(사전 스타일 템플릿) 요청마다 다시 칠하지 않고,
+#   아니면 워크북당 한 번 등록한 NamedStyle을 셀에 지정
+#   (템플릿을 고친 뒤에는 style_single/style_multi를 적용해 저장하면 다시 사전 스타일 상태가 됨)
+# ─────────────────────────────────────────────────────────────
+
+DATA_STYLE_NAME = '추출 데이터'
+
+THIN = Side(style='thin')
+
+# 개별물질 템플릿
+SINGLE_STYLE_RANGES = ['C7:G7', 'B11:Q21']
+SINGLE_COL_WIDTHS   = {'B':12,'C':15,'D':22,'E':25,'F':12,'G':12,'H':22,
+                       'I':18,'J':20,'K':20,'L':20,'M':20,'N':15,'O':15,'P':15,'Q':15}
+SINGLE_ROW_HEIGHTS  = {r: 45 for r in range(12, 22)}
+
+# 다중물질 템플릿 블록 내 데이터 영역 (헤더 기준 행 오프셋, 열)
+MULTI_STYLE_ROWS = range(2, 12)
+MULTI_STYLE_COLS = range(6, 20)
+
+
+def data_style():
+    return NamedStyle(
+        name=DATA_STYLE_NAME,
+        font=Font(name='맑은 고딕', size=9),
+        border=Border(left=THIN, right=THIN, top=THIN, bottom=THIN),
+        alignment=Alignment(horizontal='center', vertical='center', wrap_text=True),
+    )
+
+
+def ensure_data_style(wb):
+    """워크북에 데이터 NamedStyle을 한 번만 등록"""
+    if DATA_STYLE_NAME not in wb.named_styles:
+        wb.add_named_style(data_style())
+    return DATA_STYLE_NAME
+
+
+def is_data_styled(cell):
+    """셀 서식이 데이터 스타일과 같은지 (글꼴 부가 속성 charset/family 등은 무시)"""
+    f, b, a = cell.font, cell.border, cell.alignment
+    return (f.name == '맑은 고딕' and f.sz == 9 and not f.b and not f.i and not f.u
+            and all(getattr(b, side).style == 'thin' for side in ('left', 'right', 'top', 'bottom'))
+            and a.horizontal == 'center' and a.vertical == 'center' and bool(a.wrap_text))
+
+
+def _single_cells(ws):
+    for rng in SINGLE_STYLE_RANGES:
+        for row in ws[rng]:
+            yield from row
+
+
+def _multi_cells(ws, headers):
+    for hdr in headers:
+        for r in MULTI_STYLE_ROWS:
+            for c in MULTI_STYLE_COLS:
+                yield ws.cell(row=hdr + r, column=c)
+
+
+def single_prestyled(ws):
+    """개별물질 템플릿이 사전 스타일 적용 상태인지 검증 (병합 영역은 기준 셀만 확인)"""
+    return (all(is_data_styled(c) for c in _single_cells(ws) if not isinstance(c, MergedCell))
+            and all(ws.column_dimensions[k].width == w for k, w in SINGLE_COL_WIDTHS.items())
+            and all(ws.row_dimensions[r].height == h for r, h in SINGLE_ROW_HEIGHTS.items()))
+
+
+def multi_prestyled(ws, headers):
+    return all(is_data_styled(c) for c in _multi_cells(ws, headers))
+
+
+def style_single(ws):
+    """개별물질 결과 스타일 (사전 스타일 템플릿이면 생략)"""
+    if single_prestyled(ws):
+        return False
+    name = ensure_data_style(ws.parent)
+    for cell in _single_cells(ws):
+        cell.style = name
+    for col, w in SINGLE_COL_WIDTHS.items():
+        ws.column_dimensions[col].width = w
+    for r, h in SINGLE_ROW_HEIGHTS.items():
+        ws.row_dimensions[r].height = h
+    return True
+
+
+def style_multi(ws, headers, template_headers):
+    """
+    다중물질 결과 스타일
+    추가 블록은 템플릿 블록에서 복제되므로 템플릿 블록만 검증하면 됨
+    """
+    if multi_prestyled(ws, template_headers):
+        return False
+    name = ensure_data_style(ws.parent)
+    for cell in _multi_cells(ws, headers):
+        cell.style = name
+    return True
+
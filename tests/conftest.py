@@ -0,0 +1,57 @@
+import os
+import sys
+
+import pytest
+
+# ─────────────────────────────────────────────────────────────
+# 저장소 루트의 모듈/번들 DB·템플릿을 그대로 사용 (상대 경로 기본값 때문에 루트에서 실행)
+# ─────────────────────────────────────────────────────────────
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(autouse=True)
+def _repo_root(monkeypatch):
+    monkeypatch.chdir(ROOT)
+
+
+@pytest.fixture(scope='session')
+def bundled_db():
+    """번들 DB의 DBVersion (테스트 세션당 한 번 적재)"""
+    import engine
+    from dbstore import DBVersion
+    return DBVersion(os.path.join(ROOT, engine.DB_FILENAME))
+
+
+@pytest.fixture
+def db_copy(tmp_path):
+    """번들 DB를 tmp_path로 복사한 경로 (내용을 고쳐도 번들 DB/메모에 영향 없음)"""
+    import shutil
+
+    import engine
+    import ingest
+    import tox_index
+    path = str(tmp_path / os.path.basename(engine.DB_FILENAME))
+    shutil.copy(os.path.join(ROOT, engine.DB_FILENAME), path)
+    yield path
+    with tox_index._INDEX_LOCK:
+        tox_index._INDEX_MEMO.pop(tox_index._memo_key(path), None)
+    ingest.forget(path)
+
+
+@pytest.fixture
+def edit_result():
+    """edit_result(path, tid, value): 유해성정보 시트에서 tid의 첫 행 Result를 value로 바꿔 저장"""
+    def edit(path, tid, value):
+        import openpyxl
+
+        from ingest import SHEET_TOX
+        wb = openpyxl.load_workbook(path)
+        ws = wb[SHEET_TOX]
+        header = [c.value for c in ws[1]]
+        id_col, result_col = header.index('내부식별자') + 1, header.index('Result') + 1
+        row = next(r for r in range(2, ws.max_row + 1) if ws.cell(r, id_col).value == tid)
+        ws.cell(row, result_col).value = value
+        wb.save(path)
+    return edit
@@ -0,0 +1,74 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+import api
+import engine
+from jobs import JobQueue
+
+# ─────────────────────────────────────────────────────────────
+# HTTP API: 임시 파일 결과 다운로드, 취소 권한 (engine 내보내기 함수를 대신해 결과 내용 고정)
+# ─────────────────────────────────────────────────────────────
+
+PAYLOAD = b"id,value\n" * 50_000
+
+
+@pytest.fixture
+def server(monkeypatch):
+    release = threading.Event()
+
+    def export_records(ids, out, fmt, db_path, progress=None):
+        if ids == ['SLOW']:
+            assert release.wait(10)
+            progress(1, 1, 'SLOW')
+        with open(out, 'wb') as f:
+            f.write(PAYLOAD)
+        return 50_000, {}
+
+    monkeypatch.setattr(engine, 'export_records', export_records)
+    srv = api.make_server('127.0.0.1', 0, JobQueue())
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    srv.release = release
+    yield srv
+    release.set()
+    srv.shutdown()
+    srv.server_close()
+
+
+def call(srv, method, path, body=None, client='t'):
+    host, port = srv.server_address[:2]
+    data = None if body is None else json.dumps(body).encode()
+    req = urllib.request.Request(f"http://{host}:{port}{path}", data=data, method=method,
+                                 headers={'X-Client-Id': client})
+    try:
+        with urllib.request.urlopen(req, timeout=10) as resp:
+            return resp.status, resp.headers, resp.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def test_export_result_download(server):
+    code, _, body = call(server, 'POST', '/jobs', {'mode': 'export', 'ids': ['B-1'], 'format': 'csv'})
+    assert code == 202
+    job = server.queue.get(json.loads(body)['id'])
+    assert job.wait(10)
+    code, headers, body = call(server, 'GET', f"/jobs/{job.id}/result")
+    assert code == 200
+    assert int(headers['Content-Length']) == len(PAYLOAD)
+    assert headers['Content-Type'] == 'text/csv'
+    assert body == PAYLOAD
+
+
+def test_cancel_by_other_client_is_forbidden(server):
+    code, _, body = call(server, 'POST', '/jobs', {'mode': 'export', 'ids': ['SLOW']}, client='owner')
+    job_id = json.loads(body)['id']
+    code, _, body = call(server, 'DELETE', f"/jobs/{job_id}", client='stranger')
+    assert code == 403
+    code, _, body = call(server, 'DELETE', f"/jobs/{job_id}", client='owner')
+    assert code == 200
+    server.release.set()
+    job = server.queue.get(job_id)
+    assert job.wait(10) and job.status == 'cancelled'
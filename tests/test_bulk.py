@@ -0,0 +1,48 @@
+import io
+import zipfile
+
+import bulk
+import engine
+from bulk import run_bulk
+
+# ─────────────────────────────────────────────────────────────
+# 일괄 추출: 프로세스 풀(작업자가 경로로 DB 적재) ↔ 같은 프로세스 실행 결과 비교
+#   docProps/core.xml(저장 시각)만 빼고 물질별 xlsx 구성 파일을 바이트 단위로 비교
+# ─────────────────────────────────────────────────────────────
+
+
+def contents(data):
+    out = {}
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        for name in zf.namelist():
+            if not name.endswith('.xlsx'):
+                out[name] = zf.read(name)
+                continue
+            with zipfile.ZipFile(io.BytesIO(zf.read(name))) as xlsx:
+                out[name] = {m: xlsx.read(m) for m in xlsx.namelist() if m != 'docProps/core.xml'}
+    return out
+
+
+def test_in_process_does_not_touch_worker_state(bundled_db):
+    ids = bundled_db.ids()[:3]
+    data, failures = run_bulk(ids, engine.DB_FILENAME, engine.TPL_SINGLE, workers=1)
+    assert failures == {}
+    assert sorted(contents(data)) == sorted(bulk.result_filename(t) for t in ids)
+    assert bulk._WORKER == {}
+
+
+def test_pool_matches_in_process(bundled_db):
+    ids = bundled_db.ids()[:4] + ['NO-SUCH-ID']
+    serial, serial_failures = run_bulk(ids, engine.DB_FILENAME, engine.TPL_SINGLE, workers=1)
+    pooled, pooled_failures = run_bulk(ids, engine.DB_FILENAME, engine.TPL_SINGLE, workers=2)
+    assert pooled_failures == serial_failures and list(pooled_failures) == ['NO-SUCH-ID']
+    assert contents(pooled) == contents(serial)
+
+
+def test_out_file_matches_bytes(bundled_db, tmp_path):
+    ids = bundled_db.ids()[:2]
+    data, _ = run_bulk(ids, engine.DB_FILENAME, engine.TPL_SINGLE, workers=1)
+    path = tmp_path / 'out.zip'
+    none, failures = run_bulk(ids, engine.DB_FILENAME, engine.TPL_SINGLE, workers=1, out=str(path))
+    assert none is None and failures == {}
+    assert contents(path.read_bytes()) == contents(data)
@@ -0,0 +1,61 @@
+import shutil
+import threading
+
+import pandas as pd
+
+import catalog
+import dbstore
+import engine
+from catalog import CatalogDB, write_catalog
+
+# ─────────────────────────────────────────────────────────────
+# CatalogDB.shard: shard 적재는 shard별 잠금 → 같은 shard는 한 번만 적재,
+# 적재 중에도 다른 shard 조회/적재는 막히지 않음
+# ─────────────────────────────────────────────────────────────
+
+
+class SlowVersion:
+    """DBVersion 대신: 지정한 shard는 gate가 열릴 때까지 적재가 끝나지 않음"""
+    gate  = None
+    slow  = None
+    calls = None
+
+    def __init__(self, path):
+        SlowVersion.calls.append(path)
+        if path == SlowVersion.slow:
+            assert SlowVersion.gate.wait(10)
+        self.path   = path
+        self.df_mat = pd.DataFrame({'내부식별자': ['x']})
+        self.df_tox = pd.DataFrame({'내부식별자': ['x']})
+
+
+def test_shard_load_does_not_block_other_shards(tmp_path, monkeypatch):
+    shards = [str(tmp_path / name) for name in ('a.xlsx', 'b.xlsx')]
+    for shard in shards:
+        shutil.copy(engine.DB_FILENAME, shard)
+    write_catalog(str(tmp_path / 'db.json'), shards)
+    cat = CatalogDB(str(tmp_path / 'db.json'))
+
+    monkeypatch.setattr(dbstore, 'DBVersion', SlowVersion)
+    monkeypatch.setattr(SlowVersion, 'gate', threading.Event())
+    monkeypatch.setattr(SlowVersion, 'slow', shards[0])
+    monkeypatch.setattr(SlowVersion, 'calls', [])
+
+    got = []
+    threads = [threading.Thread(target=lambda: got.append(cat.shard(shards[0]))) for _ in range(3)]
+    for t in threads:
+        t.start()
+    try:
+        # a 적재가 멈춰 있는 동안 b는 바로 적재/조회됨
+        other = cat.shard(shards[1])
+        assert cat.shard(shards[1]) is other
+        assert list(cat.loaded()) == [shards[1]]
+    finally:
+        SlowVersion.gate.set()
+    for t in threads:
+        t.join(10)
+
+    assert len(got) == 3 and all(db is got[0] for db in got)
+    assert SlowVersion.calls.count(shards[0]) == 1
+    assert set(cat.loaded()) == set(shards)
+    assert catalog.file_stat(shards[0]) == cat.stat[1]
@@ -0,0 +1,86 @@
+import os
+import threading
+import time
+
+import ingest
+from dbstore import SharedDB
+
+# ─────────────────────────────────────────────────────────────
+# 공용 DB 교체: 감시 스레드가 파일 변경을 감지해 새 버전으로 바꾸고,
+#   이미 받은 버전(진행 중인 요청)은 끝까지 이전 내용 그대로
+# ─────────────────────────────────────────────────────────────
+
+EDITED = 123456.789
+
+
+def results_of(db, tid):
+    db = db.select([tid])
+    return list(db.df_tox.loc[db.df_tox['내부식별자'] == tid, 'Result'])
+
+
+def wait_for(predicate, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_watcher_swaps_version(db_copy, edit_result):
+    shared = SharedDB(db_copy, poll_seconds=0.05)
+    try:
+        v1 = shared.get()
+        tid = v1.ids()[3]
+        before = results_of(v1, tid)
+        assert EDITED not in before
+
+        edit_result(db_copy, tid, EDITED)
+        assert wait_for(lambda: shared.get() is not v1)
+        v2 = shared.get()
+        assert shared.error is None
+        assert v2.stat == ingest.file_stat(db_copy) and v2.sha256 == ingest.file_sha256(db_copy)
+        assert EDITED in results_of(v2, tid)
+        # 교체 전에 받은 버전은 그대로
+        assert v1.sha256 != v2.sha256
+        assert results_of(v1, tid) == before
+        assert v1.hashes_for([tid]) != v2.hashes_for([tid])
+    finally:
+        shared.stop()
+
+
+def test_reload_after_touch_keeps_content(db_copy):
+    shared = SharedDB(db_copy, poll_seconds=0)
+    v1 = shared.get()
+    st_ = os.stat(db_copy)
+    os.utime(db_copy, ns=(st_.st_atime_ns, st_.st_mtime_ns + 10**9))
+    assert shared.reload()
+    v2 = shared.get()
+    assert v2 is not v1 and v2.stat != v1.stat
+    assert v2.sha256 == v1.sha256 and v2.id_hashes == v1.id_hashes
+
+
+def test_concurrent_snapshot_loads_after_change(db_copy, edit_result):
+    old = ingest.load_snapshot(db_copy)
+    edit_result(db_copy, next(iter(old['meta']['id_hashes'])), EDITED)
+    snaps, errors = [], []
+    barrier = threading.Barrier(6)
+
+    def load():
+        barrier.wait()
+        try:
+            snaps.append(ingest.load_snapshot(db_copy))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=load) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == [] and len(snaps) == 6
+    digest = ingest.file_sha256(db_copy)
+    assert all(s['meta']['sha256'] == digest for s in snaps)
+    memo = ingest.load_snapshot(db_copy)
+    assert any(s is memo for s in snaps)         # 메모에는 그중 하나가 남음
+    assert old['meta']['sha256'] != digest
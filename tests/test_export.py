@@ -0,0 +1,53 @@
+import json
+
+import pandas as pd
+import pytest
+
+import engine
+from export import FIELDS, available_formats, substance_rows
+
+# ─────────────────────────────────────────────────────────────
+# 내보내기 형식별 왕복: 기록한 파일을 다시 읽어 열 순서/형식/값이
+#   보고서 행렬에서 만든 행(substance_rows)과 같은지
+# ─────────────────────────────────────────────────────────────
+
+
+def read_csv(path):
+    with open(path, encoding='utf-8') as f:
+        assert f.readline().rstrip('\r\n').split(',') == FIELDS
+    return pd.read_csv(path, dtype=str, keep_default_na=False)   # CSV에는 형식 정보가 없음
+
+
+def read_jsonl(path):
+    with open(path, encoding='utf-8') as f:
+        first = json.loads(f.readline())
+    assert list(first) == FIELDS and all(isinstance(v, str) for v in first.values())
+    return pd.read_json(path, lines=True, dtype=False)
+
+
+def read_parquet(path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    schema = pq.read_schema(path)
+    assert schema.names == FIELDS and all(t == pa.string() for t in schema.types)
+    return pd.read_parquet(path)
+
+
+READERS = {'csv': read_csv, 'jsonl': read_jsonl, 'parquet': read_parquet}
+
+
+@pytest.mark.parametrize('fmt', list(READERS))
+def test_round_trip(fmt, bundled_db, tmp_path):
+    if fmt not in available_formats():
+        pytest.skip(f"{fmt} 내보내기 불가 (pyarrow 미설치)")
+    ids = bundled_db.ids()[:5]
+    out = tmp_path / f"out.{fmt}"
+    n_rows, failures = engine.export_records(ids, str(out), fmt)
+    assert failures == {}
+
+    df = READERS[fmt](str(out))
+    expected = [r for tid in ids for r in substance_rows(tid, bundled_db.index)]
+    assert list(df.columns) == FIELDS
+    assert len(df) == n_rows == len(expected)
+    assert all(isinstance(v, str) for row in df.itertuples(index=False) for v in row)
+    assert [tuple(r) for r in df.itertuples(index=False)] == expected
@@ -0,0 +1,34 @@
+import threading
+
+import ingest
+
+# ─────────────────────────────────────────────────────────────
+# 스냅샷 기록: 여러 스레드가 같은 스냅샷을 동시에 써도 완전한 파일 하나로 교체
+# ─────────────────────────────────────────────────────────────
+
+
+def test_concurrent_snapshot_writes(tmp_path):
+    path = str(tmp_path / 'db.xlsx.snapshot')
+    snaps = [{'meta': {'version': ingest.SNAPSHOT_VERSION, 'writer': i}, 'blob': bytes([i]) * 2_000_000}
+             for i in range(8)]
+    errors = []
+    barrier = threading.Barrier(len(snaps))
+
+    def write(snap):
+        barrier.wait()
+        try:
+            for _ in range(5):
+                ingest._write_snapshot(path, snap)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(s,)) for s in snaps]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    snap = ingest._read_snapshot(path)
+    assert snap is not None
+    assert snap['blob'] == bytes([snap['meta']['writer']]) * 2_000_000
+    assert list(tmp_path.iterdir()) == [tmp_path / 'db.xlsx.snapshot']
@@ -0,0 +1,143 @@
+import os
+import threading
+
+import pytest
+
+import engine
+from jobs import CANCELLED, DONE, FAILED, JobForbidden, JobQueue
+
+# ─────────────────────────────────────────────────────────────
+# 작업 큐: 실행 중 취소, 작업자 1개 설정에서도 개별 요청용 작업자 유지, 결과 보관 용량,
+#   일괄/내보내기 결과의 임시 파일 기록/삭제, 중복 요청 합치기와 취소 권한
+#   engine 추출 함수를 gate가 열릴 때까지 끝나지 않는 함수로 바꿔 시점을 고정
+# ─────────────────────────────────────────────────────────────
+
+
+@pytest.fixture
+def gate(monkeypatch):
+    """engine.single_xlsx가 started를 알린 뒤 release까지 대기"""
+    started, release = threading.Event(), threading.Event()
+
+    def single_xlsx(tid, db_path):
+        started.set()
+        assert release.wait(10)
+        return f"xlsx:{tid}".encode()
+
+    monkeypatch.setattr(engine, 'single_xlsx', single_xlsx)
+    yield started, release
+    release.set()
+
+
+def test_cancel_while_running_drops_result(gate):
+    started, release = gate
+    queue = JobQueue(workers=2)
+    job, _ = queue.submit('single', ['B-1'])
+    assert started.wait(10)
+    queue.cancel(job.id)
+    release.set()
+    assert job.wait(10)
+    assert job.status == CANCELLED
+    assert job.result is None
+
+
+def test_finished_job_keeps_result(gate):
+    started, release = gate
+    release.set()
+    queue = JobQueue(workers=2)
+    job, _ = queue.submit('single', ['B-1'])
+    assert job.wait(10)
+    assert job.status == DONE
+    assert job.result[0] == b"xlsx:B-1"
+
+
+def test_bulk_leaves_a_worker_for_single(monkeypatch):
+    release = threading.Event()
+
+    def bulk_zip(ids, db_path, workers=None, progress=None, out=None):
+        assert release.wait(10)
+        with open(out, 'wb') as f:
+            f.write(b"zip")
+        return None, {}
+
+    monkeypatch.setattr(engine, 'bulk_zip', bulk_zip)
+    monkeypatch.setattr(engine, 'single_xlsx', lambda tid, db_path: b"xlsx")
+    queue = JobQueue(workers=1)
+    try:
+        bulk, _ = queue.submit('bulk', None, client='a')
+        single, _ = queue.submit('single', ['B-1'], client='b')
+        assert single.wait(10) and single.status == DONE
+        assert bulk.status != DONE
+    finally:
+        release.set()
+    assert bulk.wait(10) and bulk.status == DONE
+
+
+def test_result_budget_evicts_oldest(monkeypatch):
+    monkeypatch.setattr(engine, 'single_xlsx', lambda tid, db_path: b"x" * 6)
+    queue = JobQueue(result_max_mb=10 / 2**20)    # 10바이트 → 결과 하나만 남음
+    done = []
+    for tid in ('B-1', 'B-2', 'B-3'):
+        job, _ = queue.submit('single', [tid])
+        assert job.wait(10)
+        done.append(job)
+    queue.jobs()      # 잠금을 잡아 작업자의 마지막 정리가 끝난 뒤 확인
+    assert [j.evicted for j in done] == [True, True, False]
+    assert [j.result is None for j in done] == [True, True, False]
+    assert all(j.status == DONE for j in done)
+    assert queue.get(done[0].id).as_dict()['evicted']
+
+
+def test_export_spools_to_disk_and_cleans_up(monkeypatch):
+    def export_records(ids, out, fmt, db_path, progress=None):
+        with open(out, 'wb') as f:
+            f.write(b"a,b\n" * 1000)
+        if ids == ['BAD']:
+            raise ValueError("boom")
+        return 1000, {}
+
+    monkeypatch.setattr(engine, 'export_records', export_records)
+    queue = JobQueue(result_max_mb=5000 / 2**20)    # 결과 하나(4000바이트)만 남음
+    first, _ = queue.submit('export', ['B-1'])
+    assert first.wait(10) and first.status == DONE
+    path = first.result[0]
+    assert isinstance(path, str) and os.path.getsize(path) == 4000
+    assert first.as_dict()['bytes'] == 4000
+    f, filename, mime = first.open_result()
+    with f:
+        assert f.read() == b"a,b\n" * 1000
+    assert filename.endswith('.csv') and mime == 'text/csv'
+
+    failed, _ = queue.submit('export', ['BAD'])
+    assert failed.wait(10) and failed.status == FAILED
+    assert failed.result is None and failed.spool is None
+
+    second, _ = queue.submit('export', ['B-2'])
+    assert second.wait(10)
+    queue.jobs()
+    assert first.evicted and first.open_result() is None and not os.path.exists(path)
+    assert os.path.exists(second.result[0])
+
+
+def test_dedup_key_includes_options(gate):
+    started, release = gate
+    queue = JobQueue()
+    plain, _ = queue.submit('single', ['B-1'], client='a', profile=None)
+    same, dedup = queue.submit('single', ['B-1'], client='b')
+    assert dedup and same is plain
+    profiled, dedup = queue.submit('single', ['B-1'], client='c', profile='cprofile')
+    assert not dedup and profiled is not plain
+    release.set()
+    assert plain.wait(10) and profiled.wait(10)
+
+
+def test_cancel_requires_subscription(gate):
+    started, release = gate
+    queue = JobQueue()
+    job, _ = queue.submit('single', ['B-1'], client='a')
+    queue.submit('single', ['B-1'], client='b')
+    with pytest.raises(JobForbidden):
+        queue.cancel(job.id, client='stranger')
+    assert queue.cancel(job.id, client='b') is job     # 구독만 해제
+    assert not job._cancel.is_set()
+    queue.cancel(job.id, client='a')
+    assert job._cancel.is_set()
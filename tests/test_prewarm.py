@@ -0,0 +1,47 @@
+import os
+import shutil
+
+import dbstore
+import engine
+import ingest
+import prewarm
+import templates
+import tox_index
+
+# ─────────────────────────────────────────────────────────────
+# 사전 적재: 끝나면 스냅샷 메모, 조회 인덱스 메모, 검색 색인, 템플릿 원형이 모두 준비됨
+#   (번들 DB/템플릿 복사본으로 다른 테스트가 이미 채운 메모와 섞이지 않게)
+# ─────────────────────────────────────────────────────────────
+
+
+def test_prewarm_fills_caches(db_copy, tmp_path, monkeypatch):
+    tpls = {}
+    for name, path in (('single', engine.TPL_SINGLE), ('multi', engine.TPL_MULTI)):
+        tpls[name] = str(tmp_path / os.path.basename(path))
+        shutil.copy(path, tpls[name])
+    monkeypatch.setattr(prewarm, '_STARTED', {})
+    key = os.path.abspath(db_copy)
+    assert key not in ingest._MEMO and key not in templates._CACHE._entries
+
+    warm = prewarm.start(db_copy, tpls)
+    try:
+        assert prewarm.start(db_copy, tpls) is warm
+        assert warm.wait(timeout=120)
+        assert all(state == prewarm.READY for state, _, _ in warm.status().values())
+        assert warm.elapsed is not None
+
+        db = warm.tasks['DB'].result()
+        assert dbstore.shared(db_copy).get() is db
+        assert ingest._MEMO[key][2][ingest.SHEET_TOX] is db.df_tox
+        assert tox_index._INDEX_MEMO[tox_index._memo_key(db_copy)] is db.index
+        assert set(db.index.reports) == set(db.ids())          # 보고서 행렬까지 미리 생성
+        assert 'search' in db.__dict__                         # 검색 색인 (cached_property)
+        for path in tpls.values():
+            assert os.path.abspath(path) in templates._CACHE._entries
+    finally:
+        with dbstore._SHARED_LOCK:
+            shared = dbstore._SHARED.pop(key, None)
+        if shared is not None:
+            shared.stop()
+        for path in tpls.values():
+            templates._CACHE._entries.pop(os.path.abspath(path), None)
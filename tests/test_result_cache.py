@@ -0,0 +1,91 @@
+import importlib
+import os
+import shutil
+
+import pytest
+
+import engine
+import extractor
+import result_cache
+from result_cache import ResultCache, result_key
+
+# ─────────────────────────────────────────────────────────────
+# 결과 캐시: 메모리 LRU → 디스크 내림/재적재, 디스크 용량 상한, 키 구성
+# ─────────────────────────────────────────────────────────────
+
+
+def entries(cache):
+    return sorted(n for n in os.listdir(cache.cache_dir) if n.endswith(result_cache.ENTRY_SUFFIX))
+
+
+def test_lru_spills_oldest_to_disk(tmp_path):
+    cache = ResultCache(mem_max_bytes=25, cache_dir=str(tmp_path), disk_max_bytes=1 << 20)
+    for k in 'abc':
+        cache.put(k, k.encode() * 10)
+    assert list(cache._mem) == ['b', 'c']          # 30바이트 > 25 → 가장 오래된 a만 내림
+    assert entries(cache) == [os.path.basename(cache._entry_path('a'))]
+
+    cache.get('b')                                  # b가 최근 사용 → 다음 내림 대상은 c
+    cache.put('d', b'd' * 10)
+    assert list(cache._mem) == ['b', 'd']
+    assert cache.get('a') == b'a' * 10             # 디스크에서 다시 읽어 메모리로
+    assert list(cache._mem)[-1] == 'a'
+
+
+def test_disk_entries_survive_restart(tmp_path):
+    cache = ResultCache(mem_max_bytes=10, cache_dir=str(tmp_path))
+    cache.put('a', b'x' * 10)
+    cache.put('b', b'y' * 10)
+    fresh = ResultCache(mem_max_bytes=10, cache_dir=str(tmp_path))
+    assert fresh.get('a') == b'x' * 10
+    assert fresh.get('missing') is None
+
+
+def test_disk_cap_removes_least_recent(tmp_path):
+    cache = ResultCache(cache_dir=str(tmp_path), disk_max_bytes=25)
+    for i, k in enumerate('ab'):
+        cache._write_disk(k, k.encode() * 10)
+        os.utime(cache._entry_path(k), ns=((i + 1) * 10**9,) * 2)
+    assert cache._read_disk('a') == b'a' * 10      # 읽으면 최근 사용으로 → 다음 삭제 대상은 b
+    cache._write_disk('c', b'c' * 10)               # 30바이트 > 25
+    assert entries(cache) == sorted(os.path.basename(cache._entry_path(k)) for k in 'ac')
+    assert cache._disk_bytes == 20
+    assert cache.get('b') is None
+
+
+# ── 키 ───────────────────────────────────────────────────────
+HASHES = {'A': 'h-a', 'B': 'h-b'}
+
+
+def test_key_changes_with_template(tmp_path):
+    tpl = tmp_path / 'tpl.xlsx'
+    shutil.copy(engine.TPL_SINGLE, tpl)
+    before = result_key('single', ['A'], HASHES, str(tpl))
+    assert result_key('single', ['A'], HASHES, str(tpl)) == before
+    with open(tpl, 'ab') as f:
+        f.write(b'\0')
+    assert result_key('single', ['A'], HASHES, str(tpl)) != before
+
+
+def test_key_changes_with_one_substance_hash():
+    multi = result_key('multi', ['A', 'B'], HASHES, engine.TPL_MULTI)
+    single_a = result_key('single', ['A'], HASHES, engine.TPL_SINGLE)
+    changed = {**HASHES, 'B': 'h-b2'}
+    assert result_key('multi', ['A', 'B'], changed, engine.TPL_MULTI) != multi
+    assert result_key('single', ['A'], changed, engine.TPL_SINGLE) == single_a
+    assert result_key('multi', ['B', 'A'], HASHES, engine.TPL_MULTI) != multi    # 순서도 결과에 반영
+
+
+@pytest.fixture
+def reload_cache_module():
+    yield lambda: importlib.reload(result_cache)
+    importlib.reload(result_cache)
+
+
+def test_key_changes_with_output_version(monkeypatch, reload_cache_module):
+    before = result_key('single', ['A'], HASHES, engine.TPL_SINGLE)
+    monkeypatch.setattr(extractor, 'OUTPUT_VERSION', extractor.OUTPUT_VERSION + 1)
+    module = reload_cache_module()
+    assert module.RESULT_FORMAT_VERSION != before[0]
+    assert module.result_key('single', ['A'], HASHES, engine.TPL_SINGLE) != before
+
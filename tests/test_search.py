@@ -0,0 +1,31 @@
+import pandas as pd
+
+from search import SearchIndex
+
+# ─────────────────────────────────────────────────────────────
+# ID 목록 검증: 순서 유지, 내부식별자/CAS 중복 제거, 큰 목록
+# ─────────────────────────────────────────────────────────────
+
+
+def make_index(n):
+    return SearchIndex(pd.DataFrame({
+        '내부식별자': [f"T-{i}" for i in range(n)],
+        'CAS':        [f"{1000 + i}-00-{i % 10}" for i in range(n)],
+        '물질명':     [f"substance {i}" for i in range(n)],
+        '분자식':     ['C2H6O'] * n,
+    }))
+
+
+def test_validate_keeps_order_and_dedupes():
+    idx = make_index(5)
+    ids, unknown = idx.validate(['T-3', '1001-00-1', 'T-1', 't-3', 'nope', 'T-0'])
+    assert ids == ['T-3', 'T-1', 'T-0']
+    assert list(unknown) == ['nope']
+
+
+def test_validate_large_list():
+    n = 50_000
+    idx = make_index(n)
+    tokens = [f"T-{i}" for i in range(n)] * 2
+    ids, unknown = idx.validate(tokens)
+    assert ids == [f"T-{i}" for i in range(n)] and unknown == {}
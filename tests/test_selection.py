@@ -0,0 +1,211 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import engine
+from ingest import SHEET_TOX, TOX_CATEGORIES, TOX_COLUMNS
+from selection import DANISH_CHL, DANISH_CHO, EXP_SOURCES, select_best
+
+# ─────────────────────────────────────────────────────────────
+# select_best ↔ 벡터화 이전 그룹별 우선순위 함수 비교
+#   아래 legacy_* 는 제거된 apply_priority_exp / filter_skin_exp / apply_priority_qsar_danish /
+#   get_best_vega 를 그대로 옮긴 기준 구현 (원본 read_excel 프레임에 적용)
+# ─────────────────────────────────────────────────────────────
+
+VEGA_PRIORITY = ["EXPERIMENTAL value", "GOOD reliability", "MODERATE reliability", "LOW reliability"]
+
+DANISH_MODELS = {
+    "급성경구독성":      "Acute toxicity in Rat, Oral - Danish QSAR DB ACDLabs model (v1.0)",
+    "담수조류생장저해":  "Pseudokirchneriella subcapitata 72h EC50 - Danish QSAR DB battery model (v1.0)",
+    "물벼룩급성독성":    "Daphnia magna 48h EC50 - Danish QSAR DB battery model (v1.0)",
+    "복귀돌연변이":      "Ames test in S. typhimurium (in vitro) - Danish QSAR DB battery model (v1.0)",
+    "소핵시험":          "Micronucleus Test in Mouse Erythrocytes - Danish QSAR DB battery model (v1.0)",
+    "어류급성독성":      "Fathead minnow 96h LC50 - Danish QSAR DB battery model (v1.0)",
+    "피부부식성/자극성": "BfR skin irritation/corrosion (v1.0)",
+}
+CHROMOSOME_CAT = "포유류 배양세포를 이용한 염색체이상"
+
+
+def legacy_vega(df):
+    import re
+    temp = df.copy()
+    def rank(v):
+        for i, label in enumerate(VEGA_PRIORITY):
+            if label.lower() in str(v).lower():
+                return len(VEGA_PRIORITY) - i
+        return 0
+    def score(v):
+        m = re.search(r'\(([0-9.]+)\)', str(v))
+        return float(m.group(1)) if m else 0.0
+    temp['_rank']  = temp['Domain status'].apply(rank)
+    temp['_score'] = temp['Domain status'].apply(score)
+    return temp.sort_values(['_rank', '_score'], ascending=[False, False]).iloc[0]
+
+
+def legacy_exp(df, cat):
+    if len(df) <= 1:
+        return df.iloc[0]
+    temp = df.copy()
+    rules = {
+        "급성경구독성":     ('LD50', ['Rat'], None, '401'),
+        "급성흡입독성":     ('LC50', ['Rat'], '4 h', '403'),
+        "어류급성독성":     ('LC50', ['Fathead minnow', 'Zebrafish', 'Rainbow trout'], '96 h', '203'),
+        "물벼룩급성독성":   ('EC50', ['Daphnia magna'], '48 h', '202'),
+        "담수조류생장저해": ('EC50', ['P. subcapitata', 'D. subspicatus'], '72 h', '201'),
+    }
+    if cat in rules:
+        ep, species, duration, guideline = rules[cat]
+        temp['p1'] = (temp['Endpoint(표준)'] == ep).astype(int)
+        temp['p2'] = temp['시험종(표준)'].isin(species).astype(int)
+        cols = ['p1', 'p2']
+        if duration is not None:
+            temp['p3'] = (temp['Duration(표준)'] == duration).astype(int)
+            cols.append('p3')
+        temp['p4'] = temp['시험지침'].astype(str).str.contains(guideline, na=False).astype(int)
+        cols.append('p4')
+        temp = temp.sort_values(cols + ['Result'], ascending=[False] * len(cols) + [True])
+    elif cat == '이분해성':
+        def gl(v):
+            v = str(v).upper()
+            return 2 if 'OECD' in v else (1 if v not in ['-', '', 'NAN'] else 0)
+        temp['gl'] = temp['시험지침'].apply(gl)
+        temp['result_num'] = pd.to_numeric(temp['Result'], errors='coerce').fillna(0)
+        temp = temp.sort_values(['gl', 'result_num'], ascending=[False, False])
+    return temp.iloc[0]
+
+
+def legacy_skin(df):
+    temp = df[df['Result'].astype(str).str.lower().isin(['positive', 'negative'])]
+    if not temp.empty:
+        rabbit = temp[temp['시험종(표준)'].astype(str).str.contains('Rabbit', case=False, na=False)]
+        return rabbit.iloc[0] if not rabbit.empty else temp.iloc[0]
+    return None
+
+
+def legacy_danish(df, cat, exp_species=None):
+    if len(df) <= 1:
+        return df.iloc[0]
+    temp = df.copy()
+    if cat == CHROMOSOME_CAT:
+        mname = DANISH_CHO if exp_species == "CHO Cells" else DANISH_CHL
+        temp['p_q'] = (temp['모델 종류 및 버전'] == mname).astype(int)
+    elif cat in DANISH_MODELS:
+        temp['p_q'] = (temp['모델 종류 및 버전'] == DANISH_MODELS[cat]).astype(int)
+    else:
+        temp['p_q'] = 0
+    return temp.sort_values('p_q', ascending=False).iloc[0]
+
+
+def legacy_select(df):
+    """{(내부식별자, 유해성항목, 결과도출방법, 출처): 선택 행 라벨} (기존 추출 함수의 출처 순회 순서대로)"""
+    out = {}
+    for (tid, cat), df_cat in df.groupby(['내부식별자', '유해성항목'], sort=False):
+        species = None
+        for src in EXP_SOURCES:
+            d = df_cat[(df_cat['결과도출방법'] == '실험값') & (df_cat['출처'] == src)]
+            if d.empty:
+                continue
+            best = legacy_skin(d) if cat == '피부부식성/자극성' else legacy_exp(d, cat)
+            if best is not None:
+                out[(tid, cat, '실험값', src)] = best.name
+                if cat == CHROMOSOME_CAT:
+                    species = best['시험종(표준)']
+        for (method, src), d in df_cat.groupby(['결과도출방법', '출처'], sort=False):
+            if method == '실험값':
+                continue
+            if (method, src) == ('QSAR', 'Danish QSAR'):
+                best = legacy_danish(d, cat, species)
+            elif src == 'VEGA' and method in ('QSAR', 'AI-based QSAR'):
+                best = legacy_vega(d)
+            else:
+                best = d.iloc[0]
+            out[(tid, cat, method, src)] = best.name
+    return out
+
+
+def new_select(raw):
+    """ingest와 같은 형식(사용 열 + category)으로 바꿔 select_best; 실험값은 기준과 같은 출처만"""
+    df = raw[TOX_COLUMNS].reset_index(drop=True).astype({c: 'category' for c in TOX_CATEGORIES})
+    best = select_best(df)
+    return {k: pos for k, pos in best.items() if k[2] != '실험값' or k[3] in EXP_SOURCES}
+
+
+def assert_same_selection(raw):
+    raw = raw.reset_index(drop=True)
+    expected, actual = legacy_select(raw), new_select(raw)
+    assert set(actual) == set(expected)
+    mismatches = {k: (expected[k], actual[k]) for k in expected if expected[k] != actual[k]}
+    assert not mismatches
+
+
+@pytest.fixture(scope='module')
+def raw_tox():
+    """기존 앱과 같은 방식으로 읽은 유해성정보 시트"""
+    return pd.read_excel(engine.DB_FILENAME, sheet_name=SHEET_TOX)
+
+
+def test_bundled_db(raw_tox):
+    assert_same_selection(raw_tox)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_perturbed_db(raw_tox, seed):
+    """행 순서 섞기 + 중복 행(동순위), Result 혼합형/NaN, 염색체이상 CHO/CHL 모델 (Danish 2차 선택)"""
+    rng = np.random.default_rng(seed)
+    df = raw_tox.sample(frac=1.0, random_state=seed)
+    df = pd.concat([df, df.sample(frac=0.5, random_state=seed + 10)], ignore_index=True)
+
+    result = df['Result'].astype(object).copy()
+    pick = rng.random(len(df)) < 0.2
+    choices = np.array([1, 2.0, 'positive', 'Negative', '-', np.nan, 'abc', 3], dtype=object)
+    result[pick] = rng.choice(choices, pick.sum())
+    df['Result'] = result
+
+    df.loc[rng.random(len(df)) < 0.1, '시험종(표준)'] = 'CHO Cells'
+    danish = ((df['유해성항목'] == CHROMOSOME_CAT) & (df['결과도출방법'] == 'QSAR')
+              & (df['출처'] == 'Danish QSAR')).to_numpy()
+    df.loc[danish, '모델 종류 및 버전'] = rng.choice([DANISH_CHO, DANISH_CHL, 'other'], danish.sum())
+    assert_same_selection(df)
+
+
+def test_synthetic_edge_cases(raw_tox):
+    """완전 동순위, 양/음성 결과가 없는 피부 그룹, 이분해성 NaN Result, 새 물질의 CHO Danish 선택"""
+    base = raw_tox.iloc[0].to_dict()
+
+    def row(**kw):
+        return {**base, **kw}
+
+    tid = 'T-EDGE'
+    rows = [
+        # 급성경구독성: 모든 우선순위 키가 같음 → 원래 순서의 첫 행
+        row(내부식별자=tid, 유해성항목='급성경구독성', 결과도출방법='실험값', 출처='ECHA CHEM',
+            **{'Endpoint(표준)': 'LD50', '시험종(표준)': 'Rat', '시험지침': 'OECD 401', 'Result': 100}),
+        row(내부식별자=tid, 유해성항목='급성경구독성', 결과도출방법='실험값', 출처='ECHA CHEM',
+            **{'Endpoint(표준)': 'LD50', '시험종(표준)': 'Rat', '시험지침': 'OECD 401', 'Result': 100}),
+        # 피부: 양/음성 결과가 없음 → 선택 없음
+        row(내부식별자=tid, 유해성항목='피부부식성/자극성', 결과도출방법='실험값', 출처='Pubchem',
+            **{'시험종(표준)': 'Rabbit', 'Result': 'irritating'}),
+        # 이분해성: NaN Result는 0으로 취급
+        row(내부식별자=tid, 유해성항목='이분해성', 결과도출방법='실험값', 출처='K-reach',
+            **{'시험지침': 'OECD 301F', 'Result': np.nan}),
+        row(내부식별자=tid, 유해성항목='이분해성', 결과도출방법='실험값', 출처='K-reach',
+            **{'시험지침': 'OECD 301B', 'Result': 45}),
+        # 염색체이상: 마지막 출처의 실험값 시험종이 CHO → Danish는 CHO 모델
+        row(내부식별자=tid, 유해성항목=CHROMOSOME_CAT, 결과도출방법='실험값', 출처='ECHA CHEM',
+            **{'시험종(표준)': 'CHL Cells', 'Result': 'negative'}),
+        row(내부식별자=tid, 유해성항목=CHROMOSOME_CAT, 결과도출방법='실험값', 출처='환경부유해성심사결과',
+            **{'시험종(표준)': 'CHO Cells', 'Result': 'positive'}),
+        row(내부식별자=tid, 유해성항목=CHROMOSOME_CAT, 결과도출방법='QSAR', 출처='Danish QSAR',
+            **{'모델 종류 및 버전': DANISH_CHL, 'Result': 'NEG'}),
+        row(내부식별자=tid, 유해성항목=CHROMOSOME_CAT, 결과도출방법='QSAR', 출처='Danish QSAR',
+            **{'모델 종류 및 버전': DANISH_CHO, 'Result': 'POS'}),
+    ]
+    df = pd.concat([raw_tox, pd.DataFrame(rows)], ignore_index=True)
+    assert_same_selection(df)
+
+    best = new_select(df)
+    start = len(raw_tox)
+    assert best[(tid, '급성경구독성', '실험값', 'ECHA CHEM')] == start
+    assert (tid, '피부부식성/자극성', '실험값', 'Pubchem') not in best
+    assert best[(tid, '이분해성', '실험값', 'K-reach')] == start + 4
+    assert best[(tid, CHROMOSOME_CAT, 'QSAR', 'Danish QSAR')] == start + 8
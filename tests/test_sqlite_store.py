@@ -0,0 +1,79 @@
+import io
+import os
+import zipfile
+
+import pytest
+
+import engine
+import extractor
+from engine import TPL_MULTI, TPL_SINGLE, _build_multi, _build_single
+from sqlite_store import SQLiteDB, build_sqlite
+
+# ─────────────────────────────────────────────────────────────
+# SQLite 저장소 ↔ 메모리 DBVersion: 같은 번들 DB에서 만든 결과 엑셀이 같은지
+#   docProps/core.xml(저장 시각)만 빼고 xlsx 구성 파일을 바이트 단위로 비교
+# ─────────────────────────────────────────────────────────────
+
+VOLATILE = {'docProps/core.xml'}
+
+
+@pytest.fixture(scope='module')
+def sqlite_db(tmp_path_factory):
+    out = str(tmp_path_factory.mktemp('sqlite') / 'db.sqlite')
+    return SQLiteDB(build_sqlite(engine.DB_FILENAME, out))
+
+
+def members(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        return {name: zf.read(name) for name in zf.namelist() if name not in VOLATILE}
+
+
+def assert_same_workbook(actual, expected):
+    actual, expected = members(actual), members(expected)
+    assert list(actual) == list(expected)
+    assert [name for name in expected if actual[name] != expected[name]] == []
+
+
+def test_meta(sqlite_db, bundled_db):
+    assert sqlite_db.sha256 == bundled_db.sha256
+    assert sqlite_db.ids() == bundled_db.ids()
+
+
+def test_single(sqlite_db, bundled_db):
+    for tid in bundled_db.ids():
+        assert_same_workbook(_build_single(tid, sqlite_db.select([tid]), TPL_SINGLE),
+                             _build_single(tid, bundled_db.select([tid]), TPL_SINGLE))
+
+
+@pytest.mark.parametrize('streaming', [False, True])
+def test_multi(sqlite_db, bundled_db, monkeypatch, streaming):
+    if streaming:      # 번들 DB는 물질 수가 스트리밍 기준보다 적음
+        monkeypatch.setattr(extractor, 'MULTI_STREAM_MIN', 2)
+    ids = bundled_db.ids()
+    for tids in (ids[:2], ids[::-1], ids):
+        assert_same_workbook(_build_multi(tids, sqlite_db.select(tids), TPL_MULTI),
+                             _build_multi(tids, bundled_db.select(tids), TPL_MULTI))
+
+
+
+def test_stored_hashes_match_view(sqlite_db, bundled_db):
+    ids = bundled_db.ids()
+    assert sqlite_db.hashes_for(ids) == sqlite_db.select(ids).id_hashes
+    assert sqlite_db.hashes_for(ids[:1]) == sqlite_db.select(ids[:1]).id_hashes
+
+
+def test_cache_hit_skips_fetch(sqlite_db, bundled_db, monkeypatch, tmp_path):
+    """결과 캐시 적중이면 SQLite에서 물질 행을 읽지 않음"""
+    import dbstore
+    import result_cache
+
+    monkeypatch.setattr(result_cache, '_CACHE', result_cache.ResultCache(cache_dir=str(tmp_path / 'cache')))
+    monkeypatch.setitem(dbstore._SHARED, os.path.abspath(sqlite_db.path), dbstore.SharedDB(sqlite_db.path, 0))
+    selects = []
+    select = SQLiteDB.select
+    monkeypatch.setattr(SQLiteDB, 'select', lambda self, ids: selects.append(list(ids)) or select(self, ids))
+
+    tid = bundled_db.ids()[0]
+    first = engine.single_xlsx(tid, sqlite_db.path)
+    assert engine.single_xlsx(tid, sqlite_db.path) == first
+    assert selects == [[tid]]
@@ -0,0 +1,48 @@
+import io
+from copy import copy
+
+import pytest
+from openpyxl import load_workbook
+
+import engine
+from extractor import extract_multi, stream_multi
+from templates import load_template
+
+STYLE_ATTRS = ('font', 'fill', 'border', 'alignment', 'protection')
+
+
+def _in_memory(tids, db):
+    wb = load_template(engine.TPL_MULTI)
+    extract_multi(tids, db.df_mat, db.df_tox, wb, db.index)
+    buf = io.BytesIO()
+    wb.save(buf)
+    return load_workbook(buf)
+
+
+def _streamed(tids, db):
+    buf = io.BytesIO()
+    stream_multi(tids, db.df_mat, db.df_tox, engine.TPL_MULTI, buf, db.index)
+    return load_workbook(buf)
+
+
+@pytest.mark.parametrize('n', [2, 4])
+def test_streamed_matches_in_memory(bundled_db, n):
+    """스트리밍 생성 결과가 값/셀 서식/기본 글꼴/NamedStyle까지 메모리 생성 결과와 같은지"""
+    tids = bundled_db.ids()[:n]
+    a, b = _in_memory(tids, bundled_db), _streamed(tids, bundled_db)
+
+    assert copy(a._fonts[0]) == copy(b._fonts[0])
+    assert [s.name for s in a._named_styles] == [s.name for s in b._named_styles]
+
+    wa, wb = a.active, b.active
+    assert wa.title == wb.title
+    assert wa.max_row == wb.max_row
+    assert sorted(map(str, wa.merged_cells.ranges)) == sorted(map(str, wb.merged_cells.ranges))
+    for r in range(1, wa.max_row + 1):
+        assert wa.row_dimensions[r].height == wb.row_dimensions[r].height, r
+        for c in range(1, wa.max_column + 1):
+            x, y = wa.cell(r, c), wb.cell(r, c)
+            assert x.value == y.value, (r, c)
+            assert x.number_format == y.number_format, (r, c)
+            for attr in STYLE_ATTRS:
+                assert copy(getattr(x, attr)) == copy(getattr(y, attr)), (r, c, attr)
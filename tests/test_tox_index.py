@@ -0,0 +1,63 @@
+import threading
+
+import extractor
+import ingest
+from dbstore import DBVersion
+from tox_index import _INDEX_MEMO, _memo_key, get_index
+
+# ─────────────────────────────────────────────────────────────
+# 조회 인덱스: 새 DB 버전에서는 행이 바뀐 물질의 트리/보고서 행렬만 다시 만들고,
+#   같은 프레임으로 동시에 요청하면 인덱스 하나만 만들어 공유
+# ─────────────────────────────────────────────────────────────
+
+
+def test_refresh_rebuilds_only_changed_substance(db_copy, edit_result, monkeypatch):
+    built = []
+    build_reports = extractor.build_reports
+
+    def counting(idx, tids=None):
+        built.append(sorted(t for t in idx._mat if t not in idx.reports))
+        return build_reports(idx, tids)
+
+    monkeypatch.setattr(extractor, 'build_reports', counting)
+    v1 = DBVersion(db_copy)
+    ids, changed = v1.ids(), v1.ids()[3]
+    assert built == [sorted(ids)]
+
+    edit_result(db_copy, changed, 123456.789)
+    v2 = DBVersion(db_copy)
+    assert built[1:] == [[changed]]
+    assert v2.sha256 != v1.sha256
+    assert {t for t in ids if v2.id_hashes[t] != v1.id_hashes[t]} == {changed}
+
+    idx = v2.index
+    assert idx.rebuilt == 1          # 보고서 행렬을 다시 만들며 바뀐 물질의 트리만 생성
+    for tid in ids:
+        reused = tid != changed
+        assert (idx._tree[tid] is v1.index._tree[tid]) == reused
+        assert (idx.reports[tid] == v1.index.reports[tid]) == reused
+    assert v1.index._tree[changed] is not idx._tree[changed]    # 이전 버전 인덱스는 그대로
+
+
+def test_concurrent_get_index_shares_one(bundled_db, tmp_path):
+    # 번들 DB 프레임의 복사본 → 메모에 없는 새 프레임 쌍
+    df_mat, df_tox = bundled_db.df_mat.copy(), bundled_db.df_tox.copy()
+    source = str(tmp_path / 'db.xlsx')
+    results = []
+    barrier = threading.Barrier(8)
+
+    def get():
+        barrier.wait()
+        results.append(get_index(df_mat, df_tox, ingest.id_hashes(df_mat, df_tox), source=source))
+
+    threads = [threading.Thread(target=get) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    try:
+        assert len(results) == 8
+        assert all(r is results[0] for r in results)
+        assert _INDEX_MEMO[_memo_key(source)] is results[0]
+    finally:
+        _INDEX_MEMO.pop(_memo_key(source), None)
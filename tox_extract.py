@@ -0,0 +1,164 @@
+import argparse
+import os
+import sys
+
+import engine
+from export import EXPORT_FORMATS
+from perf import PROFILERS, trace
+
+# ─────────────────────────────────────────────────────────────
+# 명령행 추출
+#   python tox_extract.py single B-3 -o out.xlsx
+#   python tox_extract.py multi B-1 B-3 -o out.xlsx
+#   python tox_extract.py bulk ids.txt -o out.zip   (ids 파일 생략 시 DB 전체)
+#   python tox_extract.py export -f jsonl -o out.jsonl  (엑셀 없이 값만)
+#   python tox_extract.py search 50-00-0                (ID/CAS/물질명/분자식 검색)
+#   python tox_extract.py sqlite                        (DB 엑셀 → SQLite, 이후 --db DB.sqlite)
+#   python tox_extract.py --db db.json catalog 배치1.xlsx 배치2.xlsx  (여러 워크북 카탈로그)
+#   python tox_extract.py serve --port 8765             (작업 큐 + 로컬 HTTP API, api.py 참고)
+# ─────────────────────────────────────────────────────────────
+
+def build_parser():
+    p = argparse.ArgumentParser(prog="tox-extract", description="화학물질 독성정보 자동 추출")
+    p.add_argument("--db", default=engine.DB_FILENAME, help="DB 엑셀, SQLite(.sqlite) 또는 카탈로그(.json) 경로")
+    p.add_argument("--timings", action="store_true", help="단계별 소요 시간을 stderr에 출력")
+    p.add_argument("--profile", choices=PROFILERS, help="요청 프로파일을 stderr에 출력")
+    sub = p.add_subparsers(dest="mode", required=True)
+
+    s = sub.add_parser("single", help="개별물질 추출")
+    s.add_argument("id")
+    s.add_argument("-o", "--output")
+    s.add_argument("--template", default=engine.TPL_SINGLE)
+
+    m = sub.add_parser("multi", help="다중물질 추출")
+    m.add_argument("ids", nargs="+", help="내부식별자 (공백/쉼표 구분)")
+    m.add_argument("-o", "--output")
+    m.add_argument("--template", default=engine.TPL_MULTI)
+
+    b = sub.add_parser("bulk", help="일괄 추출 (물질별 엑셀 ZIP)")
+    b.add_argument("id_file", nargs="?", help="ID 파일 (txt/csv, 생략 시 DB 전체)")
+    b.add_argument("-o", "--output", default="추출결과_일괄.zip")
+    b.add_argument("--template", default=engine.TPL_SINGLE)
+    b.add_argument("-j", "--workers", type=int)
+
+    e = sub.add_parser("export", help="선택 결과를 CSV/JSONL/Parquet로 내보내기")
+    e.add_argument("id_file", nargs="?", help="ID 파일 (txt/csv, 생략 시 DB 전체)")
+    e.add_argument("-f", "--format", choices=EXPORT_FORMATS, default="csv")
+    e.add_argument("-o", "--output", help="출력 경로 (생략 시 추출결과.<형식>)")
+
+    q = sub.add_parser("search", help="물질 검색 (내부식별자/CAS/물질명/분자식)")
+    q.add_argument("query")
+    q.add_argument("-n", "--limit", type=int, default=20)
+
+    d = sub.add_parser("sqlite", help="DB 엑셀을 SQLite 저장소로 적재 (메모리보다 큰 DB용)")
+    d.add_argument("-o", "--output", help="SQLite 경로 (생략 시 DB 이름.sqlite)")
+
+    c = sub.add_parser("catalog", help="카탈로그(--db *.json)에 shard 워크북 등록 후 현황/중복 ID 출력")
+    c.add_argument("shards", nargs="*", help="추가할 워크북 (생략 시 현황만)")
+    c.add_argument("--budget-mb", type=float, help="적재된 shard 메모리 예산 (MB)")
+
+    a = sub.add_parser("serve", help="추출 작업 큐를 로컬 HTTP API로 제공")
+    a.add_argument("--host", help="바인드 주소 (기본 TOX_API_HOST 또는 127.0.0.1)")
+    a.add_argument("--port", type=int, help="포트 (기본 TOX_API_PORT 또는 8765)")
+    return p
+
+
+def _write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+    print(f"{path} ({len(data):,} bytes)")
+
+
+def _read_ids(id_file):
+    """ID 파일 → 내부식별자 목록 (파일 생략 시 None = DB 전체)"""
+    if not id_file:
+        return None
+    from bulk import read_id_file
+    with open(id_file, "rb") as f:
+        return read_id_file(f.read())
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    with trace(args.mode, profile=args.profile) as tr:
+        code = _run(args)
+    if args.timings:
+        print(f"총 {tr.total * 1e3:,.1f} ms", file=sys.stderr)
+        for row in tr.rows():
+            print(f"  {row['단계']:<24}{row['ms']:>10,.2f} ms", file=sys.stderr)
+    if tr.profile:
+        print(tr.profile, file=sys.stderr)
+    return code
+
+
+def _run(args):
+    try:
+        if args.mode == "single":
+            _write(args.output or engine.single_filename(args.id),
+                   engine.single_xlsx(args.id, args.db, args.template))
+
+        elif args.mode == "multi":
+            from bulk import parse_id_list
+            tids = parse_id_list("\n".join(args.ids))
+            _write(args.output or engine.multi_filename(tids),
+                   engine.multi_xlsx(tids, args.db, args.template))
+
+        elif args.mode == "search":
+            matches = engine.search_substances(args.query, args.db, args.limit)
+            for _, label in matches:
+                print(label)
+            return 0 if matches else 1
+
+        elif args.mode == "sqlite":
+            out = engine.build_sqlite_db(args.db, args.output)
+            print(f"{out} ({os.path.getsize(out):,} bytes)")
+
+        elif args.mode == "catalog":
+            info = engine.update_catalog(args.db, args.shards, args.budget_mb)
+            print(f"{args.db}: shard {len(info['shards'])}개, 물질 {info['substances']:,}종")
+            for tid, shards in info['conflicts'].items():
+                print(f"중복 {tid}: {', '.join(shards)} (앞의 shard 사용)", file=sys.stderr)
+            return 1 if info['conflicts'] else 0
+
+        elif args.mode == "serve":
+            import api
+            from jobs import get_queue
+            server = api.make_server(args.host or api.API_HOST, args.port or api.API_PORT, get_queue(args.db))
+            host, port = server.server_address[:2]
+            print(f"http://{host}:{port} (Ctrl+C로 종료)", file=sys.stderr)
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                server.server_close()
+
+        elif args.mode == "export":
+            from export import export_filename
+            out = args.output or export_filename(args.format)
+            n_rows, failures = engine.export_records(_read_ids(args.id_file), out, args.format, args.db)
+            print(f"{out} ({n_rows:,} rows)")
+            for tid, err in failures.items():
+                print(f"실패 {tid}: {err}", file=sys.stderr)
+            return 1 if failures else 0
+
+        else:
+            def on_progress(done, total, tid):
+                print(f"\r{done}/{total} {tid}", end="", file=sys.stderr, flush=True)
+
+            data, failures = engine.bulk_zip(_read_ids(args.id_file), args.db, args.template,
+                                             args.workers, on_progress)
+            print(file=sys.stderr)
+            _write(args.output, data)
+            for tid, err in failures.items():
+                print(f"실패 {tid}: {err}", file=sys.stderr)
+            return 1 if failures else 0
+
+    except (OSError, ValueError) as e:
+        print(f"오류: {e}", file=sys.stderr)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+import os
+import threading
+
+import numpy as np
+
+from ingest import snapshot_of
+from perf import span
+from selection import KEY_COLS, by_label, ensure_normalized, select_best
+
+# ─────────────────────────────────────────────────────────────
+# 유해성정보 계층 인덱스
+#   내부식별자 → 유해성항목 → 결과도출방법 → 출처 → 물질 내 행 위치
+# ─────────────────────────────────────────────────────────────
+
+# 다중물질 추출의 부분일치 조건을 인덱스 생성 시 정규 키로 변환
+CANON_QSAR_TOOLBOX = 'QSAR Toolbox'
+CANON_READ_ACROSS  = 'Read across'
+
+
+def _canonical(series, needle, canon):
+    """needle을 포함(대소문자 무시)하면 canon, 아니면 원래 값 (object 배열)"""
+    hit = by_label(series, lambda s: s.str.contains(needle, case=False, regex=False, na=False).to_numpy())
+    return np.where(hit, canon, series.to_numpy(object))
+
+
+def _indices(df, cols):
+    """groupby(cols).indices (범주형 열은 행마다 값을 꺼내지 않도록 object 배열로 묶음)"""
+    return df.groupby([df[c].to_numpy(object) for c in cols], sort=False).indices
+
+
+def _build_tree(tree, groups):
+    for (tid, cat, method, src), pos in groups.items():
+        tree.setdefault(tid, {}).setdefault(cat, {}).setdefault(method, {})[src] = pos
+    return tree
+
+
+class DBIndex:
+    """
+    DB 한 버전에 대해 한 번 생성하는 조회용 인덱스
+    트리에는 물질별 지역 위치(그 내부식별자 행들 중 순번)를 저장하므로,
+    내용 해시가 같은 물질의 부분 트리는 다음 DB 버전에서 그대로 재사용
+    """
+
+    def __init__(self, df_mat, df_tox, id_hashes=None, base=None, reports=None):
+        self.df_mat = df_mat
+        self.source = df_tox                   # get_index의 재사용 판단용 (정규화 전 원본)
+        self.df_tox = df_tox = ensure_normalized(df_tox)
+        self.id_hashes = id_hashes
+        self.reports = {} if reports is None else reports   # 내부식별자 → 보고서 행렬 (extractor.report)
+        self._empty = df_tox.iloc[:0]
+
+        # 물질정보: 내부식별자별 첫 행 위치
+        mat_pos = df_mat.groupby('내부식별자', sort=False, observed=True).indices
+        self._mat = {tid: pos[0] for tid, pos in mat_pos.items()}
+
+        # 유해성정보: 내부식별자별 행 위치 (지역 위치 → 전체 위치 변환용)
+        self._rows = df_tox.groupby('내부식별자', sort=False, observed=True).indices
+
+        self._tree, self._fuzzy, self._best = {}, {}, {}
+        reuse = self._reusable(base)
+        for tid in reuse:
+            for name in ('_tree', '_fuzzy', '_best'):
+                sub = getattr(base, name).get(tid)
+                if sub is not None:
+                    getattr(self, name)[tid] = sub
+
+        # 트리는 물질별로 처음 조회할 때 생성 (스냅샷의 보고서 행렬만 쓰는 추출은 트리가 필요 없음)
+        self._todo = {tid for tid in self._rows if tid not in reuse}
+        self.rebuilt = len(self._todo)
+        self._tree_lock = threading.Lock()
+
+    def build(self, tids=None):
+        """tids(생략 시 전체) 물질의 조회 트리 생성 (이미 만든 물질은 건너뜀) → self"""
+        if self._todo:
+            with self._tree_lock:
+                want = self._rows if tids is None else dict.fromkeys(tids)
+                todo = [t for t in want if t in self._todo]
+                if todo:
+                    with span('index_tree', substances=len(todo)):
+                        self._build(todo, full=len(todo) == len(self._rows))
+                    self._todo.difference_update(todo)
+        return self
+
+    def _ensure(self, tid):
+        if tid in self._todo:
+            self.build((tid,))
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state['_tree_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._tree_lock = threading.Lock()
+
+    def _reusable(self, base):
+        """이전 인덱스와 행 묶음 해시가 같은 내부식별자 (이전 인덱스에서 트리를 만든 물질만)"""
+        if base is None or not self.id_hashes or not base.id_hashes:
+            return set()
+        old = base.id_hashes
+        return {tid for tid in self._rows
+                if tid in base._rows and tid not in base._todo and self.id_hashes.get(tid) is not None
+                and old.get(tid) == self.id_hashes.get(tid)}
+
+    def _build(self, tids, full):
+        if full:
+            sel, sub = None, self.df_tox
+        else:
+            sel = np.sort(np.concatenate([self._rows[t] for t in tids]))
+            sub = self.df_tox.iloc[sel]
+        # sub 안의 물질별 순번 = 지역 위치 (물질의 행이 모두 포함되므로)
+        local = sub.groupby('내부식별자', sort=False, observed=True).cumcount().to_numpy()
+
+        # 정확일치 트리
+        groups = _indices(sub, KEY_COLS)
+        _build_tree(self._tree, {k: local[pos] for k, pos in groups.items()})
+
+        # 부분일치 트리 ('QSAR Toolbox' 출처 행만)
+        src = _canonical(sub['출처'], CANON_QSAR_TOOLBOX, CANON_QSAR_TOOLBOX)
+        hit = np.flatnonzero(src == CANON_QSAR_TOOLBOX)
+        fz = sub.iloc[hit][['내부식별자', '유해성항목']].assign(
+            결과도출방법=_canonical(sub['결과도출방법'].iloc[hit], CANON_READ_ACROSS, CANON_READ_ACROSS),
+            출처=CANON_QSAR_TOOLBOX)
+        groups = _indices(fz, KEY_COLS)
+        _build_tree(self._fuzzy, {k: local[hit[pos]] for k, pos in groups.items()})
+
+        # 그룹별 최우선 행 (우선순위 엔진)
+        _build_tree(self._best, {k: int(local[pos]) for k, pos in select_best(sub).items()})
+
+    def material(self, tid):
+        """물질정보 행(Series) 또는 None"""
+        pos = self._mat.get(tid)
+        return None if pos is None else self.df_mat.iloc[pos]
+
+    def lookup(self, tid, cat, method, src):
+        """(내부식별자, 유해성항목, 결과도출방법, 출처) 정확일치 행"""
+        self._ensure(tid)
+        return self._take(self._tree, tid, cat, method, src)
+
+    def lookup_qsar_toolbox(self, tid, cat, method):
+        """출처에 'QSAR Toolbox' 포함 + 정규화된 결과도출방법 일치 행"""
+        self._ensure(tid)
+        return self._take(self._fuzzy, tid, cat, method, CANON_QSAR_TOOLBOX)
+
+    def best(self, tid, cat, method, src):
+        """그룹 최우선 행(Series) 또는 None"""
+        pos = self.best_position(tid, cat, method, src)
+        return None if pos is None else self.df_tox.iloc[pos]
+
+    def best_position(self, tid, cat, method, src):
+        """그룹 최우선 행의 전체 위치 또는 None"""
+        self._ensure(tid)
+        pos = self._best.get(tid, {}).get(cat, {}).get(method, {}).get(src)
+        return None if pos is None else int(self._rows[tid][pos])
+
+    def qsar_toolbox_position(self, tid, cat, method):
+        """lookup_qsar_toolbox 첫 행의 전체 위치 또는 None"""
+        self._ensure(tid)
+        pos = self._fuzzy.get(tid, {}).get(cat, {}).get(method, {}).get(CANON_QSAR_TOOLBOX)
+        return None if pos is None else int(self._rows[tid][pos[0]])
+
+    def _take(self, tree, tid, cat, method, src):
+        pos = tree.get(tid, {}).get(cat, {}).get(method, {}).get(src)
+        return self._empty if pos is None else self.df_tox.iloc[self._rows[tid][pos]]
+
+
+# 원본(DB 경로) → 그 원본으로 만든 마지막 인덱스
+# 새 버전의 트리 재사용(base)은 같은 원본의 인덱스에서만 (카탈로그 shard/벤치마크 DB끼리 섞이지 않도록)
+_INDEX_MEMO = {}
+_INDEX_LOCK = threading.Lock()
+
+
+def _memo_key(source):
+    return None if source is None else os.path.abspath(source)
+
+
+def get_index(df_mat, df_tox, id_hashes=None, source=None):
+    """
+    같은 DataFrame 쌍에 대해서는 인덱스를 재사용하고,
+    같은 원본(source: DB 경로)의 새 버전이면 직전 인덱스에서 내용이 바뀐 물질만 다시 생성
+    load_db가 반환한 프레임이면 스냅샷의 물질별 해시와 보고서 행렬을 함께 사용
+    """
+    key = _memo_key(source)
+    with _INDEX_LOCK:
+        prev = _INDEX_MEMO.get(key)
+    if prev is not None and prev.df_mat is df_mat and prev.source is df_tox:
+        return prev
+
+    snap = snapshot_of(df_tox)
+    reports = None
+    if snap is not None:
+        id_hashes, reports = snap['meta']['id_hashes'], snap.get('reports')
+    idx = DBIndex(df_mat, df_tox, id_hashes, prev if key is not None else None, reports)
+    with _INDEX_LOCK:
+        cur = _INDEX_MEMO.get(key)
+        if cur is not None and cur.df_mat is df_mat and cur.source is df_tox:
+            return cur        # 다른 스레드가 먼저 만듦
+        _INDEX_MEMO[key] = idx
+    return idx
+
+
+def forget(idx):
+    """메모에서 인덱스 제거 (메모리 예산으로 내린 DB가 계속 남지 않도록)"""
+    with _INDEX_LOCK:
+        for key, value in list(_INDEX_MEMO.items()):
+            if value is idx:
+                del _INDEX_MEMO[key]